@@ -0,0 +1,284 @@
+"""
+CPM Micro-Benchmark Suite
+Times the critical path service on synthetic WBS graphs and reports memory
+
+Usage:
+    python benchmark_cpm.py                          # default sizes, table on stderr
+    python benchmark_cpm.py --sizes 1000 10000 --output bench.json
+    python benchmark_cpm.py --output new.json --compare old.json   # exit 1 on regression
+
+--compare flags a stage whose best (minimum) time over --repeats runs is
+more than --threshold times the best time in the old results; the minimum
+is the least affected by scheduler and cache noise.
+
+Graphs:
+    layered-N      random layered DAG (configurable depth and fan-out)
+    construction-N construction-like WBS: design and ground work, then
+                   per building structure/envelope/MEP/finishing chains
+                   floor by floor, then outdoor works and handover
+"""
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from services.critical_path_service import CriticalPathCalculator, WBSGraph, calculate_critical_path
+
+
+START_DATE = "2025-01-15"
+DEADLINE = "2026-05-15"
+
+
+# =============================================================================
+# Graph generators
+# =============================================================================
+
+def _item(wbs_id: str, duration: int, dependencies: List[str], rng: random.Random) -> Dict:
+    negotiable = rng.random() < 0.2
+    return {
+        "id": wbs_id,
+        "name": f"Item {wbs_id}",
+        "is_negotiable": negotiable,
+        "baseline_duration": duration if negotiable else None,
+        "locked_duration": None if negotiable else duration,
+        "baseline_cost": rng.randint(1, 50) * 1_000_000 if negotiable else None,
+        "locked_cost": None if negotiable else rng.randint(1, 50) * 1_000_000,
+        "complexity": rng.choice(["low", "medium", "high"]),
+        "dependencies": dependencies,
+    }
+
+
+def layered_dag(nodes: int, depth: int = 50, fan_out: int = 3, seed: int = 0) -> List[Dict]:
+    """
+    Random layered DAG.
+
+    Nodes are spread over ``depth`` layers; every node outside the first
+    layer gets 1..fan_out predecessors, mostly from the previous layer and
+    occasionally from any earlier layer (long edges).
+    """
+    rng = random.Random(seed)
+    depth = max(1, min(depth, nodes))
+    layers: List[List[str]] = [[] for _ in range(depth)]
+    for i in range(nodes):
+        layers[i * depth // nodes].append(f"{i * depth // nodes + 1}.{len(layers[i * depth // nodes]) + 1}")
+
+    items = []
+    for level, layer in enumerate(layers):
+        for wbs_id in layer:
+            deps = []
+            if level:
+                for _ in range(rng.randint(1, fan_out)):
+                    source = level - 1 if rng.random() < 0.8 else rng.randrange(level)
+                    deps.append(rng.choice(layers[source]))
+            items.append(_item(wbs_id, rng.randint(1, 60), sorted(set(deps)), rng))
+    return items
+
+
+def construction_wbs(nodes: int, floors: int = 6, seed: int = 0) -> List[Dict]:
+    """
+    Construction-like WBS of roughly ``nodes`` items.
+
+    Shared design and ground work feed a number of buildings. Each floor of a
+    building runs structure -> envelope -> MEP -> finishing, with structure
+    following the floor below and every trade following the same trade on the
+    floor below (crews move upwards). Outdoor works follow the buildings and
+    everything converges on handover.
+    """
+    rng = random.Random(seed)
+    items: List[Dict] = []
+
+    def add(wbs_id: str, low: int, high: int, deps: List[str]) -> str:
+        items.append(_item(wbs_id, rng.randint(low, high), deps, rng))
+        return wbs_id
+
+    design = add("1.1.1", 60, 120, [])
+    permit = add("1.1.2", 20, 60, [design])
+    ground = add("1.2.1", 40, 120, [permit])
+    excavation = add("1.2.2", 30, 90, [ground])
+
+    trades = ["structure", "envelope", "mep", "finishing"]
+    per_building = 1 + floors * len(trades)
+    buildings = max(1, (nodes - 6) // per_building)
+
+    building_ends = []
+    for b in range(buildings):
+        prefix = f"1.{3 + b}"
+        foundation = add(f"{prefix}.1", 20, 60, [excavation])
+        below: Dict[str, str] = {}
+        last = []
+        for floor in range(floors):
+            for t, trade in enumerate(trades):
+                deps = []
+                if t == 0:
+                    deps.append(below.get("structure", foundation))
+                else:
+                    deps.append(f"{prefix}.{2 + floor * len(trades) + t - 1}")
+                if trade in below and t:
+                    deps.append(below[trade])
+                below[trade] = add(f"{prefix}.{2 + floor * len(trades) + t}", 5, 40, deps)
+            last = [below[trade] for trade in trades]
+        building_ends.append(last[-1])
+
+    outdoor = add(f"1.{3 + buildings}.1", 30, 90, building_ends)
+    add(f"1.{4 + buildings}.1", 10, 30, [outdoor] + building_ends[-1:])
+    return items
+
+
+# =============================================================================
+# Timing
+# =============================================================================
+
+def _time(operation: Callable[[], object], repeats: int,
+          setup: Optional[Callable[[], object]] = None) -> List[float]:
+    timings = []
+    for _ in range(repeats):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        operation()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def _peak_kib(operation: Callable[[], object], setup: Optional[Callable[[], object]] = None) -> float:
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    try:
+        operation()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark_graph(name: str, items: List[Dict], repeats: int) -> List[Dict]:
+    """Time each CPM stage on one graph; returns one result row per stage."""
+    graph = WBSGraph(items)
+    graph.topological_order()
+    edges = sum(len(preds) for preds in graph.predecessors)
+    deadline = datetime.strptime(DEADLINE, "%Y-%m-%d")
+
+    # Fresh graph per run (built untimed), so the cached order is not reused
+    fresh: List[CriticalPathCalculator] = []
+
+    def new_calculator():
+        fresh[:] = [CriticalPathCalculator(items, START_DATE)]
+
+    def topological_sort():
+        fresh[0].topological_sort()
+
+    calculator = CriticalPathCalculator(items, START_DATE, graph)
+    calculator.forward_pass({})
+
+    operations = {
+        "topological_sort": topological_sort,
+        "forward_pass": lambda: calculator.forward_pass({}),
+        "backward_pass": lambda: calculator.backward_pass({}, deadline),
+        "calculate": lambda: calculate_critical_path(items, [], START_DATE, DEADLINE),
+    }
+    setups = {"topological_sort": new_calculator}
+
+    rows = []
+    for op, operation in operations.items():
+        setup = setups.get(op)
+        if setup is not None:
+            setup()
+        operation()  # warm-up
+        timings = _time(operation, repeats, setup)
+        rows.append({
+            "graph": name,
+            "nodes": len(graph),
+            "edges": edges,
+            "op": op,
+            "repeats": repeats,
+            "min_ms": round(min(timings), 3),
+            "median_ms": round(statistics.median(timings), 3),
+            "peak_kib": round(_peak_kib(operation, setup), 1),
+        })
+    return rows
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results: List[Dict], baseline: List[Dict], threshold: float) -> List[str]:
+    """Regressions where the best (minimum) time is more than ``threshold`` times slower."""
+    previous = {(r["graph"], r["op"]): r for r in baseline}
+    regressions = []
+    for row in results:
+        old = previous.get((row["graph"], row["op"]))
+        if old and old["min_ms"] > 0 and row["min_ms"] / old["min_ms"] > threshold:
+            regressions.append(
+                f"{row['graph']} {row['op']}: best {old['min_ms']:.3f} ms -> {row['min_ms']:.3f} ms "
+                f"({row['min_ms'] / old['min_ms']:.2f}x)"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CPM micro-benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1_000, 10_000], help="Node counts")
+    parser.add_argument("--depth", type=int, default=50, help="Layers of the layered DAG")
+    parser.add_argument("--fan-out", type=int, default=3, help="Max predecessors per node (layered DAG)")
+    parser.add_argument("--floors", type=int, default=6, help="Floors per building (construction WBS)")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed runs per stage")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write JSON results to this file (default: stdout)")
+    parser.add_argument("--compare", help="Previous JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Slowdown factor of the best time counted as a regression")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        graphs = {
+            f"layered-{size}": layered_dag(size, args.depth, args.fan_out, args.seed),
+            f"construction-{size}": construction_wbs(size, args.floors, args.seed),
+        }
+        for name, items in graphs.items():
+            rows = benchmark_graph(name, items, args.repeats)
+            for row in rows:
+                print(f"{row['graph']:<20} {row['op']:<17} {row['nodes']:>7} nodes  "
+                      f"median {row['median_ms']:>10.3f} ms  peak {row['peak_kib']:>10.1f} KiB", file=sys.stderr)
+            results.extend(rows)
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f)["results"], args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
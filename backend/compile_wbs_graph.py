@@ -0,0 +1,24 @@
+"""
+Compile wbs.json into the binary WBS graph format
+Usage: python compile_wbs_graph.py [wbs.json] [output]
+
+The backend maps the output file instead of parsing wbs.json when
+WBS_GRAPH_PATH points at it; recompile after changing wbs.json.
+"""
+
+import sys
+from pathlib import Path
+
+from services.wbs_binary_graph import compile_wbs_graph
+
+DATA_DIR = Path(__file__).parent / "data"
+
+source = Path(sys.argv[1]) if len(sys.argv) > 1 else DATA_DIR / "wbs.json"
+target = Path(sys.argv[2]) if len(sys.argv) > 2 else DATA_DIR / "wbs.graph.bin"
+
+print(f"Compiling {source} -> {target}")
+info = compile_wbs_graph(source, target)
+print(f"  Nodes: {info['nodes']}")
+print(f"  Edges: {info['edges']}")
+print(f"  Size: {info['bytes']:,} bytes")
+print(f"  Source SHA-256: {info['source_sha256']}")
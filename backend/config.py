@@ -26,6 +26,8 @@ class Settings(BaseSettings):
     # --- Supabase ---
     SUPABASE_URL: str
     SUPABASE_ANON_KEY: str
+    # Only for admin scripts that work across users (e.g. revalidate_sessions.py)
+    SUPABASE_SERVICE_ROLE_KEY: Optional[str] = None
 
     # Optional: only needed if you later choose to verify JWT locally
     SUPABASE_JWT_SECRET: Optional[str] = None
@@ -35,6 +37,21 @@ class Settings(BaseSettings):
     GEMINI_MODEL: str = "gemini-1.5-pro"
     GEMINI_TEMPERATURE: float = 0.7
     GEMINI_MAX_TOKENS: int = 2048
+    # Concurrent Gemini requests per worker process (others wait their turn)
+    GEMINI_MAX_CONCURRENCY: int = 16
+    # Prompt tokens for conversation history; older turns are summarized
+    GEMINI_HISTORY_TOKEN_BUDGET: int = 3000
+    # Latest messages always sent verbatim (if they fit the budget)
+    GEMINI_HISTORY_KEEP_TURNS: int = 8
+    # Cache agent system prompts + WBS on the provider side instead of resending them
+    GEMINI_CONTEXT_CACHE: bool = True
+    GEMINI_CONTEXT_CACHE_TTL_SECONDS: int = 3600
+
+    # --- CPM engine ---
+    # Worker processes for Monte Carlo risk simulation (1 = run in-process)
+    CPM_SIMULATION_WORKERS: int = 1
+    # Binary graph compiled with compile_wbs_graph.py, used if it matches wbs.json (empty = disabled)
+    WBS_GRAPH_PATH: str = ""
 
 
 settings = Settings()
@@ -3,6 +3,7 @@ from __future__ import annotations
 # ---- Standard library ----
 import json
 import time
+from contextlib import asynccontextmanager
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional
@@ -10,7 +11,9 @@ from typing import Any, Dict, List, Optional
 # ---- Third-party ----
 import requests
 from fastapi import Depends, FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from pydantic import BaseModel
 from supabase import Client, create_client
@@ -21,8 +24,22 @@ from jose import JWTError, jwk, jwt  # noqa: F401
 # ---- Local imports ----
 from config import settings
 from prompts.agent_prompts import get_agent_name, get_agent_prompt, get_agent_type
-from services.critical_path_service import calculate_critical_path
+from services.critical_path_service import dependency_ids, diff_critical_path
+from services.conversation_store import get_conversation_store
+from services.crashing_service import default_crash_curves, plan_crashing
 from services.gemini_service import get_gemini_service
+from services.resource_leveling_service import level_resources
+from services.risk_simulation_service import simulate_schedule_risk
+from services.scenario_service import evaluate_what_if
+from services.sensitivity_service import analyze_sensitivity
+from services.timeline_cache import (
+    cached_commitment_update,
+    cached_critical_path,
+    cached_near_critical,
+    get_timeline_cache,
+)
+from services.wbs_rollup_service import get_rollup_cache
+from services.wbs_service import get_compiled_wbs, get_wbs_cache
 
 
 # =============================================================================
@@ -134,6 +151,8 @@ class ChatRequest(BaseModel):
     session_id: str
     agent_id: str
     message: str
+    # Ignored: history is loaded server-side from negotiation_history
+    # (kept so older clients still validate)
     conversation_history: List[ConversationMessage] = []
     game_context: Optional[Dict[str, Any]] = None
 
@@ -234,6 +253,12 @@ class BudgetRevisionRequest(BaseModel):
     affects_total_budget: bool = False  # If True, increases total from 700 MNOK
 
 
+class LongestPath(BaseModel):
+    wbs_ids: List[str]
+    finish_date: str
+    days_shorter: int  # Days shorter than the longest path
+
+
 class ValidationResponse(BaseModel):
     valid: bool
     earliest_start: Dict[str, str]
@@ -249,6 +274,131 @@ class ValidationResponse(BaseModel):
     budget_valid: bool
     budget_used: float
     budget_remaining: float
+    longest_paths: List[LongestPath] = []
+    near_critical_items: Dict[str, int] = {}  # wbs_id -> float (days) against projected completion
+
+
+class WhatIfRequest(BaseModel):
+    scenarios: List[Dict[str, float]]  # Each scenario: wbs_id -> duration override (days, 0 = baseline)
+
+
+class WhatIfScenarioResult(BaseModel):
+    overrides: Dict[str, float]
+    projected_completion_date: str
+    total_duration_days: int
+    meets_deadline: bool
+    days_before_deadline: int
+    slack: Dict[str, int]
+    critical_path: List[str]
+
+
+class WhatIfResponse(BaseModel):
+    deadline: str
+    scenarios: List[WhatIfScenarioResult]
+
+
+class RiskSimulationRequest(BaseModel):
+    iterations: int = 10_000
+    distribution: str = "pert"  # "pert" or "triangular"
+    time_budget_ms: int = 2_000
+    seed: Optional[int] = None
+
+
+class RiskSimulationResponse(BaseModel):
+    iterations_requested: int
+    iterations_run: int
+    distribution: str
+    p50_completion_date: str
+    p80_completion_date: str
+    p95_completion_date: str
+    probability_meeting_deadline: float
+    criticality_index: Dict[str, float]
+    deadline: str
+    elapsed_ms: int
+
+
+class CrashSegment(BaseModel):
+    days: int  # Days that can be cut at this price
+    cost_per_day: float  # Added cost (NOK) per day cut
+
+
+class CrashPlanRequest(BaseModel):
+    # wbs_id -> convex cost/time curve; defaults are derived for negotiable items if omitted
+    curves: Optional[Dict[str, List[CrashSegment]]] = None
+
+
+class CrashRecommendation(BaseModel):
+    wbs_id: str
+    supplier: Optional[str]
+    current_duration: int
+    target_duration: int
+    days_reduced: int
+    added_cost: float
+
+
+class CrashPlanResponse(BaseModel):
+    feasible: bool
+    deadline: str
+    current_completion_date: str
+    projected_completion_date: str
+    total_added_cost: float
+    recommendations: List[CrashRecommendation]
+
+
+class ResourceLevelingRequest(BaseModel):
+    # resource (e.g. supplier id) -> units available at a time; default 1
+    capacities: Dict[str, int] = {}
+    # wbs_id -> {resource: units}; defaults to one crew of the assigned supplier
+    demands: Optional[Dict[str, Dict[str, int]]] = None
+
+
+class ResourceLevelingResponse(BaseModel):
+    leveled_earliest_start: Dict[str, str]
+    leveled_earliest_finish: Dict[str, str]
+    leveled_completion_date: str
+    leveled_meets_deadline: bool
+    delay_days: Dict[str, int]
+    earliest_start: Dict[str, str]
+    earliest_finish: Dict[str, str]
+    projected_completion_date: str
+    meets_deadline: bool
+    deadline: str
+
+
+class WBSRollupNode(BaseModel):
+    id: str
+    name: Optional[str]  # None for summary levels not present in wbs.json
+    level: int
+    parent_id: Optional[str]
+    item_count: int
+    total_cost: float
+    committed_cost: float
+    earliest_start: Optional[str]
+    earliest_finish: Optional[str]
+    critical: bool
+    critical_items: int
+
+
+class WBSRollupResponse(BaseModel):
+    deadline: str
+    levels: Dict[int, List[WBSRollupNode]]
+
+
+class SensitivityItem(BaseModel):
+    wbs_id: str
+    name: Optional[str]
+    supplier: Optional[str]
+    duration: int
+    float_days: int
+    days_later_if_longer: int
+    days_earlier_if_shorter: int
+    swing_days: int
+
+
+class SensitivityResponse(BaseModel):
+    delta_days: int
+    projected_completion_date: str
+    items: List[SensitivityItem]  # Ranked by swing_days, largest first
 
 
 class SnapshotResponse(BaseModel):
@@ -268,6 +418,7 @@ class SnapshotResponse(BaseModel):
     days_before_deadline: int
     gantt_state: Dict[str, Any]
     precedence_state: Dict[str, Any]
+    timeline_diff: Optional[Dict[str, Any]] = None
     timestamp: str
     created_at: str
 
@@ -280,6 +431,20 @@ class SnapshotListResponse(BaseModel):
     has_more: bool
 
 
+class SnapshotDiffResponse(BaseModel):
+    version: int
+    label: str
+    snapshot_type: str
+    project_end_date: str
+    days_before_deadline: int
+    timeline_diff: Optional[Dict[str, Any]]  # None for baseline and older snapshots
+    timestamp: str
+
+
+class SnapshotDiffListResponse(BaseModel):
+    diffs: List[SnapshotDiffResponse]
+
+
 
 
 
@@ -287,10 +452,26 @@ class SnapshotListResponse(BaseModel):
 # FastAPI App Initialization
 # =============================================================================
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load wbs.json, compile the graph and precompute the baseline timeline
+    # before the first request instead of on the first session creation
+    # Use the compiled binary graph (pages shared between workers) if it
+    # matches wbs.json; checked again whenever wbs.json changes
+    if settings.WBS_GRAPH_PATH:
+        get_wbs_cache().graph_path = Path(settings.WBS_GRAPH_PATH)
+    try:
+        get_compiled_wbs()
+    except Exception as e:
+        print(f"Warning: Could not preload WBS data: {e}")
+    yield
+
+
 app = FastAPI(
     title="My FastAPI Backend",
     description="A backend service with Supabase integration using JWKS.",
     version="1.1.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -322,9 +503,38 @@ def detect_disagreement(ai_response: str) -> bool:
     return any(keyword in response_lower for keyword in disagreement_keywords)
 
 
-def _wbs_json_path() -> Path:
-    # Always resolve relative to this file (backend/main.py)
-    return Path(__file__).parent / "data" / "wbs.json"
+async def save_negotiation_message(
+    db: Client, user_id: str, request: ChatRequest, ai_response: str, is_disagreement: bool, timestamp: str,
+    history_length: int,
+) -> None:
+    """
+    Store one user message / agent response pair in negotiation_history.
+
+    ``history_length`` is the number of messages the turn was answered from.
+    """
+    insert = db.table("negotiation_history").insert(
+        {
+            "session_id": request.session_id,
+            "agent_id": request.agent_id,
+            "agent_name": get_agent_name(request.agent_id),
+            "agent_type": get_agent_type(request.agent_id),
+            "user_message": request.message,
+            "agent_response": ai_response,
+            "is_disagreement": is_disagreement,
+            "context_snapshot": request.game_context or {},
+            "timestamp": timestamp,
+        }
+    )
+    # Supabase client is synchronous; keep the event loop free
+    await run_in_threadpool(insert.execute)
+    get_conversation_store().append(
+        user_id, request.session_id, request.agent_id, request.message, ai_response, history_length
+    )
+
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
 
 
 # =============================================================================
@@ -362,10 +572,9 @@ async def chat_with_agent(
 
         gemini_service = get_gemini_service()
 
-        conversation_history = [
-            {"role": msg.role, "content": msg.content}
-            for msg in request.conversation_history
-        ]
+        conversation_history = await run_in_threadpool(
+            get_conversation_store().get, db, current_user["id"], request.session_id, request.agent_id
+        )
 
         ai_response = await gemini_service.chat_with_agent(
             agent_id=request.agent_id,
@@ -373,25 +582,16 @@ async def chat_with_agent(
             user_message=request.message,
             conversation_history=conversation_history,
             game_context=request.game_context,
+            conversation_key=(request.session_id, request.agent_id),
         )
 
         is_disagreement = detect_disagreement(ai_response)
         timestamp = datetime.utcnow().isoformat()
 
         try:
-            db.table("negotiation_history").insert(
-                {
-                    "session_id": request.session_id,
-                    "agent_id": request.agent_id,
-                    "agent_name": get_agent_name(request.agent_id),
-                    "agent_type": get_agent_type(request.agent_id),
-                    "user_message": request.message,
-                    "agent_response": ai_response,
-                    "is_disagreement": is_disagreement,
-                    "context_snapshot": request.game_context or {},
-                    "timestamp": timestamp,
-                }
-            ).execute()
+            await save_negotiation_message(
+                db, current_user["id"], request, ai_response, is_disagreement, timestamp, len(conversation_history)
+            )
         except Exception as db_error:
             print(f"Database error saving chat message: {db_error}")
             raise HTTPException(status_code=500, detail=f"Database error: {str(db_error)}")
@@ -411,6 +611,88 @@ async def chat_with_agent(
         raise HTTPException(status_code=500, detail="En feil oppstod under samtalen. Vennligst prøv igjen.")
 
 
+@app.post("/api/chat/stream", tags=["Chat"])
+async def stream_chat_with_agent(
+    request: ChatRequest,
+    current_user: dict = Depends(get_current_user),
+    db: Client = Depends(get_db_client),
+):
+    """
+    Streaming variant of /api/chat (server-sent events).
+
+    Emits ``token`` events ({"text": ...}) as Gemini generates the response,
+    then one ``done`` event with the ChatResponse fields once the message is
+    saved to negotiation_history, or an ``error`` event ({"detail": ...}).
+    """
+    valid_agents = ["anne-lise-berg", "bjorn-eriksen", "kari-andersen", "per-johansen"]
+    if request.agent_id not in valid_agents:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Ugyldig agent_id. Må være en av: {', '.join(valid_agents)}",
+        )
+
+    try:
+        system_prompt = get_agent_prompt(request.agent_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    gemini_service = get_gemini_service()
+
+    try:
+        conversation_history = await run_in_threadpool(
+            get_conversation_store().get, db, current_user["id"], request.session_id, request.agent_id
+        )
+    except Exception as e:
+        print(f"Error loading conversation history: {str(e)}")
+        raise HTTPException(status_code=500, detail="En feil oppstod under samtalen. Vennligst prøv igjen.")
+
+    async def events():
+        chunks = []
+        try:
+            async for text in gemini_service.stream_chat_with_agent(
+                agent_id=request.agent_id,
+                system_prompt=system_prompt,
+                user_message=request.message,
+                conversation_history=conversation_history,
+                game_context=request.game_context,
+                conversation_key=(request.session_id, request.agent_id),
+            ):
+                chunks.append(text)
+                yield sse_event("token", {"text": text})
+
+            ai_response = "".join(chunks).strip()
+            is_disagreement = detect_disagreement(ai_response)
+            timestamp = datetime.utcnow().isoformat()
+
+            try:
+                await save_negotiation_message(
+                    db, current_user["id"], request, ai_response, is_disagreement, timestamp, len(conversation_history)
+                )
+            except Exception as db_error:
+                print(f"Database error saving chat message: {db_error}")
+                yield sse_event("error", {"detail": f"Database error: {str(db_error)}"})
+                return
+
+            yield sse_event("done", ChatResponse(
+                agent_id=request.agent_id,
+                agent_name=get_agent_name(request.agent_id),
+                response=ai_response,
+                timestamp=timestamp,
+                is_disagreement=is_disagreement,
+            ).model_dump())
+
+        except Exception as e:
+            print(f"Error in chat stream endpoint: {str(e)}")
+            yield sse_event("error", {"detail": "En feil oppstod under samtalen. Vennligst prøv igjen."})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Disable proxy buffering so tokens reach the browser as they arrive
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # ---- Sessions ----
 
 @app.get("/api/sessions", response_model=List[SessionResponse], tags=["Sessions"])
@@ -457,33 +739,14 @@ def create_session(
 
         # --- Baseline snapshot creation logic ---
         try:
+            # Depends only on wbs.json; computed once per WBS version
+            baseline = get_compiled_wbs().baseline
+            if baseline is None:
+                raise ValueError("Baseline timeline unavailable (circular dependency in WBS)")
 
-            with open(_wbs_json_path(), "r", encoding="utf-8") as f:
-                wbs_data = json.load(f)
-
-            wbs_items = wbs_data.get("wbs_elements", [])
-            locked_wbs_items = [item for item in wbs_items if not item.get("is_negotiable", False)]
-
-            locked_commitments_for_timeline = [
-                {
-                    "wbs_item_id": item["id"],
-                    "duration": item.get("locked_duration", 0),
-                    "cost": item.get("locked_cost", 0),
-                }
-                for item in locked_wbs_items
-            ]
-
-            baseline_timeline = calculate_critical_path(
-                wbs_items=wbs_items,
-                commitments=locked_commitments_for_timeline,
-                start_date="2025-01-15",
-                deadline="2026-05-15",
-            )
-
-            project_end_date = baseline_timeline.get("projected_completion_date", "2025-09-29")
-            deadline_dt = datetime.strptime("2026-05-15", "%Y-%m-%d")
-            project_dt = datetime.strptime(project_end_date, "%Y-%m-%d")
-            days_before_deadline = (deadline_dt - project_dt).days
+            baseline_timeline = baseline["timeline"]
+            project_end_date = baseline["project_end_date"]
+            days_before_deadline = baseline["days_before_deadline"]
 
             baseline_budget_committed = int(request.locked_budget * 100)
             baseline_budget_available = int(request.available_budget * 100)
@@ -614,16 +877,14 @@ def create_commitment(
             raise HTTPException(status_code=400, detail=f"Ugyldig WBS ID. Må være en av: {', '.join(valid_wbs)}")
 
         # --- Dependency Validation ---
-        with open(_wbs_json_path(), "r", encoding="utf-8") as f:
-            wbs_data = json.load(f)
-        all_wbs_elements = wbs_data.get("wbs_elements", [])
+        wbs = get_compiled_wbs()
 
         # Find the WBS item being committed
-        committed_wbs_item = next((item for item in all_wbs_elements if item["id"] == request.wbs_id), None)
+        committed_wbs_item = wbs.items_by_id.get(request.wbs_id)
         if not committed_wbs_item:
             raise HTTPException(status_code=400, detail=f"WBS-element med ID '{request.wbs_id}' ble ikke funnet.")
 
-        dependencies = committed_wbs_item.get("dependencies", [])
+        dependencies = dependency_ids(committed_wbs_item)
 
         if dependencies:
             # Fetch already committed WBS IDs for this session
@@ -667,29 +928,27 @@ def create_commitment(
         current_commitments_response = db.table("wbs_commitments").select("*").eq("session_id", session_id).execute()
         current_commitments = current_commitments_response.data if current_commitments_response.data else []
 
-        # 2. Add the new commitment to a temporary list
-        temp_commitments_for_timeline = [
-            {"wbs_item_id": c["wbs_id"], "duration": c.get("committed_duration", 0)}
+        # 2. Timeline for the commitments already made
+        current_commitment_map = {
+            c["wbs_id"]: {"wbs_item_id": c["wbs_id"], "duration": c.get("committed_duration", 0)}
             for c in current_commitments
-        ]
-        temp_commitments_for_timeline.append(
-            {"wbs_item_id": request.wbs_id, "duration": request.committed_duration}
-        )
+        }
 
-        # 3. Get WBS elements (already loaded for dependency validation as all_wbs_elements)
-        # 4. Get deadline and start_date from session
+        # 3. Get deadline and start_date from session
         deadline_str = session["deadline_date"] # Assuming deadline_date is in session object
         start_date_str = "2025-01-15" # Hardcoded as per project plan example
 
-        # 5. Run critical path analysis
-        timeline_result = calculate_critical_path(
-            wbs_items=all_wbs_elements, # Reusing already loaded wbs_elements
-            commitments=temp_commitments_for_timeline,
+        # 4. Apply the new commitment incrementally to the current timeline (memoized)
+        timeline_result = cached_commitment_update(
+            wbs,
+            commitments=list(current_commitment_map.values()),
+            wbs_id=request.wbs_id,
+            duration=request.committed_duration,
             start_date=start_date_str,
             deadline=deadline_str,
         )
 
-        # 6. Check if projected_completion_date > deadline
+        # 5. Check if projected_completion_date > deadline
         projected_completion_date_str = timeline_result.get("projected_completion_date")
         
         if projected_completion_date_str:
@@ -750,28 +1009,18 @@ def create_commitment(
 
             duration_days = int(request.committed_duration)
 
-            all_commitments_response = db.table("wbs_commitments").select("*").eq("session_id", session_id).execute()
-            all_commitments = all_commitments_response.data if all_commitments_response.data else []
-
-            print(f"DEBUG: Found {len(all_commitments)} commitments for timeline calculation")
-            for c in all_commitments:
-                print(f"  - WBS {c['wbs_id']}: {c.get('committed_duration', 0)} days, {c.get('committed_cost', 0)} cost")
-
-            with open(_wbs_json_path(), "r", encoding="utf-8") as f:
-                wbs_data = json.load(f)
-
-            commitments_for_timeline = [
-                {"wbs_item_id": c["wbs_id"], "duration": c.get("committed_duration", 0)}
-                for c in all_commitments
-            ]
-            print(f"DEBUG: Commitments being passed to calculate_critical_path: {commitments_for_timeline}")
-
-            timeline = calculate_critical_path(
-                wbs_items=wbs_data["wbs_elements"],
-                commitments=commitments_for_timeline,
-                start_date="2025-01-15",
-                deadline="2026-05-15",
-            )
+            # The validated timeline already covers every commitment incl. this one
+            if deadline_str == "2026-05-15":
+                timeline = timeline_result
+            else:
+                timeline = cached_commitment_update(
+                    wbs,
+                    commitments=list(current_commitment_map.values()),
+                    wbs_id=request.wbs_id,
+                    duration=request.committed_duration,
+                    start_date=start_date_str,
+                    deadline="2026-05-15",
+                )
 
             print(f"DEBUG: Timeline calculation result:")
             print(f"  - Projected completion: {timeline.get('projected_completion_date', 'N/A')}")
@@ -784,6 +1033,15 @@ def create_commitment(
                     ef_date = timeline.get('earliest_finish', {}).get(wbs_id, 'N/A')
                     print(f"    - {wbs_id}: ES={es_date}, EF={ef_date}")
 
+            # Diff against the timeline before this commitment (cached by the update above)
+            previous_timeline = cached_critical_path(
+                wbs,
+                commitments=list(current_commitment_map.values()),
+                start_date=start_date_str,
+                deadline="2026-05-15",
+            )
+            timeline_diff = diff_critical_path(previous_timeline, timeline)
+
             project_end_date = timeline.get("projected_completion_date", "2025-09-29")
             deadline_dt = datetime.strptime("2026-05-15", "%Y-%m-%d")
             project_dt = datetime.strptime(project_end_date, "%Y-%m-%d")
@@ -810,6 +1068,7 @@ def create_commitment(
                     "p_days_before_deadline": days_before_deadline,
                     "p_gantt_state": timeline,
                     "p_precedence_state": timeline,
+                    "p_timeline_diff": timeline_diff,
                 },
             ).execute()
 
@@ -1049,13 +1308,26 @@ def get_negotiation_history(
 
 # ---- Validation ----
 
+MAX_PATH_LIMIT = 20
+
+
 @app.post("/api/sessions/{session_id}/validate", response_model=ValidationResponse, tags=["Validation"])
 def validate_session(
     session_id: str,
+    path_limit: int = 3,
+    near_critical_days: int = 10,
     current_user: dict = Depends(get_current_user),
     db: Client = Depends(get_db_client),
 ):
+    """
+    Validate the session's timeline and budget. Also returns the
+    ``path_limit`` longest paths and the items within ``near_critical_days``
+    days of the longest path.
+    """
     try:
+        if not 0 <= path_limit <= MAX_PATH_LIMIT:
+            raise HTTPException(status_code=400, detail=f"path_limit må være mellom 0 og {MAX_PATH_LIMIT}")
+
         session_response = (
             db.table("game_sessions")
             .select("*")
@@ -1069,10 +1341,7 @@ def validate_session(
 
         session = session_response.data
 
-        with open(_wbs_json_path(), "r", encoding="utf-8") as f:
-            wbs_data = json.load(f)
-
-        wbs_items = wbs_data.get("wbs_elements", [])
+        wbs = get_compiled_wbs()
         commitments_response = db.table("wbs_commitments").select("*").eq("session_id", session_id).execute()
 
         commitments = []
@@ -1085,8 +1354,8 @@ def validate_session(
                 }
             )
 
-        timeline_result = calculate_critical_path(
-            wbs_items=wbs_items,
+        timeline_result = cached_critical_path(
+            wbs,
             commitments=commitments,
             start_date="2025-01-15",
             deadline="2026-05-15",
@@ -1096,12 +1365,21 @@ def validate_session(
         budget_remaining = session.get("total_budget", 700_000_000) - budget_used
         budget_valid = budget_used <= session.get("total_budget", 700_000_000)
 
+        near_critical = cached_near_critical(
+            wbs,
+            commitments,
+            limit=path_limit,
+            within_days=near_critical_days,
+            start_date="2025-01-15",
+        )
+
         validation_result = {
             **timeline_result,
             "budget_valid": budget_valid,
             "budget_used": budget_used,
             "budget_remaining": budget_remaining,
             "valid": timeline_result["meets_deadline"] and budget_valid,
+            **near_critical,
         }
 
         return ValidationResponse(**validation_result)
@@ -1118,6 +1396,388 @@ def validate_session(
         raise HTTPException(status_code=500, detail=f"En feil oppstod ved validering: {str(e)}")
 
 
+@app.get("/api/cpm/cache-stats", tags=["Validation"])
+def get_cpm_cache_stats(current_user: dict = Depends(get_current_user)):
+    """Hit/miss counters and size of the memoized CPM result cache."""
+    return get_timeline_cache().stats()
+
+
+MAX_WHAT_IF_SCENARIOS = 500
+
+
+@app.post("/api/sessions/{session_id}/what-if", response_model=WhatIfResponse, tags=["Validation"])
+def what_if_session(
+    session_id: str,
+    request: WhatIfRequest,
+    current_user: dict = Depends(get_current_user),
+    db: Client = Depends(get_db_client),
+):
+    """
+    Evaluate duration what-if scenarios against the session's commitments.
+    All scenarios are computed in one vectorized CPM pass.
+    """
+    try:
+        if not request.scenarios:
+            raise HTTPException(status_code=400, detail="Minst ett scenario er påkrevd")
+        if len(request.scenarios) > MAX_WHAT_IF_SCENARIOS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"For mange scenarier: {len(request.scenarios)} (maks {MAX_WHAT_IF_SCENARIOS})",
+            )
+
+        session_response = (
+            db.table("game_sessions")
+            .select("*")
+            .eq("id", session_id)
+            .eq("user_id", current_user["id"])
+            .single()
+            .execute()
+        )
+        if not session_response.data:
+            raise HTTPException(status_code=404, detail="Spillsesjon ikke funnet")
+
+        deadline_str = session_response.data.get("deadline_date") or "2026-05-15"
+
+        wbs = get_compiled_wbs()
+        commitments_response = db.table("wbs_commitments").select("*").eq("session_id", session_id).execute()
+        commitments = [
+            {"wbs_item_id": c["wbs_id"], "duration": c.get("committed_duration", 0)}
+            for c in commitments_response.data
+        ]
+
+        try:
+            results = evaluate_what_if(
+                wbs_items=wbs.elements,
+                commitments=commitments,
+                scenarios=request.scenarios,
+                start_date="2025-01-15",
+                deadline=deadline_str,
+                graph=wbs.graph,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        return WhatIfResponse(
+            deadline=deadline_str,
+            scenarios=[WhatIfScenarioResult(**r) for r in results],
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error evaluating what-if scenarios: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="En feil oppstod ved hva-om-analyse")
+
+
+MAX_SIMULATION_ITERATIONS = 200_000
+MAX_SIMULATION_TIME_BUDGET_MS = 10_000
+
+
+@app.post("/api/sessions/{session_id}/risk-simulation", response_model=RiskSimulationResponse, tags=["Validation"])
+def simulate_session_risk(
+    session_id: str,
+    request: RiskSimulationRequest,
+    current_user: dict = Depends(get_current_user),
+    db: Client = Depends(get_db_client),
+):
+    """
+    Monte Carlo schedule-risk simulation for the session's current commitments.
+    Runs within a bounded time budget; iterations_run reports how many completed.
+    """
+    try:
+        if not 0 < request.iterations <= MAX_SIMULATION_ITERATIONS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Antall iterasjoner må være mellom 1 og {MAX_SIMULATION_ITERATIONS}",
+            )
+        if not 0 < request.time_budget_ms <= MAX_SIMULATION_TIME_BUDGET_MS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Tidsbudsjett må være mellom 1 og {MAX_SIMULATION_TIME_BUDGET_MS} ms",
+            )
+
+        session_response = (
+            db.table("game_sessions")
+            .select("*")
+            .eq("id", session_id)
+            .eq("user_id", current_user["id"])
+            .single()
+            .execute()
+        )
+        if not session_response.data:
+            raise HTTPException(status_code=404, detail="Spillsesjon ikke funnet")
+
+        deadline_str = session_response.data.get("deadline_date") or "2026-05-15"
+
+        wbs = get_compiled_wbs()
+        commitments_response = db.table("wbs_commitments").select("*").eq("session_id", session_id).execute()
+        commitments = [
+            {"wbs_item_id": c["wbs_id"], "duration": c.get("committed_duration", 0)}
+            for c in commitments_response.data
+        ]
+
+        try:
+            result = simulate_schedule_risk(
+                wbs_items=wbs.elements,
+                commitments=commitments,
+                iterations=request.iterations,
+                distribution=request.distribution,
+                start_date="2025-01-15",
+                deadline=deadline_str,
+                time_budget_s=request.time_budget_ms / 1000,
+                workers=settings.CPM_SIMULATION_WORKERS,
+                seed=request.seed,
+                graph=wbs.graph,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        return RiskSimulationResponse(**result)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error running risk simulation: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="En feil oppstod ved risikosimulering")
+
+
+@app.post("/api/sessions/{session_id}/crash-plan", response_model=CrashPlanResponse, tags=["Validation"])
+def crash_plan_session(
+    session_id: str,
+    request: CrashPlanRequest,
+    current_user: dict = Depends(get_current_user),
+    db: Client = Depends(get_db_client),
+):
+    """
+    Cheapest duration reductions (per supplier) that bring the session's
+    projected completion back within the deadline.
+    """
+    try:
+        session_response = (
+            db.table("game_sessions")
+            .select("*")
+            .eq("id", session_id)
+            .eq("user_id", current_user["id"])
+            .single()
+            .execute()
+        )
+        if not session_response.data:
+            raise HTTPException(status_code=404, detail="Spillsesjon ikke funnet")
+
+        deadline_str = session_response.data.get("deadline_date") or "2026-05-15"
+
+        wbs = get_compiled_wbs()
+        commitments_response = db.table("wbs_commitments").select("*").eq("session_id", session_id).execute()
+        commitments = [
+            {"wbs_item_id": c["wbs_id"], "duration": c.get("committed_duration", 0)}
+            for c in commitments_response.data
+        ]
+
+        if request.curves is None:
+            curves = default_crash_curves(wbs.elements)
+        else:
+            curves = {
+                wbs_id: [(segment.days, segment.cost_per_day) for segment in segments]
+                for wbs_id, segments in request.curves.items()
+            }
+
+        try:
+            plan = plan_crashing(
+                wbs_items=wbs.elements,
+                commitments=commitments,
+                curves=curves,
+                start_date="2025-01-15",
+                deadline=deadline_str,
+                graph=wbs.graph,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        return CrashPlanResponse(**plan)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error computing crash plan: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="En feil oppstod ved beregning av komprimeringsplan")
+
+
+@app.post("/api/sessions/{session_id}/resource-leveling", response_model=ResourceLevelingResponse, tags=["Validation"])
+def resource_leveling_session(
+    session_id: str,
+    request: ResourceLevelingRequest,
+    current_user: dict = Depends(get_current_user),
+    db: Client = Depends(get_db_client),
+):
+    """
+    Resource-constrained schedule for the session, next to the unconstrained
+    CPM dates (a supplier can only work on as many items at once as its capacity).
+    """
+    try:
+        session_response = (
+            db.table("game_sessions")
+            .select("*")
+            .eq("id", session_id)
+            .eq("user_id", current_user["id"])
+            .single()
+            .execute()
+        )
+        if not session_response.data:
+            raise HTTPException(status_code=404, detail="Spillsesjon ikke funnet")
+
+        deadline_str = session_response.data.get("deadline_date") or "2026-05-15"
+
+        wbs = get_compiled_wbs()
+        commitments_response = db.table("wbs_commitments").select("*").eq("session_id", session_id).execute()
+        commitments = [
+            {"wbs_item_id": c["wbs_id"], "duration": c.get("committed_duration", 0)}
+            for c in commitments_response.data
+        ]
+
+        try:
+            result = level_resources(
+                wbs_items=wbs.elements,
+                commitments=commitments,
+                capacities=request.capacities,
+                demands=request.demands,
+                start_date="2025-01-15",
+                deadline=deadline_str,
+                graph=wbs.graph,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        return ResourceLevelingResponse(**result)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error computing resource-leveled schedule: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="En feil oppstod ved ressursutjevning")
+
+
+@app.get("/api/sessions/{session_id}/wbs-rollup", response_model=WBSRollupResponse, tags=["Validation"])
+def wbs_rollup_session(
+    session_id: str,
+    level: Optional[int] = None,
+    current_user: dict = Depends(get_current_user),
+    db: Client = Depends(get_db_client),
+):
+    """
+    Cost and schedule aggregates per WBS level (1 = whole project), derived
+    from the dotted WBS ids. Omit ``level`` to get every level.
+    """
+    try:
+        session_response = (
+            db.table("game_sessions")
+            .select("*")
+            .eq("id", session_id)
+            .eq("user_id", current_user["id"])
+            .single()
+            .execute()
+        )
+        if not session_response.data:
+            raise HTTPException(status_code=404, detail="Spillsesjon ikke funnet")
+
+        deadline_str = session_response.data.get("deadline_date") or "2026-05-15"
+
+        wbs = get_compiled_wbs()
+        commitments_response = db.table("wbs_commitments").select("*").eq("session_id", session_id).execute()
+        commitments = [
+            {
+                "wbs_item_id": c["wbs_id"],
+                "duration": c.get("committed_duration", 0),
+                "cost": c.get("committed_cost", 0),
+            }
+            for c in commitments_response.data
+        ]
+
+        try:
+            levels = get_rollup_cache().rollup(
+                session_id,
+                wbs,
+                commitments,
+                start_date="2025-01-15",
+                deadline=deadline_str,
+                level=level,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        return WBSRollupResponse(deadline=deadline_str, levels=levels)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error computing WBS roll-up: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="En feil oppstod ved aggregering av WBS")
+
+
+@app.get("/api/sessions/{session_id}/sensitivity", response_model=SensitivityResponse, tags=["Validation"])
+def sensitivity_session(
+    session_id: str,
+    delta_days: int = 10,
+    negotiable_only: bool = True,
+    current_user: dict = Depends(get_current_user),
+    db: Client = Depends(get_db_client),
+):
+    """
+    Tornado analysis: how many days the projected completion moves if each
+    item takes ``delta_days`` longer or shorter than its current duration,
+    ranked by total swing. Computed in a single pass over the WBS graph.
+    """
+    try:
+        session_response = (
+            db.table("game_sessions")
+            .select("*")
+            .eq("id", session_id)
+            .eq("user_id", current_user["id"])
+            .single()
+            .execute()
+        )
+        if not session_response.data:
+            raise HTTPException(status_code=404, detail="Spillsesjon ikke funnet")
+
+        wbs = get_compiled_wbs()
+        commitments_response = db.table("wbs_commitments").select("*").eq("session_id", session_id).execute()
+        commitments = [
+            {"wbs_item_id": c["wbs_id"], "duration": c.get("committed_duration", 0)}
+            for c in commitments_response.data
+        ]
+
+        try:
+            result = analyze_sensitivity(
+                wbs.elements,
+                commitments,
+                delta_days=delta_days,
+                start_date="2025-01-15",
+                negotiable_only=negotiable_only,
+                graph=wbs.graph,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        return SensitivityResponse(**result)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error computing sensitivity analysis: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="En feil oppstod ved sensitivitetsanalyse")
+
+
 # ---- Snapshots ----
 
 @app.get("/api/sessions/{session_id}/snapshots", response_model=SnapshotListResponse, tags=["Snapshots"])
@@ -1176,6 +1836,45 @@ def get_session_snapshots(
         raise HTTPException(status_code=500, detail="En feil oppstod ved henting av snapshots")
 
 
+@app.get("/api/sessions/{session_id}/snapshots/diffs", response_model=SnapshotDiffListResponse, tags=["Snapshots"])
+def get_snapshot_diffs(
+    session_id: str,
+    current_user: dict = Depends(get_current_user),
+    db: Client = Depends(get_db_client),
+):
+    """
+    Timeline diff of every snapshot (oldest first), without the full
+    gantt/precedence states.
+    """
+    try:
+        session_response = (
+            db.table("game_sessions")
+            .select("id")
+            .eq("id", session_id)
+            .eq("user_id", current_user["id"])
+            .single()
+            .execute()
+        )
+        if not session_response.data:
+            raise HTTPException(status_code=404, detail="Spillsesjon ikke funnet")
+
+        diffs_response = (
+            db.table("session_snapshots")
+            .select("version, label, snapshot_type, project_end_date, days_before_deadline, timeline_diff, timestamp")
+            .eq("session_id", session_id)
+            .order("version")
+            .execute()
+        )
+
+        return SnapshotDiffListResponse(diffs=[SnapshotDiffResponse(**d) for d in diffs_response.data])
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error fetching snapshot diffs: {str(e)}")
+        raise HTTPException(status_code=500, detail="En feil oppstod ved henting av snapshot-endringer")
+
+
 @app.get("/api/sessions/{session_id}/snapshots/{version}", response_model=SnapshotResponse, tags=["Snapshots"])
 def get_snapshot_by_version(
     session_id: str,
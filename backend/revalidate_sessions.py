@@ -0,0 +1,60 @@
+"""
+Re-validate game sessions in bulk
+Usage: python revalidate_sessions.py [--session ID ...] [--all-statuses] [--workers N] [--dry-run]
+
+Run after a wbs.json correction or a deadline change. Results are printed
+as JSON lines while they are computed; the projected completion dates are
+then written back in bulk. Needs SUPABASE_SERVICE_ROLE_KEY to see every
+user's sessions.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from supabase import create_client
+
+from config import settings
+from services.batch_validation_service import (
+    build_jobs,
+    fetch_commitments,
+    fetch_sessions,
+    revalidate,
+    write_validation_state,
+)
+
+parser = argparse.ArgumentParser(description="Re-validate game sessions in bulk")
+parser.add_argument("--session", action="append", dest="sessions", help="Session id (repeatable; default: all)")
+parser.add_argument("--all-statuses", action="store_true", help="Include sessions that are not in progress")
+parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+parser.add_argument("--dry-run", action="store_true", help="Compute only, do not write validation state")
+args = parser.parse_args()
+
+if not settings.SUPABASE_SERVICE_ROLE_KEY:
+    print("SUPABASE_SERVICE_ROLE_KEY is not set", file=sys.stderr)
+    sys.exit(1)
+
+db = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_ROLE_KEY)
+
+started = time.perf_counter()
+sessions = fetch_sessions(db, args.sessions, status=None if args.all_statuses else "in_progress")
+commitments = fetch_commitments(db, [s["id"] for s in sessions])
+print(f"Fetched {len(sessions)} sessions in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+
+results = []
+for result in revalidate(build_jobs(sessions, commitments), workers=args.workers):
+    results.append(result)
+    print(json.dumps(result, ensure_ascii=False), flush=True)
+
+failed = sum(1 for r in results if "error" in r)
+late = sum(1 for r in results if r.get("meets_deadline") is False)
+print(f"Validated {len(results)} sessions ({late} late, {failed} failed) in {time.perf_counter() - started:.2f}s",
+      file=sys.stderr)
+
+if args.dry_run:
+    print("Dry run: validation state not written", file=sys.stderr)
+else:
+    updated = write_validation_state(db, results)
+    print(f"Updated {updated} sessions in {time.perf_counter() - started:.2f}s", file=sys.stderr)
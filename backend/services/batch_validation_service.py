@@ -0,0 +1,181 @@
+"""
+Bulk re-validation of many game sessions.
+
+Used after a wbs.json correction or a deadline change: sessions and their
+commitments are fetched in pages (not one request per session), CPM runs
+in chunks on a process pool, results are yielded as chunks finish, and the
+new validation state is written back with one UPDATE per distinct
+projected completion date.
+"""
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from supabase import Client
+
+from services.timeline_cache import cached_critical_path
+from services.wbs_service import PROJECT_DEADLINE, PROJECT_START_DATE, get_compiled_wbs
+
+
+# PostgREST returns at most 1000 rows per request by default
+PAGE_SIZE = 1000
+# Session ids per `in` filter (keeps request URLs short)
+ID_BATCH_SIZE = 200
+# Sessions per unit of work sent to a worker process
+CHUNK_SIZE = 250
+
+# (session_id, deadline, commitments)
+ValidationJob = Tuple[str, str, List[Dict]]
+
+
+def fetch_sessions(db: Client, session_ids: Optional[List[str]] = None,
+                   status: Optional[str] = "in_progress") -> List[Dict]:
+    """
+    Fetch sessions page by page.
+
+    Args:
+        db: Supabase client (service role to see every user's sessions)
+        session_ids: Only these sessions (all matching sessions if omitted)
+        status: Only sessions with this status (any status if None)
+
+    Returns:
+        Session rows with id and deadline_date
+    """
+    def pages(ids: Optional[List[str]]) -> Iterator[List[Dict]]:
+        offset = 0
+        while True:
+            query = db.table("game_sessions").select("id, deadline_date")
+            if ids is not None:
+                query = query.in_("id", ids)
+            if status is not None:
+                query = query.eq("status", status)
+            rows = query.order("id").range(offset, offset + PAGE_SIZE - 1).execute().data
+            yield rows
+            if len(rows) < PAGE_SIZE:
+                return
+            offset += PAGE_SIZE
+
+    if session_ids is None:
+        return [row for page in pages(None) for row in page]
+    return [
+        row
+        for start in range(0, len(session_ids), ID_BATCH_SIZE)
+        for page in pages(session_ids[start:start + ID_BATCH_SIZE])
+        for row in page
+    ]
+
+
+def fetch_commitments(db: Client, session_ids: List[str]) -> Dict[str, List[Dict]]:
+    """
+    Fetch the commitments of many sessions with batched ``in`` filters.
+
+    Returns:
+        session_id -> commitment records (wbs_item_id, duration)
+    """
+    by_session: Dict[str, List[Dict]] = {session_id: [] for session_id in session_ids}
+    for start in range(0, len(session_ids), ID_BATCH_SIZE):
+        ids = session_ids[start:start + ID_BATCH_SIZE]
+        offset = 0
+        while True:
+            rows = (
+                db.table("wbs_commitments")
+                .select("id, session_id, wbs_id, committed_duration")
+                .in_("session_id", ids)
+                .order("id")
+                .range(offset, offset + PAGE_SIZE - 1)
+                .execute()
+                .data
+            )
+            for c in rows:
+                by_session[c["session_id"]].append(
+                    {"wbs_item_id": c["wbs_id"], "duration": c.get("committed_duration", 0)}
+                )
+            if len(rows) < PAGE_SIZE:
+                break
+            offset += PAGE_SIZE
+    return by_session
+
+
+def _validate_chunk(jobs: List[ValidationJob]) -> List[Dict]:
+    """
+    Validate a chunk of sessions (runs in a worker process).
+
+    The compiled WBS and the timeline cache are per process, so identical
+    commitment sets within a worker are only computed once.
+    """
+    wbs = get_compiled_wbs()
+    results = []
+    for session_id, deadline, commitments in jobs:
+        try:
+            timeline = cached_critical_path(wbs, commitments, PROJECT_START_DATE, deadline)
+        except ValueError as e:
+            results.append({"session_id": session_id, "error": str(e)})
+            continue
+        results.append({
+            "session_id": session_id,
+            "deadline": deadline,
+            "projected_completion_date": timeline["projected_completion_date"],
+            "meets_deadline": timeline["meets_deadline"],
+            "total_duration_days": timeline["total_duration_days"],
+            "critical_path": timeline["critical_path"],
+        })
+    return results
+
+
+def revalidate(jobs: Iterable[ValidationJob], workers: int = 1,
+               chunk_size: int = CHUNK_SIZE) -> Iterator[Dict]:
+    """
+    Run CPM for many sessions, yielding results as chunks complete.
+
+    Args:
+        jobs: (session_id, deadline, commitments) per session
+        workers: Worker processes (1 = run in-process)
+        chunk_size: Sessions per unit of work
+
+    Yields:
+        Per-session result dicts (``error`` set if the CPM run failed)
+    """
+    jobs = list(jobs)
+    chunks = [jobs[start:start + chunk_size] for start in range(0, len(jobs), chunk_size)]
+    if workers <= 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            yield from _validate_chunk(chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=get_compiled_wbs) as pool:
+        futures = [pool.submit(_validate_chunk, chunk) for chunk in chunks]
+        for future in as_completed(futures):
+            yield from future.result()
+
+
+def write_validation_state(db: Client, results: Iterable[Dict]) -> int:
+    """
+    Store projected completion dates (is_timeline_valid is derived from it).
+
+    Sessions are grouped by date, so the number of UPDATE requests is the
+    number of distinct dates (in batches of ID_BATCH_SIZE), not the number
+    of sessions.
+
+    Returns:
+        Number of sessions updated
+    """
+    by_date: Dict[str, List[str]] = {}
+    for result in results:
+        if "error" not in result:
+            by_date.setdefault(result["projected_completion_date"], []).append(result["session_id"])
+
+    updated = 0
+    for completion_date, session_ids in by_date.items():
+        for start in range(0, len(session_ids), ID_BATCH_SIZE):
+            ids = session_ids[start:start + ID_BATCH_SIZE]
+            db.table("game_sessions").update({"projected_completion_date": completion_date}).in_("id", ids).execute()
+            updated += len(ids)
+    return updated
+
+
+def build_jobs(sessions: List[Dict], commitments: Dict[str, List[Dict]]) -> List[ValidationJob]:
+    """Pair each session with its deadline and commitments."""
+    return [
+        (s["id"], s.get("deadline_date") or PROJECT_DEADLINE, commitments.get(s["id"], []))
+        for s in sessions
+    ]
@@ -0,0 +1,179 @@
+"""
+Working-day calendars for the CPM engine.
+
+A WorkingCalendar precomputes, from the project start date, the list of
+working days and a cumulative working-day index over calendar days, so
+converting between working-day offsets and dates is an O(1) array lookup.
+"""
+
+import threading
+from array import array
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Set
+
+
+# Initial horizon; extended (doubled) on demand
+DEFAULT_HORIZON_DAYS = 10 * 366
+
+# ISO weeks of the construction industry's common summer holiday (fellesferie)
+FELLESFERIE_WEEKS = (28, 29, 30)
+
+
+def easter_sunday(year: int) -> date:
+    """Easter Sunday (Gregorian calendar, anonymous algorithm)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def norwegian_public_holidays(year: int) -> Set[date]:
+    """Norwegian public holidays (helligdager) for a year."""
+    easter = easter_sunday(year)
+    return {
+        date(year, 1, 1),                # Første nyttårsdag
+        easter - timedelta(days=3),      # Skjærtorsdag
+        easter - timedelta(days=2),      # Langfredag
+        easter,                          # Første påskedag
+        easter + timedelta(days=1),      # Andre påskedag
+        date(year, 5, 1),                # Arbeidernes dag
+        date(year, 5, 17),               # Grunnlovsdag
+        easter + timedelta(days=39),     # Kristi himmelfartsdag
+        easter + timedelta(days=49),     # Første pinsedag
+        easter + timedelta(days=50),     # Andre pinsedag
+        date(year, 12, 25),              # Første juledag
+        date(year, 12, 26),              # Andre juledag
+    }
+
+
+_holidays_by_year: Dict[int, Set[date]] = {}
+
+
+def is_norwegian_construction_workday(day: date, include_fellesferie: bool = True) -> bool:
+    """
+    Working day in a Norwegian construction schedule.
+
+    Weekends, public holidays and (optionally) fellesferie are non-working.
+    """
+    if day.weekday() >= 5:
+        return False
+    holidays = _holidays_by_year.get(day.year)
+    if holidays is None:
+        holidays = _holidays_by_year[day.year] = norwegian_public_holidays(day.year)
+    if day in holidays:
+        return False
+    if include_fellesferie and day.isocalendar()[1] in FELLESFERIE_WEEKS:
+        return False
+    return True
+
+
+class WorkingCalendar:
+    """
+    Working-day arithmetic anchored at the project start date.
+
+    Offset ``k`` is the k-th working day on or after the start date (offset
+    0 is the first working day). Internally:
+
+    - ``_days[k]`` is the date of working day k
+    - ``_cumulative[i]`` is the number of working days in [start, start + i)
+    """
+
+    def __init__(self, start_date: datetime, is_workday: Callable[[date], bool],
+                 horizon_days: int = DEFAULT_HORIZON_DAYS):
+        """
+        Args:
+            start_date: Project start date
+            is_workday: Predicate deciding whether a calendar day is worked
+            horizon_days: Calendar days to precompute up front
+        """
+        self.start_date = datetime(start_date.year, start_date.month, start_date.day)
+        self.is_workday = is_workday
+        self._days = []
+        self._cumulative = array('l', [0])
+        self._lock = threading.Lock()
+        self._extend(max(1, horizon_days))
+
+    def _extend(self, calendar_days: int):
+        """Precompute the index up to ``calendar_days`` days after the start."""
+        with self._lock:
+            covered = len(self._cumulative) - 1
+            count = self._cumulative[-1]
+            for i in range(covered, calendar_days):
+                day = self.start_date + timedelta(days=i)
+                if self.is_workday(day.date()):
+                    self._days.append(day)
+                    count += 1
+                self._cumulative.append(count)
+
+    def _ensure_offset(self, offset: int):
+        while offset >= len(self._days):
+            # Calendars with no working days at all would never terminate
+            if len(self._cumulative) > 1000 * 366:
+                raise ValueError("Working calendar has no working days within 1000 years")
+            self._extend(2 * (len(self._cumulative) - 1))
+
+    def offset_to_date(self, offset: int) -> datetime:
+        """
+        Date of working-day offset (O(1) once the horizon covers it).
+
+        Negative offsets count calendar days back from the start date.
+        """
+        if offset < 0:
+            return self.start_date + timedelta(days=offset)
+        if offset >= len(self._days):
+            self._ensure_offset(offset)
+        return self._days[offset]
+
+    def date_to_offset(self, day: datetime) -> int:
+        """
+        Offset of the last working day on or before ``day``.
+
+        For a working day this is the exact inverse of offset_to_date().
+        """
+        index = (day - self.start_date).days + 1
+        if index <= 0:
+            return index - 1
+        if index >= len(self._cumulative):
+            self._extend(max(index + 1, 2 * (len(self._cumulative) - 1)))
+        return self._cumulative[index] - 1
+
+
+def norwegian_construction_calendar(start_date: str, include_fellesferie: bool = True) -> WorkingCalendar:
+    """
+    Calendar that skips weekends, Norwegian public holidays and fellesferie.
+
+    Args:
+        start_date: Project start date in YYYY-MM-DD format
+        include_fellesferie: Treat ISO weeks 28-30 as non-working
+
+    Returns:
+        WorkingCalendar anchored at start_date
+    """
+    return WorkingCalendar(
+        datetime.strptime(start_date, "%Y-%m-%d"),
+        lambda day: is_norwegian_construction_workday(day, include_fellesferie),
+    )
+
+
+_calendars: Dict[tuple, WorkingCalendar] = {}
+
+
+def get_norwegian_construction_calendar(start_date: str, include_fellesferie: bool = True) -> WorkingCalendar:
+    """
+    Shared (cached) Norwegian construction calendar for a start date.
+
+    Returns:
+        WorkingCalendar instance
+    """
+    key = (start_date, include_fellesferie)
+    calendar = _calendars.get(key)
+    if calendar is None:
+        calendar = _calendars[key] = norwegian_construction_calendar(start_date, include_fellesferie)
+    return calendar
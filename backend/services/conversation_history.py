@@ -0,0 +1,165 @@
+"""
+Token-budgeted conversation history for agent prompts.
+
+The last turns of a negotiation are sent verbatim; older turns are folded
+into a rolling summary. Turns are folded in steps of ``fold_step``, so the
+summary is only extended (one summarizer call over the newly folded turns
+plus the previous summary) every few turns, and cached per conversation in
+between. Prompt size therefore stays bounded however long a negotiation
+runs.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Hashable, List, NamedTuple, Optional, Tuple
+
+
+DEFAULT_TOKEN_BUDGET = 3000
+DEFAULT_KEEP_TURNS = 8
+DEFAULT_FOLD_STEP = 4
+DEFAULT_MAX_ENTRIES = 1024
+
+# (previous summary or None, turns to fold) -> new summary
+Summarizer = Callable[[Optional[str], List[Dict[str, str]]], Awaitable[str]]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for Gemini)."""
+    return (len(text) + 3) // 4
+
+
+def _turn_tokens(turns: List[Dict[str, str]]) -> int:
+    # +4 for the role label and line break in the prompt
+    return sum(estimate_tokens(t.get("content", "")) + 4 for t in turns)
+
+
+def _digest(turns: List[Dict[str, str]]) -> str:
+    h = hashlib.sha1()
+    for t in turns:
+        h.update(t.get("role", "").encode())
+        h.update(b"\x00")
+        h.update(t.get("content", "").encode())
+        h.update(b"\x01")
+    return h.hexdigest()
+
+
+def extractive_summary(previous: Optional[str], turns: List[Dict[str, str]], max_tokens: int) -> str:
+    """
+    Summary without a model call: first sentence of every folded turn.
+
+    Used when the summarizer fails; keeps the most recent part if the result
+    exceeds ``max_tokens``.
+    """
+    lines = [previous] if previous else []
+    for t in turns:
+        speaker = "Bruker" if t.get("role") == "user" else "Agent"
+        content = " ".join(t.get("content", "").split())
+        first = content.split(". ")[0]
+        lines.append(f"{speaker}: {first[:200]}")
+    text = "\n".join(lines)
+    limit = max_tokens * 4
+    return text if len(text) <= limit else "..." + text[-(limit - 3):]
+
+
+class HistoryWindow(NamedTuple):
+    """What goes into the prompt: summary of older turns plus recent turns verbatim."""
+    summary: Optional[str]
+    recent: List[Dict[str, str]]
+
+
+class ConversationHistoryManager:
+    """
+    Compacts conversation histories to a token budget.
+
+    Args:
+        summarize: Async summarizer extending a summary with folded turns
+        token_budget: Tokens for the whole history section (summary + recent)
+        keep_turns: Messages always kept verbatim (if they fit the budget)
+        fold_step: Messages folded into the summary at a time
+        max_entries: Conversations whose summaries are cached (LRU)
+    """
+
+    def __init__(self, summarize: Summarizer,
+                 token_budget: int = DEFAULT_TOKEN_BUDGET,
+                 keep_turns: int = DEFAULT_KEEP_TURNS,
+                 fold_step: int = DEFAULT_FOLD_STEP,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.summarize = summarize
+        self.token_budget = token_budget
+        self.keep_turns = keep_turns
+        self.fold_step = max(1, fold_step)
+        self.max_entries = max_entries
+        # A quarter of the budget is reserved for the summary
+        self.summary_tokens = max(1, token_budget // 4)
+        # key -> (folded message count, digest of folded messages, summary)
+        self._summaries: "OrderedDict[Hashable, Tuple[int, str, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.summarizer_calls = 0
+
+    def fold_count(self, history: List[Dict[str, str]], already_folded: int = 0) -> int:
+        """
+        Number of leading messages to fold into the summary.
+
+        Everything beyond the last ``keep_turns`` messages is folded, rounded
+        down to whole fold steps, and more while the recent messages exceed
+        their share of the budget. The latest message is never folded, and
+        messages already covered by a summary stay folded.
+        """
+        size = len(history)
+        fold = max(0, size - self.keep_turns) // self.fold_step * self.fold_step
+        fold = max(fold, already_folded)
+        recent_budget = self.token_budget - self.summary_tokens
+        while fold < size - 1 and _turn_tokens(history[fold:]) > recent_budget:
+            fold = min(size - 1, fold + self.fold_step)
+        return min(fold, max(0, size - 1))
+
+    async def compact(self, key: Optional[Hashable], history: List[Dict[str, str]]) -> HistoryWindow:
+        """
+        Summary and recent turns for a conversation.
+
+        Args:
+            key: Conversation identity, e.g. (session_id, agent_id); None
+                disables caching of the summary
+            history: Full message history, oldest first
+
+        Returns:
+            HistoryWindow with the summary (None if nothing was folded)
+        """
+        cached = None
+        if key is not None:
+            with self._lock:
+                cached = self._summaries.get(key)
+                if cached is not None:
+                    self._summaries.move_to_end(key)
+
+        # The cached summary is only valid if the folded messages are unchanged
+        if cached is not None and (cached[0] > len(history) - 1 or _digest(history[:cached[0]]) != cached[1]):
+            cached = None
+
+        folded, summary = (cached[0], cached[2]) if cached else (0, None)
+        fold = self.fold_count(history, folded)
+        if fold == 0:
+            return HistoryWindow(None, list(history))
+
+        if fold > folded:
+            turns = history[folded:fold]
+            self.summarizer_calls += 1
+            try:
+                summary = (await self.summarize(summary, turns)).strip()
+            except Exception as e:
+                print(f"History summarization failed, using extractive summary: {str(e)}")
+                summary = ""
+            if not summary:
+                summary = extractive_summary(cached[2] if cached else None, turns, self.summary_tokens)
+            elif estimate_tokens(summary) > self.summary_tokens:
+                summary = "..." + summary[-(self.summary_tokens * 4 - 3):]
+
+            if key is not None:
+                with self._lock:
+                    self._summaries[key] = (fold, _digest(history[:fold]), summary)
+                    self._summaries.move_to_end(key)
+                    while len(self._summaries) > self.max_entries:
+                        self._summaries.popitem(last=False)
+
+        return HistoryWindow(summary, list(history[fold:]))
@@ -0,0 +1,178 @@
+"""
+Server-side conversation state for agent chats.
+
+The transcript of each (user, session, agent) conversation is already in
+negotiation_history, so clients only send the new message. Transcripts are
+loaded from the database on first use and kept in an in-process LRU that is
+extended as messages are saved. Each worker process has its own LRU, so
+before a cached transcript is used its length is checked against a row
+count of negotiation_history (rows are only ever inserted); a worker that
+missed turns handled by another worker reloads the transcript. Entries
+also expire after a TTL.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from supabase import Client
+
+
+DEFAULT_MAX_ENTRIES = 2048
+DEFAULT_TTL_SECONDS = 600
+
+# (user_id, session_id, agent_id); the user id keeps one user's cached
+# transcript from being served for another user's request
+ConversationKey = Tuple[str, str, str]
+
+
+def history_messages(records: List[Dict]) -> List[Dict[str, str]]:
+    """Turn negotiation_history rows (oldest first) into user/agent messages."""
+    messages = []
+    for record in records:
+        messages.append({"role": "user", "content": record.get("user_message") or ""})
+        messages.append({"role": "agent", "content": record.get("agent_response") or ""})
+    return messages
+
+
+class ConversationStore:
+    """
+    Thread-safe LRU of conversation transcripts backed by negotiation_history.
+
+    Returned transcripts are copies and may be modified by the caller.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[ConversationKey, Tuple[float, List[Dict[str, str]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _cached(self, key: ConversationKey) -> Optional[List[Dict[str, str]]]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                return list(entry[1])
+            if entry is not None:
+                del self._entries[key]
+            return None
+
+    @staticmethod
+    def _saved_exchanges(db: Client, session_id: str, agent_id: str) -> int:
+        """Number of negotiation_history rows of a conversation."""
+        response = (
+            db.table("negotiation_history")
+            .select("id", count="exact")
+            .eq("session_id", session_id)
+            .eq("agent_id", agent_id)
+            .limit(1)
+            .execute()
+        )
+        return response.count or 0
+
+    def _put(self, key: ConversationKey, messages: List[Dict[str, str]]):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, messages)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, db: Client, user_id: str, session_id: str, agent_id: str) -> List[Dict[str, str]]:
+        """
+        Transcript of a conversation, oldest message first.
+
+        A cached transcript costs one count query; it is reloaded if other
+        turns were saved in the meantime.
+
+        Args:
+            db: Supabase client authenticated as the user (RLS applies)
+            user_id: Current user's id
+            session_id: Game session id
+            agent_id: Agent id
+
+        Returns:
+            Messages with role ("user" / "agent") and content
+        """
+        key = (user_id, session_id, agent_id)
+        messages = self._cached(key)
+        # Another worker may have saved turns since the transcript was cached
+        if messages is not None and len(messages) == 2 * self._saved_exchanges(db, session_id, agent_id):
+            with self._lock:
+                self.hits += 1
+            return messages
+
+        with self._lock:
+            self.misses += 1
+        records = (
+            db.table("negotiation_history")
+            .select("user_message, agent_response")
+            .eq("session_id", session_id)
+            .eq("agent_id", agent_id)
+            .order("timestamp")
+            .execute()
+            .data
+        )
+        messages = history_messages(records)
+        self._put(key, messages)
+        return list(messages)
+
+    def append(self, user_id: str, session_id: str, agent_id: str,
+               user_message: str, agent_response: str, expected_length: int):
+        """
+        Record a saved exchange (no-op if the conversation is not cached).
+
+        ``expected_length`` is the length of the transcript the exchange
+        follows. If the cached transcript has a different length it was
+        loaded after the insert (and already contains the exchange) or
+        another turn was saved in between, so the entry is dropped and
+        reloaded on next use instead of being extended.
+        """
+        key = (user_id, session_id, agent_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            if len(entry[1]) != expected_length:
+                del self._entries[key]
+                return
+            messages = entry[1] + [
+                {"role": "user", "content": user_message},
+                {"role": "agent", "content": agent_response},
+            ]
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, messages)
+            self._entries.move_to_end(key)
+
+    def stats(self) -> Dict:
+        """Current size and hit/miss counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+# Global store instance
+_conversation_store: Optional[ConversationStore] = None
+
+
+def get_conversation_store() -> ConversationStore:
+    """
+    Get or create the global conversation store instance.
+
+    Returns:
+        ConversationStore instance
+    """
+    global _conversation_store
+    if _conversation_store is None:
+        _conversation_store = ConversationStore()
+    return _conversation_store
@@ -0,0 +1,402 @@
+"""
+Duration compression ("crashing") solver.
+
+Finds the cheapest set of duration reductions that brings the projected
+completion date back to the deadline. Cost/time trade-offs are convex
+piecewise-linear curves per item. Uses the classic min-cut method
+(Phillips & Dessouky): each step shortens the project by cutting the
+critical subnetwork at minimum marginal cost, computed with a Dinic
+max-flow. A cut is applied for as many days as it provably stays optimal,
+so the number of max-flow runs is bounded by the number of breakpoints,
+not days.
+"""
+
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from services.critical_path_service import CriticalPathCalculator, WBSGraph
+
+
+INF = float("inf")
+
+
+class CrashCurve:
+    """
+    Convex piecewise-linear cost/time trade-off for one WBS item.
+
+    Segments are ``(days, cost_per_day)`` in the order they are consumed
+    while crashing; cost_per_day must be non-decreasing (convexity).
+    """
+
+    def __init__(self, segments: List[Tuple[int, float]]):
+        previous = -INF
+        for days, cost_per_day in segments:
+            if days <= 0 or cost_per_day < 0:
+                raise ValueError("Crash segments need positive days and non-negative cost per day")
+            if cost_per_day < previous:
+                raise ValueError("Crash curve must be convex (cost per day non-decreasing)")
+            previous = cost_per_day
+        self.segments = [(int(days), float(cost_per_day)) for days, cost_per_day in segments]
+        self.max_days = sum(days for days, _ in self.segments)
+
+    def marginal_cost(self, crashed_days: int) -> float:
+        """Cost of crashing one more day after ``crashed_days`` (INF when exhausted)."""
+        for days, cost_per_day in self.segments:
+            if crashed_days < days:
+                return cost_per_day
+            crashed_days -= days
+        return INF
+
+    def segment_remaining(self, crashed_days: int) -> int:
+        """Days left at the current marginal cost after ``crashed_days``."""
+        for days, _ in self.segments:
+            if crashed_days < days:
+                return days - crashed_days
+            crashed_days -= days
+        return 0
+
+    def cost(self, crashed_days: int) -> float:
+        """Total cost of crashing ``crashed_days`` days."""
+        total = 0.0
+        for days, cost_per_day in self.segments:
+            step = min(days, crashed_days)
+            total += step * cost_per_day
+            crashed_days -= step
+            if crashed_days <= 0:
+                break
+        return total
+
+
+class _FlowNetwork:
+    """Dinic max-flow; used to find minimum cuts of the critical subnetwork."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.adjacency: List[List[int]] = [[] for _ in range(size)]
+        self.to: List[int] = []
+        self.capacity: List[float] = []
+
+    def add_edge(self, u: int, v: int, capacity: float, reverse_capacity: float = 0.0):
+        self.adjacency[u].append(len(self.to))
+        self.to.append(v)
+        self.capacity.append(capacity)
+        self.adjacency[v].append(len(self.to))
+        self.to.append(u)
+        self.capacity.append(reverse_capacity)
+
+    def max_flow(self, source: int, sink: int) -> float:
+        flow = 0.0
+        while True:
+            level = self._bfs_levels(source)
+            if level[sink] < 0:
+                return flow
+            pointer = [0] * self.size
+            while True:
+                pushed = self._augment(source, sink, INF, level, pointer)
+                if pushed <= 0:
+                    break
+                if pushed == INF:
+                    return INF
+                flow += pushed
+
+    def _bfs_levels(self, source: int) -> List[int]:
+        level = [-1] * self.size
+        level[source] = 0
+        queue = deque([source])
+        while queue:
+            u = queue.popleft()
+            for edge in self.adjacency[u]:
+                if self.capacity[edge] > 0 and level[self.to[edge]] < 0:
+                    level[self.to[edge]] = level[u] + 1
+                    queue.append(self.to[edge])
+        return level
+
+    def _augment(self, source: int, sink: int, limit: float, level: List[int], pointer: List[int]) -> float:
+        # Iterative DFS along the level graph
+        path: List[int] = []
+        u = source
+        while True:
+            if u == sink:
+                pushed = min([limit] + [self.capacity[edge] for edge in path])
+                for edge in path:
+                    self.capacity[edge] -= pushed
+                    self.capacity[edge ^ 1] += pushed
+                return pushed
+            advanced = False
+            while pointer[u] < len(self.adjacency[u]):
+                edge = self.adjacency[u][pointer[u]]
+                v = self.to[edge]
+                if self.capacity[edge] > 0 and level[v] == level[u] + 1:
+                    path.append(edge)
+                    u = v
+                    advanced = True
+                    break
+                pointer[u] += 1
+            if advanced:
+                continue
+            if not path:
+                return 0.0
+            # Dead end: retreat and skip the edge that led here
+            level[u] = -1
+            edge = path.pop()
+            u = self.to[edge ^ 1]
+            pointer[u] += 1
+
+    def source_side(self, source: int) -> List[bool]:
+        """Vertices reachable from source in the residual graph (min-cut S side)."""
+        reachable = [False] * self.size
+        reachable[source] = True
+        queue = deque([source])
+        while queue:
+            u = queue.popleft()
+            for edge in self.adjacency[u]:
+                v = self.to[edge]
+                if self.capacity[edge] > 0 and not reachable[v]:
+                    reachable[v] = True
+                    queue.append(v)
+        return reachable
+
+
+def _schedule(graph: WBSGraph, durations: List[int]) -> Tuple[List[int], List[int], List[int], int]:
+    """ES, EF, total float (against completion) and completion offset."""
+    order = graph.topological_order()
+    es = [0] * len(graph)
+    ef = [0] * len(graph)
+    for node in order:
+        preds = graph.predecessors[node]
+        es[node] = max(ef[dep] for dep in preds) if preds else 0
+        ef[node] = es[node] + durations[node]
+    completion = max(ef) if ef else 0
+
+    ls = [0] * len(graph)
+    for node in reversed(order):
+        succs = graph.successors[node]
+        finish = min(ls[succ] for succ in succs) if succs else completion
+        ls[node] = finish - durations[node]
+    slack = [ls[node] - es[node] for node in range(len(graph))]
+    return es, ef, slack, completion
+
+
+def _min_cost_cut(graph: WBSGraph, durations: List[int], crashed: List[int],
+                  curves: List[Optional[CrashCurve]],
+                  allow_lengthening: bool) -> Optional[Tuple[List[int], List[int], int]]:
+    """
+    Minimum-cost cut of the critical subnetwork.
+
+    Each critical activity is an arc in -> out with capacity equal to its
+    marginal crash cost. The reverse arc is infinite unless the activity was
+    crashed earlier and lengthening is allowed; then it may cross the cut
+    backwards and gets one day back.
+
+    Returns:
+        (nodes to shorten, nodes to lengthen, step limit in days), or None if
+        no finite cut exists. The cut stays optimal for ``step limit`` days:
+        every critical path crosses it exactly once, no marginal cost changes
+        and no non-critical path becomes critical before then.
+    """
+    es, ef, slack, completion = _schedule(graph, durations)
+    critical = [node for node in range(len(graph)) if slack[node] == 0]
+
+    size = len(graph)
+    source, sink = 2 * size, 2 * size + 1
+    network = _FlowNetwork(2 * size + 2)
+    critical_edges = []
+
+    for node in critical:
+        curve = curves[node]
+        cost = curve.marginal_cost(crashed[node]) if curve is not None and durations[node] > 0 else INF
+        reverse = 0.0 if allow_lengthening and crashed[node] > 0 else INF
+        network.add_edge(2 * node, 2 * node + 1, cost, reverse)
+        if es[node] == 0:
+            network.add_edge(source, 2 * node, INF)
+        if ef[node] == completion:
+            network.add_edge(2 * node + 1, sink, INF)
+        for succ in graph.successors[node]:
+            if slack[succ] == 0 and es[succ] == ef[node]:
+                network.add_edge(2 * node + 1, 2 * succ, INF)
+                critical_edges.append((node, succ))
+
+    if network.max_flow(source, sink) == INF:
+        return None
+
+    reachable = network.source_side(source)
+    shorten = [node for node in critical if reachable[2 * node] and not reachable[2 * node + 1]]
+    lengthen = [node for node in critical if reachable[2 * node + 1] and not reachable[2 * node]]
+
+    crosses_back = any(not reachable[2 * node + 1] and reachable[2 * succ] for node, succ in critical_edges)
+    if lengthen or crosses_back:
+        return shorten, lengthen, 1
+
+    limits = [completion]
+    for node in shorten:
+        limits.append(durations[node])
+        limits.append(curves[node].segment_remaining(crashed[node]))
+    limits.extend(value for value in slack if value > 0)
+    return shorten, lengthen, max(1, min(limits))
+
+
+def solve_crashing(graph: WBSGraph, durations: List[int], curves: Dict[int, CrashCurve],
+                   target_offset: int) -> Dict:
+    """
+    Cheapest duration reductions that finish the project by target_offset.
+
+    Args:
+        graph: Compiled WBS graph
+        durations: Current duration per node ordinal
+        curves: Crash curve per node ordinal (nodes without a curve cannot be crashed)
+        target_offset: Required completion as day offset from project start
+
+    Returns:
+        Dict with ``durations`` (new per node), ``crashed_days`` per node,
+        ``total_cost``, ``completion`` offset and ``feasible``
+
+    Raises:
+        ValueError: If the graph has SS/FF/SF or lagged links (the min-cut
+            formulation assumes plain finish-to-start precedence)
+    """
+    if graph.generalized:
+        raise ValueError("Crash planning supports only finish-to-start dependencies without lag")
+    durations = list(durations)
+    crashed = [0] * len(graph)
+    curve_list = [curves.get(node) for node in range(len(graph))]
+
+    _, _, _, completion = _schedule(graph, durations)
+    while completion > target_offset:
+        cut = _min_cost_cut(graph, durations, crashed, curve_list, allow_lengthening=True)
+        if cut is None:
+            break
+
+        previous = (list(durations), list(crashed))
+        shorten, lengthen, step_limit = cut
+        step = min(step_limit, completion - target_offset)
+        for node in shorten:
+            durations[node] -= step
+            crashed[node] += step
+        for node in lengthen:
+            durations[node] += step
+            crashed[node] -= step
+
+        _, _, _, new_completion = _schedule(graph, durations)
+        if new_completion != completion - step and lengthen:
+            # Lengthening pushed a near-critical path over; retry shortening only
+            durations, crashed = previous
+            cut = _min_cost_cut(graph, durations, crashed, curve_list, allow_lengthening=False)
+            if cut is None:
+                break
+            shorten, _, step_limit = cut
+            step = min(step_limit, completion - target_offset)
+            for node in shorten:
+                durations[node] -= step
+                crashed[node] += step
+            _, _, _, new_completion = _schedule(graph, durations)
+        completion = new_completion
+
+    total_cost = sum(
+        curve_list[node].cost(crashed[node]) for node in range(len(graph)) if crashed[node] > 0
+    )
+
+    return {
+        "durations": durations,
+        "crashed_days": crashed,
+        "total_cost": total_cost,
+        "completion": completion,
+        "feasible": completion <= target_offset,
+    }
+
+
+def default_crash_curves(wbs_items: List[Dict], max_fraction: float = 0.25,
+                         premium: float = 1.5) -> Dict[str, List[Tuple[int, float]]]:
+    """
+    Fallback linear curves for negotiable items when none are supplied.
+
+    Each negotiable item may be crashed by up to ``max_fraction`` of its
+    baseline duration, at ``premium`` times its average baseline cost per day.
+
+    Args:
+        wbs_items: List of WBS items from wbs.json
+        max_fraction: Largest share of the baseline duration that may be cut
+        premium: Multiplier on the baseline cost per day
+
+    Returns:
+        wbs_id -> list of (days, cost_per_day) crash segments
+    """
+    curves = {}
+    for item in wbs_items:
+        duration = item.get('baseline_duration') or 0
+        cost = item.get('baseline_cost') or 0
+        days = int(duration * max_fraction)
+        if item.get('is_negotiable') and days > 0:
+            curves[item['id']] = [(days, premium * cost / duration)]
+    return curves
+
+
+def plan_crashing(wbs_items: List[Dict], commitments: List[Dict],
+                  curves: Dict[str, List[Tuple[int, float]]],
+                  start_date: str = "2025-01-15",
+                  deadline: str = "2026-05-15",
+                  graph: Optional[WBSGraph] = None) -> Dict:
+    """
+    Recommend target durations per supplier to meet the deadline at minimum cost.
+
+    Args:
+        wbs_items: List of WBS items from wbs.json
+        commitments: Commitment records (wbs_item_id, duration)
+        curves: wbs_id -> list of (days, cost_per_day) crash segments
+        start_date: Project start date
+        deadline: Project deadline
+        graph: Precompiled graph for wbs_items
+
+    Returns:
+        Dict with per-item recommendations, total added cost and the
+        resulting projected completion date
+
+    Raises:
+        ValueError: For unknown WBS ids, invalid (non-convex) curves or
+            dependencies other than plain finish-to-start
+    """
+    calculator = CriticalPathCalculator(wbs_items, start_date, graph)
+    graph = calculator.graph
+    if graph.generalized:
+        raise ValueError("Crash planning supports only finish-to-start dependencies without lag")
+    calculator.load_durations({c['wbs_item_id']: c for c in commitments})
+
+    node_curves: Dict[int, CrashCurve] = {}
+    for wbs_id, segments in curves.items():
+        node = graph.index.get(wbs_id)
+        if node is None:
+            raise ValueError(f"Unknown WBS id in crash curves: {wbs_id}")
+        node_curves[node] = CrashCurve(segments)
+
+    start_dt = datetime.strptime(start_date, "%Y-%m-%d")
+    target_offset = (datetime.strptime(deadline, "%Y-%m-%d") - start_dt).days
+    current = list(calculator.durations)
+    _, _, _, current_completion = _schedule(graph, current)
+
+    solution = solve_crashing(graph, current, node_curves, target_offset)
+
+    recommendations = []
+    for node, days in enumerate(solution["crashed_days"]):
+        if days <= 0:
+            continue
+        wbs_id = graph.ids[node]
+        recommendations.append({
+            "wbs_id": wbs_id,
+            "supplier": calculator.wbs_items[wbs_id].get("assigned_supplier"),
+            "current_duration": current[node],
+            "target_duration": solution["durations"][node],
+            "days_reduced": days,
+            "added_cost": node_curves[node].cost(days),
+        })
+
+    def iso(offset: int) -> str:
+        return (start_dt + timedelta(days=offset)).strftime("%Y-%m-%d")
+
+    return {
+        "feasible": solution["feasible"],
+        "deadline": deadline,
+        "current_completion_date": iso(current_completion),
+        "projected_completion_date": iso(solution["completion"]),
+        "total_added_cost": solution["total_cost"],
+        "recommendations": recommendations,
+    }
@@ -5,8 +5,209 @@ Implements forward pass (ES/EF) and backward pass (LS/LF) algorithms
 to calculate the critical path for WBS items.
 """
 
+from array import array
+from collections import deque
+from heapq import heappop, heappush, nlargest
 from datetime import datetime, timedelta
-from typing import Dict, List, Set, Tuple
+from typing import TYPE_CHECKING, Dict, Iterable, List, Mapping, Optional, Set, Tuple, Union
+
+if TYPE_CHECKING:
+    from services.calendar_service import WorkingCalendar
+
+
+# Precedence link types: (predecessor start|finish) -> (successor start|finish)
+LINK_TYPES = ("FS", "SS", "FF", "SF")
+
+
+def parse_dependency(dependency) -> Tuple[str, str, int]:
+    """
+    Normalize one entry of an item's ``dependencies``.
+
+    An entry is either a WBS id (finish-to-start, no lag) or a dict
+    ``{"id": ..., "type": "FS"|"SS"|"FF"|"SF", "lag": days}``. Negative
+    lags are leads.
+
+    Returns:
+        Tuple of (predecessor id, link type, lag in days)
+    """
+    if isinstance(dependency, str):
+        return dependency, "FS", 0
+    kind = str(dependency.get('type') or "FS").upper()
+    if kind not in LINK_TYPES:
+        raise ValueError(f"Unknown dependency type '{kind}'. Use one of: {', '.join(LINK_TYPES)}")
+    return dependency['id'], kind, int(dependency.get('lag') or 0)
+
+
+def dependency_ids(item: Dict) -> List[str]:
+    """Predecessor WBS ids of an item, whatever the link type."""
+    return [parse_dependency(dep)[0] for dep in item.get('dependencies', [])]
+
+
+class WBSGraph:
+    """
+    Compiled dependency graph for a set of WBS items.
+
+    Nodes are addressed by ordinal (position in ``ids``). Successor and
+    predecessor adjacency lists and in-degrees are built once, so the
+    topological order can be computed in O(V + E) and shared by both passes.
+    ``predecessor_links``/``successor_links`` carry the link type and lag of
+    each edge; ``generalized`` is False when every link is finish-to-start
+    without lag, which lets the passes use the plain max/min recurrences.
+    """
+
+    def __init__(self, wbs_items: List[Dict]):
+        """
+        Build adjacency lists from the ``dependencies`` of each WBS item.
+
+        Args:
+            wbs_items: List of WBS items with id and dependencies
+        """
+        self._init_nodes([item['id'] for item in wbs_items])
+        for node, item in enumerate(wbs_items):
+            for dep in item.get('dependencies', []):
+                self._add_link(node, *parse_dependency(dep))
+
+    @classmethod
+    def from_links(cls, ids: List[str], links: Iterable[Tuple[int, str, str, int]]) -> "WBSGraph":
+        """
+        Build a graph from ids and already-parsed links, without item dicts.
+
+        Args:
+            ids: WBS ids in node ordinal order
+            links: (node ordinal, predecessor id, link type, lag) tuples
+
+        Returns:
+            WBSGraph
+        """
+        graph = cls.__new__(cls)
+        graph._init_nodes(ids)
+        for node, dep_id, kind, lag in links:
+            graph._add_link(node, dep_id, kind, lag)
+        return graph
+
+    def _init_nodes(self, ids: List[str]):
+        self.ids: List[str] = ids
+        self.index: Dict[str, int] = {wbs_id: i for i, wbs_id in enumerate(self.ids)}
+
+        self.predecessors: List[List[int]] = [[] for _ in self.ids]
+        self.successors: List[List[int]] = [[] for _ in self.ids]
+        self.predecessor_links: List[List[Tuple[int, str, int]]] = [[] for _ in self.ids]
+        self.successor_links: List[List[Tuple[int, str, int]]] = [[] for _ in self.ids]
+        self.in_degree: List[int] = [0] * len(self.ids)
+        self.unknown_dependencies: List[Tuple[str, str]] = []
+        self.generalized = False
+
+        self._order: Optional[List[int]] = None
+        self._rank: Optional[List[int]] = None
+
+    def _add_link(self, node: int, dep_id: str, kind: str, lag: int):
+        # Unknown dependency ids still count towards in-degree, so they
+        # keep the node out of the topological order (reported there)
+        self.in_degree[node] += 1
+        pred = self.index.get(dep_id)
+        if pred is None:
+            self.unknown_dependencies.append((self.ids[node], dep_id))
+            return
+        self.predecessors[node].append(pred)
+        self.successors[pred].append(node)
+        self.predecessor_links[node].append((pred, kind, lag))
+        self.successor_links[pred].append((node, kind, lag))
+        if kind != "FS" or lag:
+            self.generalized = True
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def topological_order(self) -> List[int]:
+        """
+        Kahn's algorithm over the prebuilt adjacency lists (computed once).
+
+        Returns:
+            List of node ordinals in topologically sorted order
+
+        Raises:
+            ValueError: With the offending cycle path, or the unknown dependency
+        """
+        if self._order is not None:
+            return self._order
+
+        in_degree = list(self.in_degree)
+        queue = deque(node for node, degree in enumerate(in_degree) if degree == 0)
+        order = []
+
+        while queue:
+            current = queue.popleft()
+            order.append(current)
+
+            for succ in self.successors[current]:
+                in_degree[succ] -= 1
+                if in_degree[succ] == 0:
+                    queue.append(succ)
+
+        # Check for cycles
+        if len(order) != len(self.ids):
+            cycle = self.find_cycle([degree > 0 for degree in in_degree])
+            if cycle is not None:
+                path = " -> ".join(self.ids[node] for node in cycle)
+                raise ValueError(f"Circular dependency detected in WBS items: {path}")
+            wbs_id, dep_id = self.unknown_dependencies[0]
+            raise ValueError(f"Unknown dependency '{dep_id}' in WBS item '{wbs_id}'")
+
+        self._order = order
+        return order
+
+    def find_cycle(self, candidates: Optional[List[bool]] = None) -> Optional[List[int]]:
+        """
+        Find one dependency cycle with an iterative depth-first search.
+
+        Args:
+            candidates: Restrict the search to these nodes (e.g. the ones
+                Kahn's algorithm could not order); all nodes if omitted
+
+        Returns:
+            Node ordinals along the cycle, first node repeated at the end,
+            or None if the (candidate) graph is acyclic
+        """
+        size = len(self.ids)
+        if candidates is None:
+            candidates = [True] * size
+        # 0 = unvisited, 1 = on the current path, 2 = finished
+        state = [0] * size
+
+        for root in range(size):
+            if not candidates[root] or state[root]:
+                continue
+            state[root] = 1
+            path = [root]
+            stack = [iter(self.successors[root])]
+            while stack:
+                for succ in stack[-1]:
+                    if not candidates[succ] or state[succ] == 2:
+                        continue
+                    if state[succ] == 1:
+                        return path[path.index(succ):] + [succ]
+                    state[succ] = 1
+                    path.append(succ)
+                    stack.append(iter(self.successors[succ]))
+                    break
+                else:
+                    state[path.pop()] = 2
+                    stack.pop()
+        return None
+
+    def topological_rank(self) -> List[int]:
+        """
+        Position of each node in the topological order (computed once).
+
+        Returns:
+            List mapping node ordinal to its topological position
+        """
+        if self._rank is None:
+            rank = [0] * len(self.ids)
+            for position, node in enumerate(self.topological_order()):
+                rank[node] = position
+            self._rank = rank
+        return self._rank
 
 
 class CriticalPathCalculator:
@@ -16,27 +217,54 @@ class CriticalPathCalculator:
     Forward pass: Calculate Earliest Start (ES) and Earliest Finish (EF)
     Backward pass: Calculate Latest Start (LS) and Latest Finish (LF)
     Critical path: Tasks where slack = 0 (LS - ES = 0)
+
+    Internally ES/EF/LS/LF are integer day offsets from ``start_date`` held in
+    arrays indexed by node ordinal; dates are only produced at the API boundary.
+    With a working calendar, offsets (and durations and slack) count working
+    days and are mapped to dates through the calendar's precomputed index.
     """
 
-    def __init__(self, wbs_items: List[Dict], start_date: str = "2025-01-15"):
+    def __init__(self, wbs_items: Union[List[Dict], Mapping[str, Dict]], start_date: str = "2025-01-15",
+                 graph: Optional[WBSGraph] = None,
+                 calendar: Optional["WorkingCalendar"] = None):
         """
         Initialize calculator with WBS items.
 
         Args:
-            wbs_items: List of WBS items with id, duration, dependencies
+            wbs_items: List of WBS items with id, duration, dependencies, or
+                a mapping of wbs_id -> item (e.g. ColumnarItems from the
+                streaming loader; pass its graph too)
             start_date: Project start date in YYYY-MM-DD format
+            graph: Precompiled graph for these items (built here if omitted)
+            calendar: Working-day calendar anchored at start_date (all days
+                are working days if omitted)
         """
-        self.wbs_items = {item['id']: item for item in wbs_items}
+        if isinstance(wbs_items, Mapping):
+            self.wbs_items = wbs_items
+        else:
+            self.wbs_items = {item['id']: item for item in wbs_items}
         self.start_date = datetime.strptime(start_date, "%Y-%m-%d")
-
-        # Results
-        self.earliest_start: Dict[str, datetime] = {}
-        self.earliest_finish: Dict[str, datetime] = {}
-        self.latest_start: Dict[str, datetime] = {}
-        self.latest_finish: Dict[str, datetime] = {}
+        self.graph = graph if graph is not None else WBSGraph(list(self.wbs_items.values()))
+        self.calendar = calendar
+        if calendar is not None and calendar.start_date != self.start_date:
+            raise ValueError("Working calendar must be anchored at the project start date")
+
+        # Results (day offsets from start_date, indexed by node ordinal)
+        size = len(self.graph)
+        self.durations = array('l', [0] * size)
+        self.es = array('l', [0] * size)
+        self.ef = array('l', [0] * size)
+        self.ls = array('l', [0] * size)
+        self.lf = array('l', [0] * size)
         self.slack: Dict[str, int] = {}
         self.critical_path: List[str] = []
 
+        # Offset -> "YYYY-MM-DD", filled on demand when formatting results
+        self._iso_dates: Dict[int, str] = {}
+
+        # Deadline offset of the last backward pass (used by update_duration)
+        self._deadline_offset: Optional[int] = None
+
     def get_duration(self, wbs_id: str, commitments: Dict[str, Dict]) -> int:
         """
         Get duration for a WBS item from commitment or baseline.
@@ -52,13 +280,23 @@ class CriticalPathCalculator:
 
         # Check if there's a commitment with duration
         if wbs_id in commitments and commitments[wbs_id].get('duration'):
-            return commitments[wbs_id]['duration']
+            return int(commitments[wbs_id]['duration'])
 
         # Otherwise use baseline or locked duration
         if item.get('is_negotiable'):
-            return item.get('baseline_duration', 0)
+            return int(item.get('baseline_duration') or 0)
         else:
-            return item.get('locked_duration', 0)
+            return int(item.get('locked_duration') or 0)
+
+    def load_durations(self, commitments: Dict[str, Dict]):
+        """
+        Resolve the duration of every node once, before the passes run.
+
+        Args:
+            commitments: Dict mapping wbs_id to commitment data
+        """
+        for node, wbs_id in enumerate(self.graph.ids):
+            self.durations[node] = self.get_duration(wbs_id, commitments)
 
     def topological_sort(self) -> List[str]:
         """
@@ -67,34 +305,54 @@ class CriticalPathCalculator:
         Returns:
             List of WBS IDs in topologically sorted order
         """
-        # Build in-degree map
-        in_degree = {wbs_id: 0 for wbs_id in self.wbs_items}
-
-        for wbs_id, item in self.wbs_items.items():
-            dependencies = item.get('dependencies', [])
-            in_degree[wbs_id] = len(dependencies)
+        ids = self.graph.ids
+        return [ids[node] for node in self.graph.topological_order()]
 
-        # Queue with nodes having no dependencies
-        queue = [wbs_id for wbs_id, degree in in_degree.items() if degree == 0]
-        result = []
-
-        while queue:
-            current = queue.pop(0)
-            result.append(current)
+    def _earliest_start(self, node: int) -> int:
+        """
+        ES of a node from its predecessors' current ES/EF, for any link type.
 
-            # Find all tasks that depend on current task
-            for wbs_id, item in self.wbs_items.items():
-                dependencies = item.get('dependencies', [])
-                if current in dependencies:
-                    in_degree[wbs_id] -= 1
-                    if in_degree[wbs_id] == 0:
-                        queue.append(wbs_id)
+        FS: ES >= EF(pred) + lag      SS: ES >= ES(pred) + lag
+        FF: EF >= EF(pred) + lag      SF: EF >= ES(pred) + lag
+        Never before the project start (offset 0).
+        """
+        es, ef = self.es, self.ef
+        duration = self.durations[node]
+        start = 0
+        for pred, kind, lag in self.graph.predecessor_links[node]:
+            if kind == "FS":
+                bound = ef[pred] + lag
+            elif kind == "SS":
+                bound = es[pred] + lag
+            elif kind == "FF":
+                bound = ef[pred] + lag - duration
+            else:
+                bound = es[pred] + lag - duration
+            if bound > start:
+                start = bound
+        return start
 
-        # Check for cycles
-        if len(result) != len(self.wbs_items):
-            raise ValueError("Circular dependency detected in WBS items")
+    def _latest_finish(self, node: int) -> int:
+        """
+        LF of a node from its successors' current LS/LF, for any link type.
 
-        return result
+        Mirror image of _earliest_start(); never after the deadline.
+        """
+        ls, lf = self.ls, self.lf
+        duration = self.durations[node]
+        finish = self._deadline_offset
+        for succ, kind, lag in self.graph.successor_links[node]:
+            if kind == "FS":
+                bound = ls[succ] - lag
+            elif kind == "SS":
+                bound = ls[succ] - lag + duration
+            elif kind == "FF":
+                bound = lf[succ] - lag
+            else:
+                bound = lf[succ] - lag + duration
+            if bound < finish:
+                finish = bound
+        return finish
 
     def forward_pass(self, commitments: Dict[str, Dict]):
         """
@@ -103,26 +361,30 @@ class CriticalPathCalculator:
         ES = max(EF of all predecessors)
         EF = ES + duration
 
+        With SS/FF/SF or lagged links the bound of each link is used instead
+        (see _earliest_start()).
+
         Args:
             commitments: Dict mapping wbs_id to commitment data
         """
-        sorted_tasks = self.topological_sort()
+        self.load_durations(commitments)
 
-        for wbs_id in sorted_tasks:
-            item = self.wbs_items[wbs_id]
-            dependencies = item.get('dependencies', [])
-            duration = self.get_duration(wbs_id, commitments)
+        predecessors = self.graph.predecessors
+        durations, es, ef = self.durations, self.es, self.ef
 
-            if not dependencies:
-                # No dependencies, start at project start date
-                self.earliest_start[wbs_id] = self.start_date
-            else:
-                # Start after all dependencies finish
-                max_ef = max(self.earliest_finish[dep] for dep in dependencies)
-                self.earliest_start[wbs_id] = max_ef
+        if self.graph.generalized:
+            for node in self.graph.topological_order():
+                start = self._earliest_start(node)
+                es[node] = start
+                ef[node] = start + durations[node]
+            return
 
-            # Calculate earliest finish
-            self.earliest_finish[wbs_id] = self.earliest_start[wbs_id] + timedelta(days=duration)
+        for node in self.graph.topological_order():
+            preds = predecessors[node]
+            # No dependencies: start at project start (offset 0)
+            start = max(ef[dep] for dep in preds) if preds else 0
+            es[node] = start
+            ef[node] = start + durations[node]
 
     def backward_pass(self, commitments: Dict[str, Dict], deadline: datetime):
         """
@@ -131,32 +393,32 @@ class CriticalPathCalculator:
         LF = min(LS of all successors), or deadline for final tasks
         LS = LF - duration
 
+        With SS/FF/SF or lagged links the bound of each link is used instead
+        (see _latest_finish()).
+
         Args:
             commitments: Dict mapping wbs_id to commitment data
             deadline: Project deadline
         """
-        sorted_tasks = list(reversed(self.topological_sort()))
-
-        # Build successor map
-        successors: Dict[str, List[str]] = {wbs_id: [] for wbs_id in self.wbs_items}
-        for wbs_id, item in self.wbs_items.items():
-            dependencies = item.get('dependencies', [])
-            for dep in dependencies:
-                successors[dep].append(wbs_id)
-
-        for wbs_id in sorted_tasks:
-            duration = self.get_duration(wbs_id, commitments)
-
-            if not successors[wbs_id]:
-                # No successors, finish at deadline
-                self.latest_finish[wbs_id] = deadline
-            else:
-                # Finish before all successors start
-                min_ls = min(self.latest_start[succ] for succ in successors[wbs_id])
-                self.latest_finish[wbs_id] = min_ls
-
-            # Calculate latest start
-            self.latest_start[wbs_id] = self.latest_finish[wbs_id] - timedelta(days=duration)
+        deadline_offset = self.to_offset(deadline)
+        self._deadline_offset = deadline_offset
+
+        successors = self.graph.successors
+        durations, ls, lf = self.durations, self.ls, self.lf
+
+        if self.graph.generalized:
+            for node in reversed(self.graph.topological_order()):
+                finish = self._latest_finish(node)
+                lf[node] = finish
+                ls[node] = finish - durations[node]
+            return
+
+        for node in reversed(self.graph.topological_order()):
+            succs = successors[node]
+            # No successors: finish at deadline
+            finish = min(ls[succ] for succ in succs) if succs else deadline_offset
+            lf[node] = finish
+            ls[node] = finish - durations[node]
 
     def calculate_slack(self):
         """
@@ -165,13 +427,153 @@ class CriticalPathCalculator:
         Slack = LS - ES = LF - EF
         Critical path tasks have slack = 0
         """
-        for wbs_id in self.wbs_items:
-            slack_days = (self.latest_start[wbs_id] - self.earliest_start[wbs_id]).days
+        self.slack = {}
+        self.critical_path = []
+
+        for node, wbs_id in enumerate(self.graph.ids):
+            slack_days = self.ls[node] - self.es[node]
             self.slack[wbs_id] = slack_days
 
             if slack_days == 0:
                 self.critical_path.append(wbs_id)
 
+    def update_duration(self, wbs_id: str, duration: int) -> List[str]:
+        """
+        Incrementally apply a new duration for one WBS item.
+
+        Reuses the previous result: ES/EF are re-propagated only through
+        downstream successors and LS/LF only through upstream predecessors,
+        stopping wherever a value is unchanged. Requires a prior calculate().
+
+        Args:
+            wbs_id: WBS item ID whose duration changed
+            duration: New duration in days (falsy falls back to baseline/locked)
+
+        Returns:
+            WBS IDs whose ES, EF, LS or LF changed, in topological order
+        """
+        if self._deadline_offset is None:
+            raise ValueError("calculate() must run before update_duration()")
+
+        graph = self.graph
+        node = graph.index[wbs_id]
+        new_duration = self.get_duration(wbs_id, {wbs_id: {"duration": duration}})
+        if new_duration == self.durations[node]:
+            return []
+        self.durations[node] = new_duration
+
+        rank = graph.topological_rank()
+        durations, es, ef, ls, lf = self.durations, self.es, self.ef, self.ls, self.lf
+        changed: Set[int] = set()
+
+        # Forward: EF of the node changes (and its ES, behind FF/SF links),
+        # ES/EF of successors may follow
+        heap = [(rank[node], node)]
+        queued = {node}
+        while heap:
+            _, current = heappop(heap)
+            queued.discard(current)
+            start = self._earliest_start(current)
+            if start == es[current] and start + durations[current] == ef[current]:
+                continue
+            es[current] = start
+            ef[current] = start + durations[current]
+            changed.add(current)
+            for succ in graph.successors[current]:
+                if succ not in queued:
+                    queued.add(succ)
+                    heappush(heap, (rank[succ], succ))
+
+        # Backward: LS of the node changes (and its LF, behind SS/SF links),
+        # LS/LF of predecessors may follow
+        heap = [(-rank[node], node)]
+        queued = {node}
+        while heap:
+            _, current = heappop(heap)
+            queued.discard(current)
+            finish = self._latest_finish(current)
+            if finish == lf[current] and finish - durations[current] == ls[current]:
+                continue
+            lf[current] = finish
+            ls[current] = finish - durations[current]
+            changed.add(current)
+            for dep in graph.predecessors[current]:
+                if dep not in queued:
+                    queued.add(dep)
+                    heappush(heap, (-rank[dep], dep))
+
+        # Slack only moves where ES or LS moved
+        ids = graph.ids
+        critical = set(self.critical_path)
+        for current in changed:
+            slack_days = ls[current] - es[current]
+            self.slack[ids[current]] = slack_days
+            if slack_days == 0:
+                critical.add(ids[current])
+            else:
+                critical.discard(ids[current])
+        self.critical_path = sorted(critical, key=graph.index.__getitem__)
+
+        return [ids[current] for current in sorted(changed, key=rank.__getitem__)]
+
+    def copy(self) -> "CriticalPathCalculator":
+        """
+        Independent copy of the current results, so a shared (cached)
+        calculator can be taken as the base for update_duration().
+        Items, graph and calendar are shared with the original.
+        """
+        clone = object.__new__(type(self))
+        clone.__dict__.update(self.__dict__)
+        clone.durations = array('l', self.durations)
+        clone.es = array('l', self.es)
+        clone.ef = array('l', self.ef)
+        clone.ls = array('l', self.ls)
+        clone.lf = array('l', self.lf)
+        clone.slack = dict(self.slack)
+        clone.critical_path = list(self.critical_path)
+        clone._iso_dates = dict(self._iso_dates)
+        return clone
+
+    def to_date(self, offset: int) -> datetime:
+        """Convert a day offset from start_date to a datetime."""
+        if self.calendar is not None:
+            return self.calendar.offset_to_date(offset)
+        return self.start_date + timedelta(days=offset)
+
+    def to_offset(self, date: datetime) -> int:
+        """Convert a datetime to a day offset (last working day on or before it)."""
+        if self.calendar is not None:
+            return self.calendar.date_to_offset(date)
+        return (date - self.start_date).days
+
+    def to_iso(self, offset: int) -> str:
+        """Convert a day offset to YYYY-MM-DD, formatting each offset once."""
+        iso = self._iso_dates.get(offset)
+        if iso is None:
+            iso = self.to_date(offset).strftime("%Y-%m-%d")
+            self._iso_dates[offset] = iso
+        return iso
+
+    def _format_dates(self, offsets: array) -> Dict[str, str]:
+        to_iso = self.to_iso
+        return {wbs_id: to_iso(offsets[node]) for node, wbs_id in enumerate(self.graph.ids)}
+
+    @property
+    def earliest_start(self) -> Dict[str, datetime]:
+        return {wbs_id: self.to_date(self.es[node]) for node, wbs_id in enumerate(self.graph.ids)}
+
+    @property
+    def earliest_finish(self) -> Dict[str, datetime]:
+        return {wbs_id: self.to_date(self.ef[node]) for node, wbs_id in enumerate(self.graph.ids)}
+
+    @property
+    def latest_start(self) -> Dict[str, datetime]:
+        return {wbs_id: self.to_date(self.ls[node]) for node, wbs_id in enumerate(self.graph.ids)}
+
+    @property
+    def latest_finish(self) -> Dict[str, datetime]:
+        return {wbs_id: self.to_date(self.lf[node]) for node, wbs_id in enumerate(self.graph.ids)}
+
     def calculate(self, commitments: Dict[str, Dict], deadline: str = "2026-05-15") -> Dict:
         """
         Run full CPM calculation.
@@ -190,45 +592,45 @@ class CriticalPathCalculator:
         self.backward_pass(commitments, deadline_dt)
         self.calculate_slack()
 
-        # Find project completion date (max EF)
-        if self.earliest_finish:
-            projected_completion = max(self.earliest_finish.values())
-        else:
-            projected_completion = self.start_date
+        return self.build_result(deadline)
+
+    def build_result(self, deadline: str) -> Dict:
+        """
+        Format the current offsets as the API result dict.
 
-        meets_deadline = projected_completion <= deadline_dt
+        Args:
+            deadline: Project deadline in YYYY-MM-DD format
+
+        Returns:
+            Dict with ES, EF, LS, LF, critical path, and validation results
+        """
+        # Find project completion (max EF)
+        completion_offset = max(self.ef) if len(self.ef) else 0
+        deadline_offset = self.to_offset(datetime.strptime(deadline, "%Y-%m-%d"))
+
+        meets_deadline = completion_offset <= deadline_offset
 
         # Format results
         return {
             "valid": meets_deadline,
-            "earliest_start": {
-                wbs_id: date.strftime("%Y-%m-%d")
-                for wbs_id, date in self.earliest_start.items()
-            },
-            "earliest_finish": {
-                wbs_id: date.strftime("%Y-%m-%d")
-                for wbs_id, date in self.earliest_finish.items()
-            },
-            "latest_start": {
-                wbs_id: date.strftime("%Y-%m-%d")
-                for wbs_id, date in self.latest_start.items()
-            },
-            "latest_finish": {
-                wbs_id: date.strftime("%Y-%m-%d")
-                for wbs_id, date in self.latest_finish.items()
-            },
-            "slack": self.slack,
-            "critical_path": self.critical_path,
-            "projected_completion_date": projected_completion.strftime("%Y-%m-%d"),
+            "earliest_start": self._format_dates(self.es),
+            "earliest_finish": self._format_dates(self.ef),
+            "latest_start": self._format_dates(self.ls),
+            "latest_finish": self._format_dates(self.lf),
+            "slack": dict(self.slack),
+            "critical_path": list(self.critical_path),
+            "projected_completion_date": self.to_iso(completion_offset),
             "deadline": deadline,
             "meets_deadline": meets_deadline,
-            "total_duration_days": (projected_completion - self.start_date).days
+            "total_duration_days": (self.to_date(completion_offset) - self.start_date).days
         }
 
 
 def calculate_critical_path(wbs_items: List[Dict], commitments: List[Dict],
                            start_date: str = "2025-01-15",
-                           deadline: str = "2026-05-15") -> Dict:
+                           deadline: str = "2026-05-15",
+                           graph: Optional[WBSGraph] = None,
+                           calendar: Optional["WorkingCalendar"] = None) -> Dict:
     """
     Calculate critical path for WBS items with commitments.
 
@@ -237,6 +639,8 @@ def calculate_critical_path(wbs_items: List[Dict], commitments: List[Dict],
         commitments: List of commitment records from database
         start_date: Project start date
         deadline: Project deadline
+        graph: Precompiled graph for wbs_items (e.g. from the WBS cache)
+        calendar: Working-day calendar (durations then count working days)
 
     Returns:
         Dict with timeline data, critical path, and validation results
@@ -248,7 +652,191 @@ def calculate_critical_path(wbs_items: List[Dict], commitments: List[Dict],
     }
 
     # Initialize calculator and run CPM
-    calculator = CriticalPathCalculator(wbs_items, start_date)
+    calculator = CriticalPathCalculator(wbs_items, start_date, graph, calendar)
     result = calculator.calculate(commitment_map, deadline)
 
     return result
+
+
+def k_longest_paths(graph: WBSGraph, durations, k: int) -> List[Tuple[int, List[int]]]:
+    """
+    The k longest start-to-finish paths, by dynamic programming over the DAG.
+
+    Every node keeps only its k best (finish, predecessor, predecessor's
+    entry) entries, merged from its predecessors' entries with a bounded
+    heap, so the cost is O(E * k log k) rather than the number of paths.
+    A path's value is the finish offset of its last item when every item on
+    it starts as early as its links allow (for FS links: sum of durations
+    plus lags).
+
+    With SS/FF/SF or negative lags an item can start at the project start
+    although it has predecessors (ES is never below 0), and can finish
+    after all its successors. Paths therefore also start at items whose
+    links do not guarantee ES >= 0, and end at items whose finish no
+    successor link is guaranteed to reach, so the best entry of a node is
+    its EF and the longest path ends at the projected completion. In FS
+    graphs with non-negative lags paths run from start items to end items.
+
+    Args:
+        graph: Compiled WBS graph
+        durations: Duration per node ordinal
+        k: Number of paths to return
+
+    Returns:
+        Up to k (finish offset, node ordinals from start to end) tuples,
+        longest first
+    """
+    if k <= 0 or not len(graph):
+        return []
+
+    def shift(pred: int, kind: str, lag: int, node: int) -> int:
+        # Finish of ``node`` reached from a path finishing at ``pred``
+        return lag + (0 if kind[0] == "F" else -durations[pred]) + (durations[node] if kind[1] == "S" else 0)
+
+    best: List[List[Tuple[int, int, int]]] = [[] for _ in range(len(graph))]
+    for node in graph.topological_order():
+        links = graph.predecessor_links[node]
+        duration = durations[node]
+
+        # Starting at offset 0 is dominated if a link alone implies ES >= 0
+        # (its predecessor starts at 0 or later)
+        own_start = all(
+            lag + (durations[pred] if kind[0] == "F" else 0) - (duration if kind[1] == "F" else 0) < 0
+            for pred, kind, lag in links
+        )
+
+        def candidates():
+            if own_start:
+                yield (duration, -1, -1)
+            for pred, kind, lag in links:
+                offset = shift(pred, kind, lag, node)
+                for rank, entry in enumerate(best[pred]):
+                    yield (entry[0] + offset, pred, rank)
+
+        best[node] = nlargest(k, candidates(), key=lambda entry: entry[0])
+
+    # A path can end at a node unless some successor always finishes at or after it
+    ends = (
+        (entry[0], node, rank)
+        for node in range(len(graph))
+        if all(shift(node, kind, lag, succ) < 0 for succ, kind, lag in graph.successor_links[node])
+        for rank, entry in enumerate(best[node])
+    )
+    paths = []
+    for finish, node, rank in nlargest(k, ends, key=lambda entry: entry[0]):
+        path = []
+        while node >= 0:
+            path.append(node)
+            _, node, rank = best[node][rank]
+        path.reverse()
+        paths.append((finish, path))
+    return paths
+
+
+def near_critical_analysis(wbs_items: List[Dict], commitments: List[Dict],
+                           limit: int = 3,
+                           within_days: int = 10,
+                           start_date: str = "2025-01-15",
+                           graph: Optional[WBSGraph] = None) -> Dict:
+    """
+    Longest paths and items close to becoming critical.
+
+    Float is measured against the projected completion (not the deadline),
+    so items on the longest path have float 0 even when the project is
+    ahead of its deadline.
+
+    Args:
+        wbs_items: List of WBS items from wbs.json
+        commitments: List of commitment records (wbs_item_id, duration)
+        limit: Number of longest paths to return
+        within_days: Report items with at most this much float
+        start_date: Project start date
+        graph: Precompiled graph for wbs_items
+
+    Returns:
+        Dict with ``longest_paths`` (wbs_ids, finish date, days shorter than
+        the longest path) and ``near_critical_items`` (wbs_id -> float days,
+        smallest first)
+    """
+    commitment_map = {c['wbs_item_id']: c for c in commitments}
+    calculator = CriticalPathCalculator(wbs_items, start_date, graph)
+    calculator.forward_pass(commitment_map)
+    completion = max(calculator.ef) if len(calculator.ef) else 0
+    calculator.backward_pass(commitment_map, calculator.to_date(completion))
+
+    ids = calculator.graph.ids
+    paths = k_longest_paths(calculator.graph, calculator.durations, limit)
+    floats = sorted(
+        (calculator.ls[node] - calculator.es[node], wbs_id)
+        for node, wbs_id in enumerate(ids)
+    )
+
+    return {
+        "longest_paths": [
+            {
+                "wbs_ids": [ids[node] for node in path],
+                "finish_date": calculator.to_iso(finish),
+                "days_shorter": completion - finish,
+            }
+            for finish, path in paths
+        ],
+        "near_critical_items": {wbs_id: days for days, wbs_id in floats if days <= within_days},
+    }
+
+
+def diff_critical_path(previous: Dict, current: Dict) -> Dict:
+    """
+    Compact structural diff between two CPM results.
+
+    Only what changed is included, so a history view can show the effect
+    of each version without fetching full timelines.
+
+    Args:
+        previous: Earlier calculate_critical_path() result
+        current: Later calculate_critical_path() result
+
+    Returns:
+        Dict with:
+        - ``projected_completion_date``: [previous, current]
+        - ``completion_delta_days``: days the completion moved (positive = later)
+        - ``changed``: wbs_id -> {"earliest_start"/"earliest_finish": [previous, current]}
+        - ``slack_delta``: wbs_id -> change in slack (days)
+        - ``entered_critical_path`` / ``left_critical_path``: wbs_ids
+        - ``added`` / ``removed``: wbs_ids present in only one result
+    """
+    changed: Dict[str, Dict[str, List[str]]] = {}
+    for field in ("earliest_start", "earliest_finish"):
+        before, after = previous.get(field, {}), current.get(field, {})
+        for wbs_id, value in after.items():
+            old = before.get(wbs_id)
+            if old is not None and old != value:
+                changed.setdefault(wbs_id, {})[field] = [old, value]
+
+    old_slack, new_slack = previous.get("slack", {}), current.get("slack", {})
+    slack_delta = {
+        wbs_id: slack - old_slack[wbs_id]
+        for wbs_id, slack in new_slack.items()
+        if wbs_id in old_slack and slack != old_slack[wbs_id]
+    }
+
+    old_critical, new_critical = set(previous.get("critical_path", [])), set(current.get("critical_path", []))
+    old_ids, new_ids = previous.get("earliest_start", {}), current.get("earliest_start", {})
+
+    old_completion = previous.get("projected_completion_date")
+    new_completion = current.get("projected_completion_date")
+    completion_delta = 0
+    if old_completion and new_completion:
+        completion_delta = (
+            datetime.strptime(new_completion, "%Y-%m-%d") - datetime.strptime(old_completion, "%Y-%m-%d")
+        ).days
+
+    return {
+        "projected_completion_date": [old_completion, new_completion],
+        "completion_delta_days": completion_delta,
+        "changed": changed,
+        "slack_delta": slack_delta,
+        "entered_critical_path": [wbs_id for wbs_id in current.get("critical_path", []) if wbs_id not in old_critical],
+        "left_critical_path": [wbs_id for wbs_id in previous.get("critical_path", []) if wbs_id not in new_critical],
+        "added": [wbs_id for wbs_id in new_ids if wbs_id not in old_ids],
+        "removed": [wbs_id for wbs_id in old_ids if wbs_id not in new_ids],
+    }
@@ -3,11 +3,22 @@ Gemini AI Service
 Handles communication with Google Gemini AI for agent responses
 """
 
+import asyncio
+
 import google.generativeai as genai
-from typing import List, Dict, Optional
+from typing import Any, AsyncIterator, Hashable, List, Dict, Optional, Tuple
 from config import settings
 from google.api_core.exceptions import ResourceExhausted
 
+from services.conversation_history import ConversationHistoryManager
+from services.prompt_cache import GeminiCacheProvider, PromptCacheManager, describe_wbs
+from services.wbs_service import get_compiled_wbs
+
+
+EMPTY_RESPONSE_MESSAGE = "Beklager, jeg fikk ikke generert et svar. Vennligst prøv igjen."
+QUOTA_EXCEEDED_MESSAGE = "Beklager, den daglige kvoten for AI-kall er nådd. Prøv igjen i morgen."
+TECHNICAL_ERROR_MESSAGE = "Beklager, det oppstod en teknisk feil med AI-tjenesten. Vennligst prøv igjen om litt."
+
 
 class GeminiService:
     """Service for interacting with Google Gemini AI"""
@@ -27,55 +38,192 @@ class GeminiService:
             generation_config=self.generation_config
         )
 
+        # Bounds in-flight Gemini requests per worker; further calls wait here
+        # without blocking the event loop
+        self._request_slots = asyncio.Semaphore(settings.GEMINI_MAX_CONCURRENCY)
+
+        self.history = ConversationHistoryManager(
+            summarize=self._summarize_history,
+            token_budget=settings.GEMINI_HISTORY_TOKEN_BUDGET,
+            keep_turns=settings.GEMINI_HISTORY_KEEP_TURNS,
+        )
+
+        # System prompt + WBS description are uploaded once per agent and
+        # referenced by name (None = always send them inline)
+        self.prompt_cache: Optional[PromptCacheManager] = None
+        if settings.GEMINI_CONTEXT_CACHE:
+            self.prompt_cache = PromptCacheManager(
+                GeminiCacheProvider(self.generation_config),
+                model_name=model_name,
+                ttl_seconds=settings.GEMINI_CONTEXT_CACHE_TTL_SECONDS,
+            )
+
     async def chat_with_agent(
         self,
         agent_id: str,
         system_prompt: str,
         user_message: str,
         conversation_history: List[Dict[str, str]],
-        game_context: Optional[Dict] = None
+        game_context: Optional[Dict] = None,
+        conversation_key: Optional[Hashable] = None
     ) -> str:
         """
         Send a message to an AI agent and get response.
-        """
-        full_prompt = self._build_full_prompt(
-            system_prompt=system_prompt,
-            conversation_history=conversation_history,
-            user_message=user_message,
-            game_context=game_context
-        )
 
+        ``conversation_key`` (e.g. (session_id, agent_id)) lets the summary of
+        older turns be reused across calls.
+        """
         try:
-            # Generate response from Gemini
-            response = self.model.generate_content(full_prompt)
+            model, full_prompt = await self._prepare_prompt(
+                agent_id, system_prompt, conversation_history, user_message, game_context, conversation_key
+            )
+
+            # Generate response from Gemini (non-blocking)
+            async with self._request_slots:
+                response = await model.generate_content_async(full_prompt)
 
             if not response or not response.text:
-                return "Beklager, jeg fikk ikke generert et svar. Vennligst prøv igjen."
+                return EMPTY_RESPONSE_MESSAGE
 
             return response.text.strip()
 
         except ResourceExhausted as e:
             print(f"Gemini API Quota Exceeded for agent {agent_id}: {str(e)}")
-            return "Beklager, den daglige kvoten for AI-kall er nådd. Prøv igjen i morgen."
+            return QUOTA_EXCEEDED_MESSAGE
         except Exception as e:
             print(f"Gemini API error for agent {agent_id}: {str(e)}")
-            return f"Beklager, det oppstod en teknisk feil med AI-tjenesten. Vennligst prøv igjen om litt."
+            return TECHNICAL_ERROR_MESSAGE
 
-    def _build_full_prompt(
+    async def stream_chat_with_agent(
         self,
+        agent_id: str,
         system_prompt: str,
+        user_message: str,
+        conversation_history: List[Dict[str, str]],
+        game_context: Optional[Dict] = None,
+        conversation_key: Optional[Hashable] = None
+    ) -> AsyncIterator[str]:
+        """
+        Send a message to an AI agent and yield the response as it is generated.
+
+        Yields text chunks in order; joined they form the full response. On
+        errors the same fallback messages as chat_with_agent are yielded
+        (after any text already streamed).
+        """
+        produced = False
+        try:
+            model, full_prompt = await self._prepare_prompt(
+                agent_id, system_prompt, conversation_history, user_message, game_context, conversation_key
+            )
+            async with self._request_slots:
+                response = await model.generate_content_async(full_prompt, stream=True)
+                async for chunk in response:
+                    # Chunks without text (e.g. safety or finish metadata) raise on .text
+                    text = chunk.text if chunk.parts else ""
+                    if text:
+                        produced = True
+                        yield text
+
+            if not produced:
+                yield EMPTY_RESPONSE_MESSAGE
+
+        except ResourceExhausted as e:
+            print(f"Gemini API Quota Exceeded for agent {agent_id}: {str(e)}")
+            yield ("\n\n" if produced else "") + QUOTA_EXCEEDED_MESSAGE
+        except Exception as e:
+            print(f"Gemini API error for agent {agent_id}: {str(e)}")
+            yield ("\n\n" if produced else "") + TECHNICAL_ERROR_MESSAGE
+
+    async def _prepare_prompt(
+        self,
+        agent_id: str,
+        system_prompt: str,
+        conversation_history: List[Dict[str, str]],
+        user_message: str,
+        game_context: Optional[Dict],
+        conversation_key: Optional[Hashable]
+    ) -> Tuple[Any, str]:
+        """
+        Pick the model and build the prompt for one turn.
+
+        Returns:
+            (model, prompt): a model bound to the cached static instructions
+            and a prompt without them, or the plain model and the full prompt
+        """
+        instructions = self._static_instructions(system_prompt)
+        model = None
+        if self.prompt_cache is not None:
+            model = await self.prompt_cache.get_model(agent_id, instructions)
+
+        window = await self.history.compact(conversation_key, conversation_history)
+        prompt = self._build_full_prompt(
+            system_prompt=None if model is not None else instructions,
+            conversation_history=window.recent,
+            user_message=user_message,
+            game_context=game_context,
+            history_summary=window.summary
+        )
+        return (model or self.model), prompt
+
+    def _static_instructions(self, system_prompt: str) -> str:
+        """
+        The part of the prompt that is the same on every turn: the agent's
+        system prompt followed by the project WBS.
+        """
+        try:
+            wbs_items = get_compiled_wbs().elements
+        except Exception as e:
+            print(f"WBS description unavailable for agent prompt: {str(e)}")
+            return system_prompt
+        return f"{system_prompt}\n\n# PROJECT WBS\n{describe_wbs(wbs_items)}"
+
+    async def _summarize_history(self, previous_summary: Optional[str], turns: List[Dict[str, str]]) -> str:
+        """
+        Extend the running summary of a negotiation with older turns.
+
+        Args:
+            previous_summary: Summary of the turns before these (None at first)
+            turns: Messages that no longer fit in the verbatim window
+
+        Returns:
+            Updated summary text
+        """
+        prompt_parts = [
+            "# TASK",
+            "Summarize this negotiation between a project manager (BRUKER) and a supplier (DEG) in Norwegian.",
+            "Keep every price, duration, offer, concession and promise. At most 150 words, no greeting.",
+            "",
+        ]
+        if previous_summary:
+            prompt_parts.extend(["# SUMMARY SO FAR", previous_summary, ""])
+        prompt_parts.append("# NEW MESSAGES")
+        for msg in turns:
+            speaker = "BRUKER" if msg.get("role") == "user" else "DEG"
+            prompt_parts.append(f"{speaker}: {msg.get('content', '')}")
+        prompt_parts.extend(["", "# UPDATED SUMMARY"])
+
+        async with self._request_slots:
+            response = await self.model.generate_content_async("\n".join(prompt_parts))
+        return response.text if response and response.parts else ""
+
+    def _build_full_prompt(
+        self,
+        system_prompt: Optional[str],
         conversation_history: List[Dict[str, str]],
         user_message: str,
-        game_context: Optional[Dict] = None
+        game_context: Optional[Dict] = None,
+        history_summary: Optional[str] = None
     ) -> str:
         """
         Build the complete prompt including system instructions, context, and history.
 
         Args:
-            system_prompt: The agent's system prompt (personality, rules, etc.)
-            conversation_history: Previous messages in this conversation
+            system_prompt: The agent's system prompt (personality, rules, etc.);
+                None when it is already in the model's cached content
+            conversation_history: Previous messages in this conversation (recent window)
             user_message: The current user message
             game_context: Current game state (budget, commitments, deadline, etc.)
+            history_summary: Summary of the messages before conversation_history
 
         Returns:
             Complete formatted prompt for Gemini
@@ -83,9 +231,10 @@ class GeminiService:
         prompt_parts = []
 
         # 1. System prompt (agent personality and rules)
-        prompt_parts.append("# SYSTEM INSTRUCTIONS")
-        prompt_parts.append(system_prompt)
-        prompt_parts.append("")
+        if system_prompt is not None:
+            prompt_parts.append("# SYSTEM INSTRUCTIONS")
+            prompt_parts.append(system_prompt)
+            prompt_parts.append("")
 
         # 2. Game context (if provided)
         if game_context:
@@ -93,7 +242,12 @@ class GeminiService:
             prompt_parts.append(self._format_game_context(game_context))
             prompt_parts.append("")
 
-        # 3. Conversation history
+        # 3. Conversation history (older turns summarized)
+        if history_summary:
+            prompt_parts.append("# EARLIER CONVERSATION (SUMMARY)")
+            prompt_parts.append(history_summary)
+            prompt_parts.append("")
+
         if conversation_history:
             prompt_parts.append("# CONVERSATION HISTORY")
             for msg in conversation_history:
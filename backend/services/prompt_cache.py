@@ -0,0 +1,180 @@
+"""
+Provider-side context caching for the static part of agent prompts.
+
+Each agent's system prompt plus the WBS description is several thousand
+tokens and identical on every turn. It is uploaded once as cached content
+and referenced by name afterwards, so a turn only sends the game state,
+history and new message. Cache handles expire on the provider side; they
+are refreshed (TTL extended) shortly before they run out, recreated if the
+refresh fails or the static text changes, and skipped for a while if the
+provider refuses to cache (the prompt is then sent inline).
+"""
+
+import asyncio
+import hashlib
+import threading
+import time
+from datetime import timedelta
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+import google.generativeai as genai
+from google.generativeai import caching
+
+from services.critical_path_service import dependency_ids
+
+
+DEFAULT_TTL_SECONDS = 3600
+# Refresh handles this long before they expire
+DEFAULT_REFRESH_MARGIN_SECONDS = 300
+# Wait this long before trying to cache again after the provider refused
+DEFAULT_RETRY_SECONDS = 600
+
+
+def describe_wbs(wbs_items: List[Dict]) -> str:
+    """
+    Static description of the project WBS for agent prompts.
+
+    Args:
+        wbs_items: List of WBS items from wbs.json
+
+    Returns:
+        One line per item: id, name, negotiability, baseline figures,
+        supplier and dependencies
+    """
+    def nok(amount) -> str:
+        return f"{amount or 0:,.0f} NOK".replace(",", " ")
+
+    lines = []
+    for item in wbs_items:
+        if item.get("is_negotiable"):
+            terms = f"forhandlingsbar, grunnlag {nok(item.get('baseline_cost'))} / {item.get('baseline_duration') or 0} dager"
+        else:
+            terms = f"låst, {nok(item.get('locked_cost'))} / {item.get('locked_duration') or 0} dager"
+        parts = [f"{item['id']} {item.get('name', '')}: {terms}"]
+        if item.get("assigned_supplier"):
+            parts.append(f"leverandør {item['assigned_supplier']}")
+        dependencies = dependency_ids(item)
+        if dependencies:
+            parts.append("avhenger av " + ", ".join(dependencies))
+        lines.append("  - " + "; ".join(parts))
+    return "\n".join(lines)
+
+
+class GeminiCacheProvider:
+    """Gemini cached-content API (google.generativeai.caching)."""
+
+    def __init__(self, generation_config: Dict):
+        self.generation_config = generation_config
+
+    def create(self, model_name: str, system_instruction: str, ttl_seconds: int) -> Tuple[str, float]:
+        """Upload the instruction; returns (handle name, expiry as epoch seconds)."""
+        cache = caching.CachedContent.create(
+            model=model_name,
+            system_instruction=system_instruction,
+            ttl=timedelta(seconds=ttl_seconds),
+        )
+        return cache.name, cache.expire_time.timestamp()
+
+    def refresh(self, name: str, ttl_seconds: int) -> float:
+        """Extend the TTL of a handle; returns the new expiry."""
+        cache = caching.CachedContent.get(name)
+        cache.update(ttl=timedelta(seconds=ttl_seconds))
+        return cache.expire_time.timestamp()
+
+    def model(self, name: str) -> Any:
+        """Model whose requests use the cached instruction."""
+        return genai.GenerativeModel.from_cached_content(
+            cached_content=caching.CachedContent.get(name),
+            generation_config=self.generation_config,
+        )
+
+    def delete(self, name: str):
+        caching.CachedContent.get(name).delete()
+
+
+class PromptCacheManager:
+    """
+    Keeps one cached-content handle per key (e.g. agent id) fresh.
+
+    Provider calls are blocking network calls and run in a thread; a lock
+    per key keeps concurrent turns from creating duplicate handles.
+
+    Args:
+        provider: GeminiCacheProvider (or a fake with the same methods)
+        model_name: Model the cached content is created for
+        ttl_seconds: TTL of created / refreshed handles
+        refresh_margin_seconds: Refresh when a handle expires within this
+        retry_seconds: Back-off after the provider refused to cache
+        clock: Epoch seconds (injectable for tests)
+    """
+
+    def __init__(self, provider: Any, model_name: str,
+                 ttl_seconds: int = DEFAULT_TTL_SECONDS,
+                 refresh_margin_seconds: int = DEFAULT_REFRESH_MARGIN_SECONDS,
+                 retry_seconds: int = DEFAULT_RETRY_SECONDS,
+                 clock: Callable[[], float] = time.time):
+        self.provider = provider
+        self.model_name = model_name
+        self.ttl_seconds = ttl_seconds
+        self.refresh_margin_seconds = min(refresh_margin_seconds, ttl_seconds // 2)
+        self.retry_seconds = retry_seconds
+        self.clock = clock
+        # key -> (digest of the instruction, handle name, expiry, model)
+        self._entries: Dict[Hashable, Tuple[str, str, float, Any]] = {}
+        # key -> time after which caching is tried again
+        self._retry_at: Dict[Hashable, float] = {}
+        self._locks: Dict[Hashable, asyncio.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock(self, key: Hashable) -> asyncio.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(key, asyncio.Lock())
+
+    async def get_model(self, key: Hashable, system_instruction: str) -> Optional[Any]:
+        """
+        Model bound to a fresh cached copy of ``system_instruction``.
+
+        Returns:
+            The provider model, or None if caching is unavailable and the
+            instruction has to be sent inline
+        """
+        digest = hashlib.sha256(system_instruction.encode("utf-8")).hexdigest()
+        async with self._lock(key):
+            now = self.clock()
+            entry = self._entries.get(key)
+
+            if entry is not None and entry[0] == digest:
+                _, name, expire_at, model = entry
+                if expire_at - now > self.refresh_margin_seconds:
+                    return model
+                if expire_at > now:
+                    try:
+                        expire_at = await asyncio.to_thread(self.provider.refresh, name, self.ttl_seconds)
+                        self._entries[key] = (digest, name, expire_at, model)
+                        return model
+                    except Exception as e:
+                        print(f"Refreshing cached prompt {name} failed, recreating: {str(e)}")
+                del self._entries[key]
+            elif entry is not None:
+                # Instruction changed (prompt file or WBS updated): drop the old handle
+                del self._entries[key]
+                try:
+                    await asyncio.to_thread(self.provider.delete, entry[1])
+                except Exception as e:
+                    print(f"Deleting cached prompt {entry[1]} failed: {str(e)}")
+
+            if self._retry_at.get(key, 0) > now:
+                return None
+            try:
+                name, expire_at = await asyncio.to_thread(
+                    self.provider.create, self.model_name, system_instruction, self.ttl_seconds
+                )
+                model = await asyncio.to_thread(self.provider.model, name)
+            except Exception as e:
+                print(f"Context caching unavailable for {key}, sending prompt inline: {str(e)}")
+                self._retry_at[key] = now + self.retry_seconds
+                return None
+
+            self._retry_at.pop(key, None)
+            self._entries[key] = (digest, name, expire_at, model)
+            return model
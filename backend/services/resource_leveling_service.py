@@ -0,0 +1,206 @@
+"""
+Resource-constrained scheduling (resource leveling) for the CPM engine.
+
+Uses a priority-rule serial schedule generation scheme: eligible activities
+(all predecessors scheduled) wait in a heap ordered by CPM latest start, and
+each one is placed at the earliest time that satisfies both its predecessors
+and the remaining capacity of every resource it uses.
+"""
+
+from bisect import bisect_right
+from datetime import datetime
+from heapq import heapify, heappop, heappush
+from typing import Dict, List, Optional
+
+from services.critical_path_service import CriticalPathCalculator, WBSGraph
+
+
+DEFAULT_CAPACITY = 1
+
+
+class ResourceProfile:
+    """
+    Step function of resource usage over time.
+
+    ``times[i]`` is a breakpoint and ``levels[i]`` the usage from
+    ``times[i]`` up to the next breakpoint (the last level runs forever).
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.times: List[int] = [0]
+        self.levels: List[int] = [0]
+
+    def conflict_end(self, start: int, duration: int, demand: int) -> Optional[int]:
+        """
+        End of the first segment in [start, start + duration) without room
+        for ``demand``, or None if the demand fits over the whole interval.
+
+        The trailing level is always 0, so an overloaded segment always has
+        an end.
+        """
+        end = start + duration
+        i = bisect_right(self.times, start) - 1
+        while i < len(self.times) and self.times[i] < end:
+            if self.levels[i] + demand > self.capacity:
+                return self.times[i + 1]
+            i += 1
+        return None
+
+    def _split(self, time: int) -> int:
+        i = bisect_right(self.times, time) - 1
+        if self.times[i] != time:
+            self.times.insert(i + 1, time)
+            self.levels.insert(i + 1, self.levels[i])
+            i += 1
+        return i
+
+    def reserve(self, start: int, duration: int, demand: int):
+        """Add ``demand`` units of usage over [start, start + duration)."""
+        first = self._split(start)
+        last = self._split(start + duration)
+        for i in range(first, last):
+            self.levels[i] += demand
+
+
+def item_demands(item: Dict) -> Dict[str, int]:
+    """
+    Resource demands of a WBS item.
+
+    Uses the item's ``resource_demands`` if present; otherwise one crew of
+    the ``assigned_supplier`` (items without a supplier are unconstrained).
+    """
+    demands = item.get("resource_demands")
+    if demands is not None:
+        return {resource: int(units) for resource, units in demands.items() if units}
+    supplier = item.get("assigned_supplier")
+    return {supplier: 1} if supplier else {}
+
+
+def serial_schedule(graph: WBSGraph, durations: List[int], priorities: List[int],
+                    demands: List[Dict[str, int]], capacities: Dict[str, int]) -> List[int]:
+    """
+    Serial schedule generation scheme.
+
+    Args:
+        graph: Compiled WBS graph
+        durations: Duration per node ordinal
+        priorities: Lower value is scheduled first (e.g. CPM latest start)
+        demands: Resource demands per node ordinal
+        capacities: Capacity per resource (DEFAULT_CAPACITY if missing)
+
+    Returns:
+        Leveled start offset per node ordinal
+
+    Raises:
+        ValueError: If a single activity demands more than a resource's capacity
+    """
+    profiles: Dict[str, ResourceProfile] = {}
+    for node_demands in demands:
+        for resource, units in node_demands.items():
+            capacity = capacities.get(resource, DEFAULT_CAPACITY)
+            if units > capacity:
+                raise ValueError(f"Demand of {units} for '{resource}' exceeds its capacity of {capacity}")
+            if resource not in profiles:
+                profiles[resource] = ResourceProfile(capacity)
+
+    graph.topological_order()  # surface cycles before scheduling
+    remaining = [len(preds) for preds in graph.predecessors]
+    eligible = [(priorities[node], node) for node in range(len(graph)) if remaining[node] == 0]
+    heapify(eligible)
+
+    start = [0] * len(graph)
+    finish = [0] * len(graph)
+
+    while eligible:
+        _, node = heappop(eligible)
+        duration = durations[node]
+        t = 0
+        for pred, kind, lag in graph.predecessor_links[node]:
+            bound = (finish[pred] if kind[0] == "F" else start[pred]) + lag
+            if kind[1] == "F":
+                bound -= duration
+            if bound > t:
+                t = bound
+
+        # Move right until every resource has room for the whole duration
+        if duration > 0:
+            fits = False
+            while not fits:
+                fits = True
+                for resource, units in demands[node].items():
+                    blocked_until = profiles[resource].conflict_end(t, duration, units)
+                    if blocked_until is not None:
+                        t = blocked_until
+                        fits = False
+                        break
+            for resource, units in demands[node].items():
+                profiles[resource].reserve(t, duration, units)
+
+        start[node] = t
+        finish[node] = t + duration
+
+        for succ in graph.successors[node]:
+            remaining[succ] -= 1
+            if remaining[succ] == 0:
+                heappush(eligible, (priorities[succ], succ))
+
+    return start
+
+
+def level_resources(wbs_items: List[Dict], commitments: List[Dict],
+                    capacities: Optional[Dict[str, int]] = None,
+                    demands: Optional[Dict[str, Dict[str, int]]] = None,
+                    start_date: str = "2025-01-15",
+                    deadline: str = "2026-05-15",
+                    graph: Optional[WBSGraph] = None) -> Dict:
+    """
+    Resource-leveled schedule next to the unconstrained CPM schedule.
+
+    Args:
+        wbs_items: List of WBS items from wbs.json
+        commitments: Commitment records (wbs_item_id, duration)
+        capacities: Units available per resource (default 1 each)
+        demands: wbs_id -> resource demands, overriding item_demands()
+        start_date: Project start date
+        deadline: Project deadline
+        graph: Precompiled graph for wbs_items
+
+    Returns:
+        Dict with leveled ES/EF and completion, the CPM ES/EF and completion,
+        and the per-item delay caused by leveling
+    """
+    calculator = CriticalPathCalculator(wbs_items, start_date, graph)
+    cpm = calculator.calculate({c['wbs_item_id']: c for c in commitments}, deadline)
+    graph = calculator.graph
+
+    node_demands = []
+    for wbs_id in graph.ids:
+        if demands is not None and wbs_id in demands:
+            node_demands.append({resource: int(units) for resource, units in demands[wbs_id].items() if units})
+        else:
+            node_demands.append(item_demands(calculator.wbs_items[wbs_id]))
+
+    durations = list(calculator.durations)
+    leveled_start = serial_schedule(graph, durations, list(calculator.ls), node_demands, capacities or {})
+    leveled_finish = [leveled_start[node] + durations[node] for node in range(len(graph))]
+    completion = max(leveled_finish) if leveled_finish else 0
+
+    to_iso = calculator.to_iso
+
+    return {
+        "leveled_earliest_start": {wbs_id: to_iso(leveled_start[node]) for node, wbs_id in enumerate(graph.ids)},
+        "leveled_earliest_finish": {wbs_id: to_iso(leveled_finish[node]) for node, wbs_id in enumerate(graph.ids)},
+        "leveled_completion_date": to_iso(completion),
+        "leveled_meets_deadline": completion <= calculator.to_offset(datetime.strptime(deadline, "%Y-%m-%d")),
+        "delay_days": {
+            wbs_id: leveled_start[node] - calculator.es[node]
+            for node, wbs_id in enumerate(graph.ids)
+            if leveled_start[node] != calculator.es[node]
+        },
+        "earliest_start": cpm["earliest_start"],
+        "earliest_finish": cpm["earliest_finish"],
+        "projected_completion_date": cpm["projected_completion_date"],
+        "meets_deadline": cpm["meets_deadline"],
+        "deadline": deadline,
+    }
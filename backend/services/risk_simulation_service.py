@@ -0,0 +1,256 @@
+"""
+Monte Carlo schedule-risk simulation on top of the CPM engine.
+
+Samples item durations from triangular or PERT distributions around the
+deterministic duration, evaluates the samples in vectorized batches with
+the scenario service and aggregates completion percentiles, the probability
+of meeting the deadline and per-item criticality indices.
+"""
+
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services.critical_path_service import CriticalPathCalculator, WBSGraph
+from services.scenario_service import batch_cpm
+
+
+# Relative (optimistic, pessimistic) spread around the most likely duration
+COMPLEXITY_SPREAD: Dict[str, Tuple[float, float]] = {
+    "low": (0.10, 0.15),
+    "medium": (0.15, 0.30),
+    "high": (0.20, 0.50),
+}
+DEFAULT_SPREAD = COMPLEXITY_SPREAD["medium"]
+
+DISTRIBUTIONS = ("pert", "triangular")
+
+# Iterations evaluated per vectorized batch (bounds peak memory to chunk x items)
+CHUNK_SIZE = 2_000
+# Batch size inside worker chunks; the time budget is checked between batches
+WORKER_BATCH_SIZE = 250
+
+
+def _duration_bounds(calculator: CriticalPathCalculator) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Optimistic / most likely / pessimistic durations per node.
+
+    The most likely value is the deterministic duration (commitment,
+    baseline or locked); the spread depends on the item's complexity.
+    """
+    mode = np.asarray(calculator.durations, dtype=np.float64)
+    low = np.empty_like(mode)
+    high = np.empty_like(mode)
+    for node, wbs_id in enumerate(calculator.graph.ids):
+        down, up = COMPLEXITY_SPREAD.get(calculator.wbs_items[wbs_id].get("complexity"), DEFAULT_SPREAD)
+        low[node] = mode[node] * (1.0 - down)
+        high[node] = mode[node] * (1.0 + up)
+    return low, mode, high
+
+
+def sample_durations(rng: np.random.Generator, low: np.ndarray, mode: np.ndarray,
+                     high: np.ndarray, iterations: int, distribution: str = "pert") -> np.ndarray:
+    """
+    Draw an (iterations x items) integer duration matrix.
+
+    Args:
+        rng: NumPy random generator
+        low: Optimistic duration per item
+        mode: Most likely duration per item
+        high: Pessimistic duration per item
+        iterations: Number of rows to draw
+        distribution: "pert" or "triangular"
+
+    Returns:
+        Integer matrix of sampled durations in days
+    """
+    width = high - low
+    # Zero-width items (e.g. zero duration) are deterministic
+    degenerate = width <= 0
+    safe_width = np.where(degenerate, 1.0, width)
+
+    if distribution == "pert":
+        alpha = 1.0 + 4.0 * (mode - low) / safe_width
+        beta = 1.0 + 4.0 * (high - mode) / safe_width
+        samples = low + width * rng.beta(alpha, beta, size=(iterations, len(mode)))
+    elif distribution == "triangular":
+        # Inverse CDF of the triangular distribution, vectorized over items
+        u = rng.random((iterations, len(mode)))
+        split = (mode - low) / safe_width
+        left = low + np.sqrt(u * safe_width * (mode - low))
+        right = high - np.sqrt((1.0 - u) * safe_width * (high - mode))
+        samples = np.where(u < split, left, right)
+    else:
+        raise ValueError(f"Unknown distribution '{distribution}'. Use one of: {', '.join(DISTRIBUTIONS)}")
+
+    samples = np.where(degenerate, mode, samples)
+    return np.rint(samples).astype(np.int64)
+
+
+def _simulate_chunk(graph: WBSGraph, low: np.ndarray, mode: np.ndarray, high: np.ndarray,
+                    iterations: int, distribution: str,
+                    seed: np.random.SeedSequence,
+                    stop_at: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Simulate one chunk; returns (completion offsets, critical counts per node).
+
+    With ``stop_at`` (time.time() value) the chunk is evaluated in batches of
+    WORKER_BATCH_SIZE and returns early once that time has passed, so a
+    running chunk cannot overrun the time budget by more than one batch. At
+    least one batch is always evaluated.
+
+    Module-level so it can run in a worker process.
+    """
+    rng = np.random.default_rng(seed)
+    batch_size = iterations if stop_at is None else WORKER_BATCH_SIZE
+    completions = []
+    critical_counts = np.zeros(len(graph), dtype=np.int64)
+    done = 0
+    while done < iterations:
+        size = min(batch_size, iterations - done)
+        durations = sample_durations(rng, low, mode, high, size, distribution)
+        batch = batch_cpm(graph, durations)
+        completions.append(batch["completion"])
+        critical_counts += batch["critical"].sum(axis=0)
+        done += size
+        if stop_at is not None and time.time() >= stop_at:
+            break
+    return np.concatenate(completions), critical_counts
+
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_workers = 0
+
+
+def _get_process_pool(workers: int) -> ProcessPoolExecutor:
+    """Get or create the shared worker pool (recreated if the size changes)."""
+    global _process_pool, _process_pool_workers
+    if _process_pool is None or _process_pool_workers != workers:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = ProcessPoolExecutor(max_workers=workers)
+        _process_pool_workers = workers
+    return _process_pool
+
+
+def simulate_schedule_risk(wbs_items: List[Dict], commitments: List[Dict],
+                           iterations: int = 10_000,
+                           distribution: str = "pert",
+                           start_date: str = "2025-01-15",
+                           deadline: str = "2026-05-15",
+                           time_budget_s: Optional[float] = 2.0,
+                           workers: int = 1,
+                           seed: Optional[int] = None,
+                           graph: Optional[WBSGraph] = None) -> Dict:
+    """
+    Run a Monte Carlo schedule-risk simulation.
+
+    Iterations are evaluated in chunks of CHUNK_SIZE. Once the time budget
+    is spent no further chunks are started and running chunks stop after
+    their current batch; the result is based on the iterations completed
+    so far.
+
+    Args:
+        wbs_items: List of WBS items from wbs.json
+        commitments: List of commitment records (wbs_item_id, duration)
+        iterations: Requested number of iterations
+        distribution: "pert" or "triangular"
+        start_date: Project start date
+        deadline: Project deadline
+        time_budget_s: Wall-clock budget in seconds (None = unbounded)
+        workers: Number of worker processes (1 = run in-process)
+        seed: Seed for reproducible results
+        graph: Precompiled graph for wbs_items
+
+    Returns:
+        Dict with P50/P80/P95 completion dates, probability of meeting the
+        deadline and per-item criticality indices
+    """
+    if iterations <= 0:
+        raise ValueError("iterations must be positive")
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError(f"Unknown distribution '{distribution}'. Use one of: {', '.join(DISTRIBUTIONS)}")
+
+    started = time.perf_counter()
+    deadline_at = None if time_budget_s is None else started + time_budget_s
+
+    calculator = CriticalPathCalculator(wbs_items, start_date, graph)
+    graph = calculator.graph
+    graph.topological_order()  # surface cycles before sampling
+    calculator.load_durations({c['wbs_item_id']: c for c in commitments})
+    low, mode, high = _duration_bounds(calculator)
+
+    chunk_sizes = [CHUNK_SIZE] * (iterations // CHUNK_SIZE)
+    if iterations % CHUNK_SIZE:
+        chunk_sizes.append(iterations % CHUNK_SIZE)
+    seeds = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+
+    completions: List[np.ndarray] = []
+    critical_counts = np.zeros(len(graph), dtype=np.int64)
+
+    def out_of_time() -> bool:
+        return deadline_at is not None and time.perf_counter() >= deadline_at
+
+    # Wall-clock time, comparable across processes
+    stop_at = None if time_budget_s is None else time.time() + time_budget_s
+
+    workers = max(1, min(workers, os.cpu_count() or 1))
+    if workers == 1 or len(chunk_sizes) == 1:
+        for size, chunk_seed in zip(chunk_sizes, seeds):
+            if completions and out_of_time():
+                break
+            completion, counts = _simulate_chunk(graph, low, mode, high, size, distribution, chunk_seed, stop_at)
+            completions.append(completion)
+            critical_counts += counts
+    else:
+        pool = _get_process_pool(workers)
+        pending_chunks = list(zip(chunk_sizes, seeds))
+        running = set()
+        while pending_chunks or running:
+            # The first chunk is started even if the budget is already spent
+            while pending_chunks and len(running) < workers and not (out_of_time() and (completions or running)):
+                size, chunk_seed = pending_chunks.pop(0)
+                running.add(pool.submit(_simulate_chunk, graph, low, mode, high, size, distribution,
+                                        chunk_seed, stop_at))
+            if not running:
+                break
+            # Running chunks stop themselves at stop_at, so blocking here is bounded
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                completion, counts = future.result()
+                completions.append(completion)
+                critical_counts += counts
+            if out_of_time():
+                pending_chunks.clear()
+
+    if not completions:
+        raise ValueError("No iterations completed within the time budget")
+
+    completion_offsets = np.concatenate(completions)
+    iterations_run = len(completion_offsets)
+
+    start_dt = datetime.strptime(start_date, "%Y-%m-%d")
+    deadline_offset = (datetime.strptime(deadline, "%Y-%m-%d") - start_dt).days
+
+    def percentile_date(q: float) -> str:
+        offset = int(np.percentile(completion_offsets, q, method="higher"))
+        return (start_dt + timedelta(days=offset)).strftime("%Y-%m-%d")
+
+    criticality = critical_counts / iterations_run
+
+    return {
+        "iterations_requested": iterations,
+        "iterations_run": iterations_run,
+        "distribution": distribution,
+        "p50_completion_date": percentile_date(50),
+        "p80_completion_date": percentile_date(80),
+        "p95_completion_date": percentile_date(95),
+        "probability_meeting_deadline": float(np.mean(completion_offsets <= deadline_offset)),
+        "criticality_index": {wbs_id: float(criticality[node]) for node, wbs_id in enumerate(graph.ids)},
+        "deadline": deadline,
+        "elapsed_ms": int((time.perf_counter() - started) * 1000),
+    }
@@ -0,0 +1,256 @@
+"""
+Batch what-if evaluation for the CPM engine.
+
+Evaluates many duration scenarios (scenarios x WBS items) in one vectorized
+forward/backward pass. Nodes are grouped into dependency levels, so the
+Python loop runs once per level while NumPy works across all scenarios and
+all nodes of a level at the same time.
+"""
+
+import weakref
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services.critical_path_service import CriticalPathCalculator, WBSGraph
+
+
+class BatchPlan:
+    """
+    Level structure of a WBSGraph, precomputed for vectorized passes.
+
+    Forward levels group nodes by longest distance from a root, backward
+    levels by longest distance to a sink. Predecessor/successor lists are
+    padded into rectangular index matrices; the pad index points at an
+    extra sentinel column (``len(graph)``). Each level also carries
+    matrices of the links' lags and whether they leave from / point at a
+    finish (padding reads as an FS link without lag).
+    """
+
+    def __init__(self, graph: WBSGraph):
+        order = graph.topological_order()
+        size = len(graph)
+        self.size = size
+        self.generalized = graph.generalized
+
+        depth = [0] * size
+        for node in order:
+            for pred in graph.predecessors[node]:
+                depth[node] = max(depth[node], depth[pred] + 1)
+
+        height = [0] * size
+        for node in reversed(order):
+            for succ in graph.successors[node]:
+                height[node] = max(height[node], height[succ] + 1)
+
+        self.forward_levels = self._build_levels(depth, graph.predecessor_links, size)
+        self.backward_levels = self._build_levels(height, graph.successor_links, size)
+
+    @staticmethod
+    def _build_levels(level_of: List[int], links: List[List[Tuple[int, str, int]]], pad: int):
+        buckets: Dict[int, List[int]] = {}
+        for node, level in enumerate(level_of):
+            buckets.setdefault(level, []).append(node)
+
+        levels = []
+        for level in sorted(buckets):
+            nodes = buckets[level]
+            width = max(1, max(len(links[node]) for node in nodes))
+            matrix = np.full((len(nodes), width), pad, dtype=np.intp)
+            from_finish = np.ones((len(nodes), width), dtype=bool)
+            to_finish = np.zeros((len(nodes), width), dtype=bool)
+            lags = np.zeros((len(nodes), width), dtype=np.int64)
+            for row, node in enumerate(nodes):
+                for col, (other, kind, lag) in enumerate(links[node]):
+                    matrix[row, col] = other
+                    from_finish[row, col] = kind[0] == "F"
+                    to_finish[row, col] = kind[1] == "F"
+                    lags[row, col] = lag
+            levels.append((np.array(nodes, dtype=np.intp), matrix, from_finish, to_finish, lags))
+        return levels
+
+
+_plans: "weakref.WeakKeyDictionary[WBSGraph, BatchPlan]" = weakref.WeakKeyDictionary()
+
+
+def get_batch_plan(graph: WBSGraph) -> BatchPlan:
+    """
+    Get the (cached) batch plan for a compiled graph.
+
+    Args:
+        graph: Compiled WBS graph
+
+    Returns:
+        BatchPlan for the graph
+    """
+    plan = _plans.get(graph)
+    if plan is None:
+        plan = BatchPlan(graph)
+        _plans[graph] = plan
+    return plan
+
+
+def batch_cpm(graph: WBSGraph, durations: np.ndarray,
+              deadline_offset: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """
+    Run forward and backward passes for many duration vectors at once.
+
+    Args:
+        graph: Compiled WBS graph
+        durations: Integer matrix of shape (scenarios, len(graph)) in node ordinal order
+        deadline_offset: Deadline as day offset from the project start. If None,
+            each scenario's own completion is used, so slack is total float
+            and ``critical`` marks the scenario's critical path
+
+    Returns:
+        Dict with ES/EF/LS/LF/slack matrices (scenarios x nodes), the
+        boolean ``critical`` matrix and the ``completion`` offset per scenario
+    """
+    plan = get_batch_plan(graph)
+    durations = np.asarray(durations, dtype=np.int64)
+    if durations.ndim != 2 or durations.shape[1] != plan.size:
+        raise ValueError(f"Expected a duration matrix with {plan.size} columns, got shape {durations.shape}")
+
+    scenarios = durations.shape[0]
+    if plan.generalized:
+        return _batch_cpm_generalized(plan, durations, deadline_offset)
+
+    # Extra sentinel column: EF = 0 for "no predecessor", LS = deadline for "no successor"
+    ef = np.zeros((scenarios, plan.size + 1), dtype=np.int64)
+    es = np.zeros((scenarios, plan.size), dtype=np.int64)
+    for nodes, preds, *_ in plan.forward_levels:
+        start = ef[:, preds].max(axis=2)
+        es[:, nodes] = start
+        ef[:, nodes] = start + durations[:, nodes]
+
+    completion = ef[:, :-1].max(axis=1) if plan.size else np.zeros(scenarios, dtype=np.int64)
+    if deadline_offset is None:
+        ls = np.repeat(completion[:, None], plan.size + 1, axis=1)
+    else:
+        ls = np.full((scenarios, plan.size + 1), deadline_offset, dtype=np.int64)
+    lf = np.zeros((scenarios, plan.size), dtype=np.int64)
+    for nodes, succs, *_ in plan.backward_levels:
+        finish = ls[:, succs].min(axis=2)
+        lf[:, nodes] = finish
+        ls[:, nodes] = finish - durations[:, nodes]
+
+    ef, ls = ef[:, :-1], ls[:, :-1]
+    slack = ls - es
+
+    return {
+        "earliest_start": es,
+        "earliest_finish": ef,
+        "latest_start": ls,
+        "latest_finish": lf,
+        "slack": slack,
+        "critical": slack == 0,
+        "completion": completion,
+    }
+
+
+def _batch_cpm_generalized(plan: BatchPlan, durations: np.ndarray,
+                           deadline_offset: Optional[int]) -> Dict[str, np.ndarray]:
+    """batch_cpm() for graphs with SS/FF/SF or lagged links (same bounds as the calculator)."""
+    scenarios = durations.shape[0]
+    size = plan.size
+
+    # Sentinel column: ES = EF = 0, so padding bounds ES below by the project start
+    es = np.zeros((scenarios, size + 1), dtype=np.int64)
+    ef = np.zeros((scenarios, size + 1), dtype=np.int64)
+    for nodes, preds, from_finish, to_finish, lags in plan.forward_levels:
+        bound = np.where(from_finish, ef[:, preds], es[:, preds]) + lags
+        bound -= np.where(to_finish, durations[:, nodes][:, :, None], 0)
+        start = np.maximum(bound.max(axis=2), 0)
+        es[:, nodes] = start
+        ef[:, nodes] = start + durations[:, nodes]
+
+    es, ef = es[:, :-1], ef[:, :-1]
+    completion = ef.max(axis=1) if size else np.zeros(scenarios, dtype=np.int64)
+    if deadline_offset is None:
+        limit = completion
+    else:
+        limit = np.full(scenarios, deadline_offset, dtype=np.int64)
+
+    # Sentinel column: LS = LF = deadline, so padding bounds LF above by the deadline
+    ls = np.repeat(limit[:, None], size + 1, axis=1)
+    lf = np.repeat(limit[:, None], size + 1, axis=1)
+    for nodes, succs, from_finish, to_finish, lags in plan.backward_levels:
+        bound = np.where(to_finish, lf[:, succs], ls[:, succs]) - lags
+        bound += np.where(from_finish, 0, durations[:, nodes][:, :, None])
+        finish = np.minimum(bound.min(axis=2), limit[:, None])
+        lf[:, nodes] = finish
+        ls[:, nodes] = finish - durations[:, nodes]
+
+    ls, lf = ls[:, :-1], lf[:, :-1]
+    slack = ls - es
+
+    return {
+        "earliest_start": es,
+        "earliest_finish": ef,
+        "latest_start": ls,
+        "latest_finish": lf,
+        "slack": slack,
+        "critical": slack == 0,
+        "completion": completion,
+    }
+
+
+def evaluate_what_if(wbs_items: List[Dict], commitments: List[Dict],
+                     scenarios: List[Dict[str, float]],
+                     start_date: str = "2025-01-15",
+                     deadline: str = "2026-05-15",
+                     graph: Optional[WBSGraph] = None) -> List[Dict]:
+    """
+    Evaluate duration what-if scenarios on top of the current commitments.
+
+    Args:
+        wbs_items: List of WBS items from wbs.json
+        commitments: List of commitment records (wbs_item_id, duration)
+        scenarios: Each scenario maps wbs_id -> duration override in days;
+            0 means the baseline/locked duration, as for commitments
+        start_date: Project start date
+        deadline: Project deadline
+        graph: Precompiled graph for wbs_items
+
+    Returns:
+        One result dict per scenario with projected completion, slack and
+        critical path membership
+
+    Raises:
+        ValueError: If a scenario references an unknown WBS id or a negative duration
+    """
+    calculator = CriticalPathCalculator(wbs_items, start_date, graph)
+    graph = calculator.graph
+    calculator.load_durations({c['wbs_item_id']: c for c in commitments})
+
+    matrix = np.tile(np.asarray(calculator.durations, dtype=np.int64), (len(scenarios), 1))
+    for row, overrides in enumerate(scenarios):
+        for wbs_id, duration in overrides.items():
+            node = graph.index.get(wbs_id)
+            if node is None:
+                raise ValueError(f"Unknown WBS id in scenario {row}: {wbs_id}")
+            if duration < 0:
+                raise ValueError(f"Negative duration in scenario {row} for {wbs_id}")
+            # Same rule as a commitment in CriticalPathCalculator (0 = baseline)
+            matrix[row, node] = calculator.get_duration(wbs_id, {wbs_id: {"duration": duration}})
+
+    start_dt = datetime.strptime(start_date, "%Y-%m-%d")
+    deadline_offset = (datetime.strptime(deadline, "%Y-%m-%d") - start_dt).days
+    batch = batch_cpm(graph, matrix, deadline_offset)
+
+    ids = graph.ids
+    results = []
+    for row, overrides in enumerate(scenarios):
+        completion = int(batch["completion"][row])
+        slack_row = batch["slack"][row].tolist()
+        results.append({
+            "overrides": dict(overrides),
+            "projected_completion_date": (start_dt + timedelta(days=completion)).strftime("%Y-%m-%d"),
+            "total_duration_days": completion,
+            "meets_deadline": completion <= deadline_offset,
+            "days_before_deadline": deadline_offset - completion,
+            "slack": dict(zip(ids, slack_row)),
+            "critical_path": [ids[node] for node in np.flatnonzero(batch["critical"][row])],
+        })
+    return results
@@ -0,0 +1,167 @@
+"""
+Completion-date sensitivity (tornado) analysis for the CPM engine.
+
+For every item, the effect of lengthening or shortening its duration by N
+days on the projected completion is derived from one forward pass, one
+backward (tail) pass and one sweep over the edges, instead of re-running
+CPM per item:
+
+- lengthening v by N moves completion by max(0, N - float(v)), where float
+  is measured against the projected completion
+- shortening v by N gives max(longest path through v - N, longest path
+  avoiding v). Paths avoiding v either lie entirely before or after v in
+  topological order, or use an edge that jumps over v's position; the
+  best jumping edge per position comes from a heap sweep.
+"""
+
+from datetime import datetime, timedelta
+from heapq import heappop, heappush
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services.critical_path_service import CriticalPathCalculator, WBSGraph
+from services.scenario_service import batch_cpm
+
+
+def _analytic_sensitivity(graph: WBSGraph, durations: List[int], delta: int) -> Tuple[int, List[Tuple[int, int, int]]]:
+    """Single-pass sensitivity for graphs with finish-to-start links only."""
+    order = graph.topological_order()
+    size = len(graph)
+
+    # Longest path ending at each node's finish (EF) and starting at its start (tail)
+    ef = [0] * size
+    for node in order:
+        start = 0
+        for pred, _, lag in graph.predecessor_links[node]:
+            start = max(start, ef[pred] + lag)
+        ef[node] = start + durations[node]
+    tail = [0] * size
+    for node in reversed(order):
+        after = 0
+        for succ, _, lag in graph.successor_links[node]:
+            after = max(after, lag + tail[succ])
+        tail[node] = durations[node] + after
+    completion = max(ef) if size else 0
+
+    position = graph.topological_rank()
+    before_max = [0] * (size + 1)   # best EF among positions < p
+    for p, node in enumerate(order):
+        before_max[p + 1] = max(before_max[p], ef[node])
+    after_max = [0] * (size + 1)    # best tail among positions >= p
+    for p in range(size - 1, -1, -1):
+        after_max[p] = max(after_max[p + 1], tail[order[p]])
+
+    # Edges (u, w) jump over every position strictly between u and w
+    jumps_from: List[List[Tuple[int, int]]] = [[] for _ in range(size)]
+    for u in range(size):
+        for w, _, lag in graph.successor_links[u]:
+            if position[w] > position[u] + 1:
+                jumps_from[position[u]].append((ef[u] + lag + tail[w], position[w]))
+
+    results = [(0, 0, 0)] * size
+    heap: List[Tuple[int, int]] = []
+    for p, node in enumerate(order):
+        if p:
+            for value, end in jumps_from[p - 1]:
+                heappush(heap, (-value, end))
+        while heap and heap[0][1] <= p:
+            heappop(heap)
+        avoiding = max(before_max[p], after_max[p + 1], -heap[0][0] if heap else 0)
+
+        through = ef[node] - durations[node] + tail[node]
+        total_float = completion - through
+        later = max(0, delta - total_float)
+        shortened = max(through - min(delta, durations[node]), avoiding)
+        results[node] = (total_float, later, completion - shortened)
+
+    return completion, results
+
+
+def _batched_sensitivity(graph: WBSGraph, durations: List[int], delta: int,
+                         nodes: List[int]) -> Tuple[int, Dict[int, Tuple[int, int, int]]]:
+    """
+    Sensitivity via one vectorized batch for graphs with SS/FF/SF links.
+
+    With those links a duration change does not shift every path through
+    the item equally, so the +N/-N scenarios are evaluated in one batch.
+    """
+    base = np.asarray(durations, dtype=np.int64)
+    matrix = np.tile(base, (1 + 2 * len(nodes), 1))
+    for i, node in enumerate(nodes):
+        matrix[1 + 2 * i, node] += delta
+        matrix[2 + 2 * i, node] = max(0, base[node] - delta)
+    batch = batch_cpm(graph, matrix)
+    completion = int(batch["completion"][0])
+    return completion, {
+        node: (
+            int(batch["slack"][0, node]),
+            int(batch["completion"][1 + 2 * i]) - completion,
+            completion - int(batch["completion"][2 + 2 * i]),
+        )
+        for i, node in enumerate(nodes)
+    }
+
+
+def analyze_sensitivity(wbs_items: List[Dict], commitments: List[Dict],
+                        delta_days: int = 10,
+                        start_date: str = "2025-01-15",
+                        negotiable_only: bool = True,
+                        graph: Optional[WBSGraph] = None) -> Dict:
+    """
+    Rank items by how much a ±delta_days duration change moves completion.
+
+    Args:
+        wbs_items: List of WBS items from wbs.json
+        commitments: List of commitment records (wbs_item_id, duration)
+        delta_days: Days added / removed per item
+        start_date: Project start date
+        negotiable_only: Only report negotiable items
+        graph: Precompiled graph for wbs_items
+
+    Returns:
+        Dict with the projected completion and ``items`` ranked by swing
+        (days later for +delta plus days earlier for -delta)
+    """
+    if delta_days <= 0:
+        raise ValueError("delta_days must be positive")
+
+    calculator = CriticalPathCalculator(wbs_items, start_date, graph)
+    graph = calculator.graph
+    calculator.load_durations({c['wbs_item_id']: c for c in commitments})
+    durations = list(calculator.durations)
+
+    nodes = [
+        node for node, wbs_id in enumerate(graph.ids)
+        if not negotiable_only or calculator.wbs_items[wbs_id].get("is_negotiable")
+    ]
+
+    if any(kind != "FS" for links in graph.predecessor_links for _, kind, _ in links):
+        completion, per_node = _batched_sensitivity(graph, durations, delta_days, nodes)
+    else:
+        completion, analytic = _analytic_sensitivity(graph, durations, delta_days)
+        per_node = {node: analytic[node] for node in nodes}
+
+    items = []
+    for node in nodes:
+        total_float, later, earlier = per_node[node]
+        wbs_id = graph.ids[node]
+        item = calculator.wbs_items[wbs_id]
+        items.append({
+            "wbs_id": wbs_id,
+            "name": item.get("name"),
+            "supplier": item.get("assigned_supplier"),
+            "duration": durations[node],
+            "float_days": total_float,
+            "days_later_if_longer": later,
+            "days_earlier_if_shorter": earlier,
+            "swing_days": later + earlier,
+        })
+    items.sort(key=lambda entry: (-entry["swing_days"], entry["float_days"], entry["wbs_id"]))
+
+    start_dt = datetime.strptime(start_date, "%Y-%m-%d")
+    return {
+        "delta_days": delta_days,
+        "projected_completion_date": (start_dt + timedelta(days=completion)).strftime("%Y-%m-%d"),
+        "items": items,
+    }
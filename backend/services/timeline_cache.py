@@ -0,0 +1,256 @@
+"""
+Memoized CPM results.
+
+Timelines depend only on the WBS version, start date, deadline and the
+(wbs_id, duration) pairs of the commitments, so identical commitment sets
+(repeated validate clicks, every new session's baseline) can reuse a
+previous result instead of recomputing it. The near-critical analysis
+shown next to a timeline is cached the same way.
+
+Adding one commitment is computed incrementally: the calculator state of
+each commitment set is kept in a smaller LRU, and the new set's timeline is
+derived from the previous set's state with update_duration().
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+from services.critical_path_service import CriticalPathCalculator, calculate_critical_path, near_critical_analysis
+from services.wbs_service import CompiledWBS
+
+
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_TTL_SECONDS = 900
+# Calculator states hold O(items) arrays, so fewer of them are kept
+DEFAULT_MAX_CALCULATORS = 64
+
+
+def timeline_fingerprint(wbs_version: str, start_date: str, deadline: str,
+                         commitments: List[Dict]) -> Tuple:
+    """
+    Canonical cache key for a CPM run.
+
+    Durations are normalized the same way the calculator reads them
+    (int, falsy = no override), and pairs are sorted so the order in which
+    commitments were fetched does not matter.
+
+    Args:
+        wbs_version: Content hash of wbs.json
+        start_date: Project start date
+        deadline: Project deadline
+        commitments: Commitment records with wbs_item_id and duration
+
+    Returns:
+        Hashable fingerprint tuple
+    """
+    pairs = {}
+    for c in commitments:
+        # Later records win, matching the calculator's commitment map
+        pairs[c['wbs_item_id']] = int(c.get('duration') or 0)
+    return (wbs_version, start_date, deadline, tuple(sorted(pairs.items())))
+
+
+class TimelineCache:
+    """
+    Thread-safe LRU cache with per-entry TTL and hit/miss counters.
+
+    Cached results are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Dict]:
+        """Return the cached result for key, or None (counts a hit or miss)."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, result: Dict):
+        """Store a result, evicting the least recently used entry when full."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Dict]) -> Dict:
+        """Return the cached result for key, computing and storing it on a miss."""
+        result = self.get(key)
+        if result is None:
+            result = compute()
+            self.put(key, result)
+        return result
+
+    def clear(self):
+        """Drop all entries (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """Current size and hit/miss counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+# Global cache instances
+_timeline_cache: Optional[TimelineCache] = None
+_calculator_cache: Optional[TimelineCache] = None
+
+
+def get_timeline_cache() -> TimelineCache:
+    """
+    Get or create the global timeline cache instance.
+
+    Returns:
+        TimelineCache instance
+    """
+    global _timeline_cache
+    if _timeline_cache is None:
+        _timeline_cache = TimelineCache()
+    return _timeline_cache
+
+
+def get_calculator_cache() -> TimelineCache:
+    """
+    Get or create the global cache of calculator states (for incremental updates).
+
+    Returns:
+        TimelineCache instance holding CriticalPathCalculator values
+    """
+    global _calculator_cache
+    if _calculator_cache is None:
+        _calculator_cache = TimelineCache(max_entries=DEFAULT_MAX_CALCULATORS)
+    return _calculator_cache
+
+
+def cached_critical_path(wbs: CompiledWBS, commitments: List[Dict],
+                         start_date: str = "2025-01-15",
+                         deadline: str = "2026-05-15") -> Dict:
+    """
+    calculate_critical_path() memoized on the commitment-set fingerprint.
+
+    Args:
+        wbs: CompiledWBS from the WBS cache
+        commitments: Commitment records (wbs_item_id, duration)
+        start_date: Project start date
+        deadline: Project deadline
+
+    Returns:
+        Shared (read-only) CPM result dict
+    """
+    key = timeline_fingerprint(wbs.version, start_date, deadline, commitments)
+    return get_timeline_cache().get_or_compute(
+        key,
+        lambda: calculate_critical_path(
+            wbs_items=wbs.elements,
+            commitments=commitments,
+            start_date=start_date,
+            deadline=deadline,
+            graph=wbs.graph,
+        ),
+    )
+
+
+def cached_near_critical(wbs: CompiledWBS, commitments: List[Dict],
+                         limit: int = 3,
+                         within_days: int = 10,
+                         start_date: str = "2025-01-15") -> Dict:
+    """
+    near_critical_analysis() memoized on the commitment-set fingerprint.
+
+    Args:
+        wbs: CompiledWBS from the WBS cache
+        commitments: Commitment records (wbs_item_id, duration)
+        limit: Number of longest paths to return
+        within_days: Report items with at most this much float
+        start_date: Project start date
+
+    Returns:
+        Shared (read-only) analysis dict
+    """
+    # Float is measured against the completion, so the deadline is not part of the key
+    key = ("near_critical", limit, within_days) + timeline_fingerprint(wbs.version, start_date, "", commitments)
+    return get_timeline_cache().get_or_compute(
+        key,
+        lambda: near_critical_analysis(
+            wbs.elements,
+            commitments,
+            limit=limit,
+            within_days=within_days,
+            start_date=start_date,
+            graph=wbs.graph,
+        ),
+    )
+
+
+def cached_commitment_update(wbs: CompiledWBS, commitments: List[Dict],
+                             wbs_id: str, duration: int,
+                             start_date: str = "2025-01-15",
+                             deadline: str = "2026-05-15") -> Dict:
+    """
+    Timeline after committing one more item, updated incrementally.
+
+    The result is memoized like cached_critical_path(). On a miss the cached
+    calculator state for ``commitments`` (computed in full only if it is not
+    cached; its timeline is then cached too) is copied and only the nodes
+    affected by the new duration are re-propagated. The new state is cached
+    as the base for the next commitment.
+
+    Args:
+        wbs: CompiledWBS from the WBS cache
+        commitments: Commitment records (wbs_item_id, duration) already made
+        wbs_id: WBS item being committed
+        duration: Its committed duration
+        start_date: Project start date
+        deadline: Project deadline
+
+    Returns:
+        Shared (read-only) CPM result dict for the commitments plus the new one
+    """
+    final_commitments = [*commitments, {"wbs_item_id": wbs_id, "duration": duration}]
+    key = timeline_fingerprint(wbs.version, start_date, deadline, final_commitments)
+    timeline_cache = get_timeline_cache()
+    result = timeline_cache.get(key)
+    if result is not None:
+        return result
+
+    calculators = get_calculator_cache()
+    base_key = timeline_fingerprint(wbs.version, start_date, deadline, commitments)
+    base = calculators.get(base_key)
+    if base is None:
+        base = CriticalPathCalculator(wbs.items_by_id, start_date, wbs.graph)
+        base.calculate({c['wbs_item_id']: c for c in commitments}, deadline)
+        calculators.put(base_key, base)
+        timeline_cache.put(base_key, base.build_result(deadline))
+
+    # Cached states are shared, so update a copy
+    calculator = base.copy()
+    calculator.update_duration(wbs_id, duration)
+    result = calculator.build_result(deadline)
+    calculators.put(key, calculator)
+    timeline_cache.put(key, result)
+    return result
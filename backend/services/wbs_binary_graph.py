@@ -0,0 +1,436 @@
+"""
+Compact binary WBS graph format with memory-mapped loading.
+
+``compile_wbs_graph()`` turns wbs.json into a single little-endian file:
+
+- header: magic, format version, flags, node/edge counts, id table and item
+  blob sizes, and the SHA-256, size and mtime of the source wbs.json
+- interned id table: offsets into one UTF-8 blob, plus ordinals sorted by id
+  so lookups are a binary search instead of a per-process dict
+- precomputed topological order
+- per-node columns: negotiable flag, baseline/locked duration and cost
+- per-item JSON: offsets into one UTF-8 blob with each wbs_elements entry
+- CSR adjacency in both directions (row pointers, neighbour ordinals, link
+  type index into LINK_TYPES, lag)
+
+Every section is 8-byte aligned. ``BinaryWBSGraph`` maps the file read-only
+and exposes the sections as zero-copy memoryviews, so loading does no
+parsing and all worker processes share the same page-cache pages.
+``BinaryWBSGraph`` provides the attributes CriticalPathCalculator reads from
+a WBSGraph, so the calculator runs on it unchanged. Its items read the CPM
+columns from the map and parse an item's JSON only when another field
+(name, supplier, dependencies, ...) is accessed.
+"""
+
+import hashlib
+import json
+import mmap
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping, Sequence
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+
+from services.critical_path_service import LINK_TYPES, CriticalPathCalculator, WBSGraph
+
+if TYPE_CHECKING:
+    from services.calendar_service import WorkingCalendar
+
+
+MAGIC = b"WBSG"
+FORMAT_VERSION = 2
+FLAG_GENERALIZED = 1
+
+# magic, version, flags, nodes, edges, id blob bytes, item blob bytes,
+# source sha256, source size, source mtime (ns), padding
+HEADER = struct.Struct("<4sIIQQQQ32sQq4x")
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def _section_layout(nodes: int, edges: int, id_bytes: int, item_bytes: int) -> List[Tuple[str, str, int]]:
+    """(name, memoryview format, item count) of every section, in file order."""
+    return [
+        ("id_offsets", "q", nodes + 1),
+        ("id_blob", "B", id_bytes),
+        ("id_sorted", "i", nodes),
+        ("topological_order", "i", nodes),
+        ("negotiable", "B", nodes),
+        ("baseline_duration", "q", nodes),
+        ("locked_duration", "q", nodes),
+        ("baseline_cost", "d", nodes),
+        ("locked_cost", "d", nodes),
+        ("item_offsets", "q", nodes + 1),
+        ("item_blob", "B", item_bytes),
+        ("pred_ptr", "q", nodes + 1),
+        ("pred_idx", "i", edges),
+        ("pred_type", "B", edges),
+        ("pred_lag", "i", edges),
+        ("succ_ptr", "q", nodes + 1),
+        ("succ_idx", "i", edges),
+        ("succ_type", "B", edges),
+        ("succ_lag", "i", edges),
+    ]
+
+
+def _csr(links: List[List[Tuple[int, str, int]]]) -> Tuple[array, array, array, array]:
+    ptr, idx, kinds, lags = array('q', [0]), array('i'), array('B'), array('i')
+    for node_links in links:
+        for other, kind, lag in node_links:
+            idx.append(other)
+            kinds.append(LINK_TYPES.index(kind))
+            lags.append(lag)
+        ptr.append(len(idx))
+    return ptr, idx, kinds, lags
+
+
+def compile_wbs_graph(wbs_path: Union[str, Path], out_path: Union[str, Path]) -> Dict:
+    """
+    Compile a wbs.json document into the binary graph format.
+
+    Args:
+        wbs_path: Source wbs.json
+        out_path: Destination file
+
+    Returns:
+        Dict with node/edge counts, file size and source hash
+
+    Raises:
+        ValueError: If the WBS has a cycle or an unknown dependency
+    """
+    wbs_path = Path(wbs_path)
+    source_stat = wbs_path.stat()
+    raw = wbs_path.read_bytes()
+    source_hash = hashlib.sha256(raw).digest()
+    # Same de-duplication as CompiledWBS (last item with an id wins)
+    items_by_id = {item["id"]: item for item in json.loads(raw.decode("utf-8")).get("wbs_elements", [])}
+    elements = list(items_by_id.values())
+    graph = WBSGraph(elements)
+    order = graph.topological_order()
+
+    encoded = [wbs_id.encode("utf-8") for wbs_id in graph.ids]
+    id_offsets = array('q', [0])
+    for value in encoded:
+        id_offsets.append(id_offsets[-1] + len(value))
+    id_blob = b"".join(encoded)
+    id_sorted = array('i', sorted(range(len(encoded)), key=encoded.__getitem__))
+
+    item_json = [json.dumps(item, ensure_ascii=False, separators=(",", ":")).encode("utf-8") for item in elements]
+    item_offsets = array('q', [0])
+    for value in item_json:
+        item_offsets.append(item_offsets[-1] + len(value))
+    item_blob = b"".join(item_json)
+
+    pred = _csr(graph.predecessor_links)
+    succ = _csr(graph.successor_links)
+    columns = {
+        "id_offsets": id_offsets,
+        "id_blob": id_blob,
+        "id_sorted": id_sorted,
+        "topological_order": array('i', order),
+        "negotiable": array('B', (1 if item.get("is_negotiable") else 0 for item in elements)),
+        "baseline_duration": array('q', (int(item.get("baseline_duration") or 0) for item in elements)),
+        "locked_duration": array('q', (int(item.get("locked_duration") or 0) for item in elements)),
+        "baseline_cost": array('d', (float(item.get("baseline_cost") or 0) for item in elements)),
+        "locked_cost": array('d', (float(item.get("locked_cost") or 0) for item in elements)),
+        "item_offsets": item_offsets,
+        "item_blob": item_blob,
+        "pred_ptr": pred[0], "pred_idx": pred[1], "pred_type": pred[2], "pred_lag": pred[3],
+        "succ_ptr": succ[0], "succ_idx": succ[1], "succ_type": succ[2], "succ_lag": succ[3],
+    }
+
+    edges = len(pred[1])
+    flags = FLAG_GENERALIZED if graph.generalized else 0
+    with open(out_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, flags, len(graph), edges, len(id_blob), len(item_blob),
+                            source_hash, source_stat.st_size, source_stat.st_mtime_ns))
+        for name, _, _ in _section_layout(len(graph), edges, len(id_blob), len(item_blob)):
+            _write_section(f, columns[name])
+        size = f.tell()
+
+    return {"nodes": len(graph), "edges": edges, "bytes": size, "source_sha256": source_hash.hex()}
+
+
+def _write_section(f: BinaryIO, data: Union[array, bytes]):
+    if isinstance(data, array) and sys.byteorder != "little":
+        data = array(data.typecode, data)
+        data.byteswap()
+    f.write(data if isinstance(data, bytes) else data.tobytes())
+    f.write(b"\0" * (_align(f.tell()) - f.tell()))
+
+
+class _IdTable(Sequence):
+    """WBS ids decoded on access from the interned id blob."""
+
+    def __init__(self, offsets: memoryview, blob: memoryview):
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, node: int) -> str:
+        if node < 0:
+            node += len(self)
+        return bytes(self._blob[self._offsets[node]:self._offsets[node + 1]]).decode("utf-8")
+
+    def raw(self, node: int) -> bytes:
+        return bytes(self._blob[self._offsets[node]:self._offsets[node + 1]])
+
+
+class _IdIndex(Mapping):
+    """wbs_id -> ordinal by binary search over the sorted id section."""
+
+    def __init__(self, ids: _IdTable, sorted_ordinals: memoryview):
+        self._ids = ids
+        self._sorted = sorted_ordinals
+        self._keys = _SortedKeys(ids, sorted_ordinals)
+
+    def __getitem__(self, wbs_id: str) -> int:
+        key = wbs_id.encode("utf-8")
+        position = bisect_left(self._keys, key)
+        if position < len(self._sorted):
+            node = self._sorted[position]
+            if self._ids.raw(node) == key:
+                return node
+        raise KeyError(wbs_id)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._ids)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+class _SortedKeys(Sequence):
+    def __init__(self, ids: _IdTable, sorted_ordinals: memoryview):
+        self._ids = ids
+        self._sorted = sorted_ordinals
+
+    def __len__(self) -> int:
+        return len(self._sorted)
+
+    def __getitem__(self, position: int) -> bytes:
+        return self._ids.raw(self._sorted[position])
+
+
+class _Adjacency(Sequence):
+    """Neighbour ordinals of a node as a memoryview slice of a CSR section."""
+
+    def __init__(self, ptr: memoryview, idx: memoryview):
+        self._ptr = ptr
+        self._idx = idx
+
+    def __len__(self) -> int:
+        return len(self._ptr) - 1
+
+    def __getitem__(self, node: int) -> memoryview:
+        return self._idx[self._ptr[node]:self._ptr[node + 1]]
+
+
+class _Links(_Adjacency):
+    """(neighbour, link type, lag) tuples of a node, built on access."""
+
+    def __init__(self, ptr: memoryview, idx: memoryview, kinds: memoryview, lags: memoryview):
+        super().__init__(ptr, idx)
+        self._kinds = kinds
+        self._lags = lags
+
+    def __getitem__(self, node: int) -> List[Tuple[int, str, int]]:
+        idx, kinds, lags = self._idx, self._kinds, self._lags
+        return [(idx[i], LINK_TYPES[kinds[i]], lags[i]) for i in range(self._ptr[node], self._ptr[node + 1])]
+
+
+class BinaryWBSGraph:
+    """
+    Memory-mapped binary WBS graph.
+
+    Duck-types the WBSGraph attributes used by CriticalPathCalculator
+    (``ids``, ``index``, adjacency and link lists, ``generalized``,
+    ``topological_order()``), backed directly by the mapped file.
+    """
+
+    def __init__(self, path: Union[str, Path], expected_source_hash: Optional[str] = None):
+        """
+        Args:
+            path: Compiled graph file
+            expected_source_hash: SHA-256 (hex) the source wbs.json must have
+
+        Raises:
+            ValueError: If the file is not a compatible graph file, or was
+                compiled from a different wbs.json
+        """
+        if sys.byteorder != "little":
+            raise ValueError("Binary WBS graphs can only be mapped on little-endian hosts")
+
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._mmap) < HEADER.size:
+            raise ValueError(f"{self.path} is not a version {FORMAT_VERSION} binary WBS graph")
+        magic, version, flags, nodes, edges, id_bytes, item_bytes, source_hash, source_size, source_mtime_ns = (
+            HEADER.unpack_from(self._mmap, 0)
+        )
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{self.path} is not a version {FORMAT_VERSION} binary WBS graph")
+        self.source_hash = source_hash.hex()
+        # (mtime_ns, size) of wbs.json when it was compiled, as WBSCache stats it
+        self.source_stat = (source_mtime_ns, source_size)
+        if expected_source_hash is not None and expected_source_hash != self.source_hash:
+            raise ValueError(f"{self.path} was compiled from a different wbs.json; recompile it")
+        self.generalized = bool(flags & FLAG_GENERALIZED)
+
+        view = memoryview(self._mmap)
+        offset = HEADER.size
+        self.sections: Dict[str, memoryview] = {}
+        for name, fmt, count in _section_layout(nodes, edges, id_bytes, item_bytes):
+            size = struct.calcsize(fmt) * count
+            self.sections[name] = view[offset:offset + size].cast(fmt)
+            offset = _align(offset + size)
+
+        s = self.sections
+        self.ids = _IdTable(s["id_offsets"], s["id_blob"])
+        self.index = _IdIndex(self.ids, s["id_sorted"])
+        self.predecessors = _Adjacency(s["pred_ptr"], s["pred_idx"])
+        self.successors = _Adjacency(s["succ_ptr"], s["succ_idx"])
+        self.predecessor_links = _Links(s["pred_ptr"], s["pred_idx"], s["pred_type"], s["pred_lag"])
+        self.successor_links = _Links(s["succ_ptr"], s["succ_idx"], s["succ_type"], s["succ_lag"])
+        self._rank: Optional[List[int]] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __reduce__(self):
+        # The map cannot be pickled; worker processes reopen the file
+        return (BinaryWBSGraph, (str(self.path), self.source_hash))
+
+    def topological_order(self) -> memoryview:
+        """Topological order precomputed at compile time."""
+        return self.sections["topological_order"]
+
+    def topological_rank(self) -> List[int]:
+        """Position of each node in the topological order (computed once)."""
+        if self._rank is None:
+            rank = [0] * len(self)
+            for position, node in enumerate(self.topological_order()):
+                rank[node] = position
+            self._rank = rank
+        return self._rank
+
+    def item_data(self, node: int) -> Dict:
+        """The item's wbs_elements entry, parsed from its JSON on every call."""
+        offsets = self.sections["item_offsets"]
+        return json.loads(bytes(self.sections["item_blob"][offsets[node]:offsets[node + 1]]).decode("utf-8"))
+
+    def items(self) -> "BinaryWBSItems":
+        """Read-only wbs_id -> item mapping (e.g. for CriticalPathCalculator)."""
+        return BinaryWBSItems(self)
+
+    def elements(self) -> "BinaryWBSElements":
+        """Read-only sequence of the items in node order (like wbs_elements)."""
+        return BinaryWBSElements(self)
+
+
+# Item fields served from the mapped columns: field -> (section, type)
+_COLUMN_FIELDS = {
+    "is_negotiable": ("negotiable", bool),
+    "baseline_duration": ("baseline_duration", int),
+    "locked_duration": ("locked_duration", int),
+    "baseline_cost": ("baseline_cost", float),
+    "locked_cost": ("locked_cost", float),
+}
+
+
+class BinaryWBSItem(Mapping):
+    """
+    One WBS item of a mapped graph.
+
+    ``id`` and the CPM fields in _COLUMN_FIELDS are read from the mapped
+    columns (missing values read as 0 / False). Any other field parses the
+    item's JSON once, on first access.
+    """
+
+    __slots__ = ("_graph", "_node", "_data")
+
+    def __init__(self, graph: BinaryWBSGraph, node: int):
+        self._graph = graph
+        self._node = node
+        self._data: Optional[Dict] = None
+
+    def _json(self) -> Dict:
+        if self._data is None:
+            self._data = self._graph.item_data(self._node)
+        return self._data
+
+    def __getitem__(self, field: str) -> Any:
+        if field == "id":
+            return self._graph.ids[self._node]
+        column = _COLUMN_FIELDS.get(field)
+        if column is not None:
+            return column[1](self._graph.sections[column[0]][self._node])
+        return self._json()[field]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._json())
+
+    def __len__(self) -> int:
+        return len(self._json())
+
+
+class BinaryWBSItems(Mapping):
+    """wbs_id -> BinaryWBSItem for a mapped graph."""
+
+    def __init__(self, graph: BinaryWBSGraph):
+        self.graph = graph
+
+    def __getitem__(self, wbs_id: str) -> BinaryWBSItem:
+        return BinaryWBSItem(self.graph, self.graph.index[wbs_id])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.graph.ids)
+
+    def __len__(self) -> int:
+        return len(self.graph)
+
+
+class BinaryWBSElements(Sequence):
+    """BinaryWBSItem per node ordinal, in wbs_elements order."""
+
+    def __init__(self, graph: BinaryWBSGraph):
+        self.graph = graph
+
+    def __getitem__(self, node: int) -> BinaryWBSItem:
+        if node < 0:
+            node += len(self)
+        if not 0 <= node < len(self):
+            raise IndexError(node)
+        return BinaryWBSItem(self.graph, node)
+
+    def __len__(self) -> int:
+        return len(self.graph)
+
+
+def calculate_critical_path_binary(graph: BinaryWBSGraph, commitments: List[Dict],
+                                   start_date: str = "2025-01-15",
+                                   deadline: str = "2026-05-15",
+                                   calendar: Optional["WorkingCalendar"] = None) -> Dict:
+    """
+    calculate_critical_path() on a memory-mapped binary graph.
+
+    Args:
+        graph: Mapped binary graph
+        commitments: List of commitment records (wbs_item_id, duration)
+        start_date: Project start date
+        deadline: Project deadline
+        calendar: Working-day calendar (durations then count working days)
+
+    Returns:
+        Dict with timeline data, critical path, and validation results
+    """
+    calculator = CriticalPathCalculator(graph.items(), start_date, graph, calendar)
+    return calculator.calculate({c['wbs_item_id']: c for c in commitments}, deadline)
@@ -0,0 +1,354 @@
+"""
+Hierarchical roll-up of WBS items.
+
+WBS ids encode the hierarchy (``1.3.1`` is a child of ``1.3``, which is a
+child of ``1``). A WBSTree is built once per compiled graph from the ids,
+and a WBSRollup keeps per-node subtree aggregates (total and committed
+cost, min ES, max EF, critical items) that are updated along the changed
+items' ancestor paths when a commitment changes, instead of being
+recomputed from the full item list.
+"""
+
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from services.critical_path_service import CriticalPathCalculator, WBSGraph
+from services.wbs_service import CompiledWBS
+
+
+DEFAULT_MAX_SESSIONS = 256
+
+
+def _id_sort_key(wbs_id: str) -> Tuple:
+    """Natural order for dotted ids (1.2 < 1.10)."""
+    return tuple((0, int(part), "") if part.isdigit() else (1, 0, part) for part in wbs_id.split("."))
+
+
+def _commitment_values(commitments: List[Dict]) -> Dict[str, Tuple[int, float]]:
+    """wbs_id -> (duration, cost); records with neither are not commitments."""
+    values = {}
+    for c in commitments:
+        duration, cost = int(c.get('duration') or 0), float(c.get('cost') or 0)
+        if duration or cost:
+            values[c['wbs_item_id']] = (duration, cost)
+        else:
+            values.pop(c['wbs_item_id'], None)
+    return values
+
+
+class WBSTree:
+    """
+    Tree index over the dotted ids of a WBSGraph.
+
+    Tree nodes are addressed by ordinal. Every id prefix becomes a node, so
+    summary levels missing from wbs.json (``1``, ``1.3``) are synthesized.
+    ``item[t]`` is the graph ordinal of the WBS item at tree node t (None
+    for synthesized nodes) and ``node_of_item`` is the inverse mapping.
+    """
+
+    def __init__(self, graph: WBSGraph):
+        self.ids: List[str] = []
+        self.parent: List[int] = []
+        self.children: List[List[int]] = []
+        self.depth: List[int] = []
+        self.item: List[Optional[int]] = []
+        self.node_of_item: List[int] = [0] * len(graph)
+
+        index: Dict[str, int] = {}
+        for ordinal, wbs_id in enumerate(graph.ids):
+            parts = wbs_id.split(".")
+            parent = -1
+            for depth in range(1, len(parts) + 1):
+                prefix = ".".join(parts[:depth])
+                node = index.get(prefix)
+                if node is None:
+                    node = index[prefix] = len(self.ids)
+                    self.ids.append(prefix)
+                    self.parent.append(parent)
+                    self.children.append([])
+                    self.depth.append(depth)
+                    self.item.append(None)
+                    if parent >= 0:
+                        self.children[parent].append(node)
+                parent = node
+            self.item[parent] = ordinal
+            self.node_of_item[ordinal] = parent
+
+        for children in self.children:
+            children.sort(key=lambda node: _id_sort_key(self.ids[node]))
+
+        self.roots: List[int] = sorted(
+            (node for node, parent in enumerate(self.parent) if parent < 0),
+            key=lambda node: _id_sort_key(self.ids[node]),
+        )
+        # Nodes per level in natural id order, and all nodes deepest first
+        self.levels: Dict[int, List[int]] = {}
+        for node in sorted(range(len(self.ids)), key=lambda node: _id_sort_key(self.ids[node])):
+            self.levels.setdefault(self.depth[node], []).append(node)
+        self.bottom_up: List[int] = sorted(range(len(self.ids)), key=self.depth.__getitem__, reverse=True)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+_trees: "weakref.WeakKeyDictionary[WBSGraph, WBSTree]" = weakref.WeakKeyDictionary()
+
+
+def get_wbs_tree(graph: WBSGraph) -> WBSTree:
+    """
+    Get the (cached) tree index for a compiled graph.
+
+    Args:
+        graph: Compiled WBS graph
+
+    Returns:
+        WBSTree for the graph
+    """
+    tree = _trees.get(graph)
+    if tree is None:
+        tree = WBSTree(graph)
+        _trees[graph] = tree
+    return tree
+
+
+class WBSRollup:
+    """
+    Subtree aggregates over a WBSTree for one set of commitments.
+
+    Holds its own CriticalPathCalculator, so a changed commitment is applied
+    with update_duration() and only the items whose schedule moved (and their
+    ancestors) are re-aggregated.
+    """
+
+    def __init__(self, wbs_items: List[Dict], commitments: List[Dict],
+                 start_date: str = "2025-01-15",
+                 deadline: str = "2026-05-15",
+                 graph: Optional[WBSGraph] = None):
+        """
+        Args:
+            wbs_items: List of WBS items from wbs.json
+            commitments: Commitment records (wbs_item_id, duration, cost)
+            start_date: Project start date
+            deadline: Project deadline
+            graph: Precompiled graph for wbs_items
+        """
+        self.calculator = CriticalPathCalculator(wbs_items, start_date, graph)
+        self.tree = get_wbs_tree(self.calculator.graph)
+        self.deadline = deadline
+        self.commitments = _commitment_values(commitments)
+        self.calculator.calculate(
+            {wbs_id: {"duration": duration} for wbs_id, (duration, _) in self.commitments.items()},
+            deadline,
+        )
+
+        size = len(self.tree)
+        self.total_cost = [0.0] * size
+        self.committed_cost = [0.0] * size
+        self.min_es: List[Optional[int]] = [None] * size
+        self.max_ef: List[Optional[int]] = [None] * size
+        self.critical_items = [0] * size
+        self.item_count = [0] * size
+
+        for node in self.tree.bottom_up:
+            self._aggregate(node)
+
+    def _item_cost(self, ordinal: int) -> Tuple[float, float]:
+        """(current cost, committed cost) of an item; a falsy committed cost falls back."""
+        wbs_id = self.calculator.graph.ids[ordinal]
+        committed = self.commitments.get(wbs_id, (0, 0.0))[1]
+        if committed:
+            return committed, committed
+        item = self.calculator.wbs_items[wbs_id]
+        if item.get('is_negotiable'):
+            return float(item.get('baseline_cost') or 0), 0.0
+        return float(item.get('locked_cost') or 0), 0.0
+
+    def _aggregate(self, node: int):
+        """Recompute a node's aggregates from its own item and its children."""
+        total = committed = 0.0
+        min_es = max_ef = None
+        critical = count = 0
+
+        ordinal = self.tree.item[node]
+        if ordinal is not None:
+            calculator = self.calculator
+            total, committed = self._item_cost(ordinal)
+            min_es, max_ef = calculator.es[ordinal], calculator.ef[ordinal]
+            critical = 1 if calculator.ls[ordinal] == calculator.es[ordinal] else 0
+            count = 1
+
+        for child in self.tree.children[node]:
+            if not self.item_count[child]:
+                continue
+            total += self.total_cost[child]
+            committed += self.committed_cost[child]
+            critical += self.critical_items[child]
+            count += self.item_count[child]
+            if min_es is None or self.min_es[child] < min_es:
+                min_es = self.min_es[child]
+            if max_ef is None or self.max_ef[child] > max_ef:
+                max_ef = self.max_ef[child]
+
+        self.total_cost[node] = total
+        self.committed_cost[node] = committed
+        self.min_es[node] = min_es
+        self.max_ef[node] = max_ef
+        self.critical_items[node] = critical
+        self.item_count[node] = count
+
+    def set_commitment(self, wbs_id: str, duration: Optional[int], cost: Optional[float]) -> List[str]:
+        """
+        Apply a new (or removed: falsy values) commitment incrementally.
+
+        Args:
+            wbs_id: Committed WBS item
+            duration: Committed duration (falsy = baseline/locked duration)
+            cost: Committed cost (falsy = baseline/locked cost)
+
+        Returns:
+            Tree node ids whose aggregates were recomputed
+        """
+        if wbs_id not in self.calculator.graph.index:
+            raise ValueError(f"Unknown WBS id: {wbs_id}")
+        if duration or cost:
+            self.commitments[wbs_id] = (int(duration or 0), float(cost or 0))
+        else:
+            self.commitments.pop(wbs_id, None)
+
+        index = self.calculator.graph.index
+        changed_items = self.calculator.update_duration(wbs_id, int(duration or 0))
+        dirty = {self.tree.node_of_item[index[item_id]] for item_id in changed_items}
+        dirty.add(self.tree.node_of_item[index[wbs_id]])
+
+        # Walk up level by level, so every parent is recomputed once, after its children
+        depth, parent = self.tree.depth, self.tree.parent
+        recomputed = []
+        while dirty:
+            deepest = max(depth[node] for node in dirty)
+            level = [node for node in dirty if depth[node] == deepest]
+            for node in level:
+                dirty.discard(node)
+                self._aggregate(node)
+                recomputed.append(node)
+                if parent[node] >= 0:
+                    dirty.add(parent[node])
+        return [self.tree.ids[node] for node in recomputed]
+
+    def node_summary(self, node: int) -> Dict:
+        """Aggregates of one tree node in API form."""
+        tree, calculator = self.tree, self.calculator
+        ordinal = tree.item[node]
+        min_es, max_ef = self.min_es[node], self.max_ef[node]
+        return {
+            "id": tree.ids[node],
+            "name": calculator.wbs_items[calculator.graph.ids[ordinal]].get("name") if ordinal is not None else None,
+            "level": tree.depth[node],
+            "parent_id": tree.ids[tree.parent[node]] if tree.parent[node] >= 0 else None,
+            "item_count": self.item_count[node],
+            "total_cost": self.total_cost[node],
+            "committed_cost": self.committed_cost[node],
+            "earliest_start": calculator.to_iso(min_es) if min_es is not None else None,
+            "earliest_finish": calculator.to_iso(max_ef) if max_ef is not None else None,
+            "critical": self.critical_items[node] > 0,
+            "critical_items": self.critical_items[node],
+        }
+
+    def rollup(self, level: Optional[int] = None) -> Dict[int, List[Dict]]:
+        """
+        Aggregates grouped by level (1 = top), in natural id order.
+
+        Args:
+            level: Only this level (all levels if omitted)
+
+        Returns:
+            Dict mapping level to node summaries
+        """
+        levels = self.tree.levels
+        selected = [level] if level is not None else sorted(levels)
+        return {
+            depth: [self.node_summary(node) for node in levels.get(depth, [])]
+            for depth in selected
+        }
+
+
+class RollupCache:
+    """
+    Per-session WBSRollup instances (LRU).
+
+    A request diffs the session's commitments against the cached rollup and
+    applies only the changed ones; a different WBS version, start date or
+    deadline rebuilds the rollup. The cache lock only guards the LRU, so
+    roll-ups of different sessions are computed concurrently.
+    """
+
+    def __init__(self, max_sessions: int = DEFAULT_MAX_SESSIONS):
+        self.max_sessions = max_sessions
+        # session_id -> (WBS version, start date, deadline), rollup, lock of the rollup
+        self._entries: "OrderedDict[str, Tuple[Tuple, WBSRollup, threading.Lock]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def rollup(self, session_id: str, wbs: CompiledWBS, commitments: List[Dict],
+               start_date: str = "2025-01-15",
+               deadline: str = "2026-05-15",
+               level: Optional[int] = None) -> Dict[int, List[Dict]]:
+        """
+        Roll-up for a session's current commitments.
+
+        Args:
+            session_id: Game session id
+            wbs: CompiledWBS from the WBS cache
+            commitments: Commitment records (wbs_item_id, duration, cost)
+            start_date: Project start date
+            deadline: Project deadline
+            level: Only this level (all levels if omitted)
+
+        Returns:
+            Dict mapping level to node summaries
+        """
+        key = (wbs.version, start_date, deadline)
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None and entry[0] == key:
+                self._entries.move_to_end(session_id)
+
+        if entry is None or entry[0] != key:
+            # Built outside the lock; racing builds for one session only duplicate work
+            entry = (key, WBSRollup(wbs.elements, commitments, start_date, deadline, wbs.graph), threading.Lock())
+            with self._lock:
+                self._entries[session_id] = entry
+                self._entries.move_to_end(session_id)
+                while len(self._entries) > self.max_sessions:
+                    self._entries.popitem(last=False)
+
+        # Rollups are updated in place: one request per session at a time
+        _, rollup, rollup_lock = entry
+        with rollup_lock:
+            current = _commitment_values(commitments)
+            for wbs_id in set(rollup.commitments) | set(current):
+                if rollup.commitments.get(wbs_id) != current.get(wbs_id):
+                    rollup.set_commitment(wbs_id, *current.get(wbs_id, (0, 0.0)))
+            return rollup.rollup(level)
+
+    def clear(self):
+        """Drop all cached rollups."""
+        with self._lock:
+            self._entries.clear()
+
+
+# Global cache instance
+_rollup_cache: Optional[RollupCache] = None
+
+
+def get_rollup_cache() -> RollupCache:
+    """
+    Get or create the global roll-up cache instance.
+
+    Returns:
+        RollupCache instance
+    """
+    global _rollup_cache
+    if _rollup_cache is None:
+        _rollup_cache = RollupCache()
+    return _rollup_cache
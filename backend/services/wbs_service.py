@@ -0,0 +1,222 @@
+"""
+WBS data service.
+
+Loads backend/data/wbs.json once per process together with its compiled
+dependency graph, and reloads automatically when the file changes. If a
+binary graph compiled from the same wbs.json (compile_wbs_graph.py) is
+configured, it is memory-mapped instead: wbs.json is then not parsed, and
+only read (to check its hash) if its size or mtime differ from those
+recorded in the graph file.
+"""
+
+import hashlib
+import json
+import threading
+from collections.abc import Mapping, Sequence
+from datetime import datetime
+from functools import cached_property
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+from services.critical_path_service import WBSGraph, calculate_critical_path
+from services.wbs_binary_graph import BinaryWBSGraph
+
+
+# Default location: backend/data/wbs.json
+WBS_JSON_PATH = Path(__file__).parent.parent / "data" / "wbs.json"
+
+# Project calendar used for the baseline timeline
+PROJECT_START_DATE = "2025-01-15"
+PROJECT_DEADLINE = "2026-05-15"
+
+
+def build_baseline_timeline(elements: Sequence[Mapping], graph: Union[WBSGraph, BinaryWBSGraph],
+                            start_date: str = PROJECT_START_DATE,
+                            deadline: str = PROJECT_DEADLINE) -> Dict:
+    """
+    Timeline before any negotiation: locked items at their locked durations.
+
+    Args:
+        elements: WBS elements from wbs.json
+        graph: Compiled graph for elements
+        start_date: Project start date
+        deadline: Project deadline
+
+    Returns:
+        Dict with the CPM ``timeline``, ``project_end_date`` and
+        ``days_before_deadline``
+    """
+    locked_commitments = [
+        {
+            "wbs_item_id": item["id"],
+            "duration": item.get("locked_duration", 0),
+            "cost": item.get("locked_cost", 0),
+        }
+        for item in elements
+        if not item.get("is_negotiable", False)
+    ]
+
+    timeline = calculate_critical_path(
+        wbs_items=elements,
+        commitments=locked_commitments,
+        start_date=start_date,
+        deadline=deadline,
+        graph=graph,
+    )
+
+    project_end_date = timeline["projected_completion_date"]
+    days_before_deadline = (
+        datetime.strptime(deadline, "%Y-%m-%d") - datetime.strptime(project_end_date, "%Y-%m-%d")
+    ).days
+
+    return {
+        "timeline": timeline,
+        "project_end_date": project_end_date,
+        "days_before_deadline": days_before_deadline,
+    }
+
+
+class CompiledWBS:
+    """
+    Parsed wbs.json (or a mapped binary graph) plus the dependency graph,
+    topological order and baseline timeline.
+
+    Instances are shared between requests and must be treated as read-only.
+    """
+
+    def __init__(self, data: Optional[Dict], content_hash: str,
+                 graph: Optional[BinaryWBSGraph] = None):
+        """
+        Compile the graph for the parsed WBS document.
+
+        Args:
+            data: Parsed wbs.json document (None when ``graph`` is given)
+            content_hash: SHA-256 of the file contents (used as WBS version)
+            graph: Mapped binary graph compiled from the same document; the
+                items are then served from it instead of ``data``
+        """
+        self.data = data
+        self.version = content_hash
+        self.graph: Union[WBSGraph, BinaryWBSGraph]
+        if graph is not None:
+            self.elements: Sequence[Mapping] = graph.elements()
+            self.items_by_id: Mapping[str, Mapping] = graph.items()
+            self.graph = graph
+        else:
+            self.items_by_id = {item["id"]: item for item in data.get("wbs_elements", [])}
+            self.elements = data.get("wbs_elements", [])
+            self.graph = WBSGraph(list(self.items_by_id.values()))
+            # Compute the order up front, once per WBS version (precomputed
+            # in binary graphs); a cyclic WBS is reported when CPM runs
+            try:
+                self.graph.topological_order()
+            except ValueError:
+                pass
+
+    @cached_property
+    def baseline(self) -> Optional[Dict]:
+        """Baseline timeline, computed on first use (None for a cyclic WBS)."""
+        try:
+            return build_baseline_timeline(self.elements, self.graph)
+        except ValueError:
+            return None
+
+
+class WBSCache:
+    """
+    Process-level cache of the compiled WBS keyed by file mtime and content hash.
+
+    Every lookup is a single ``stat``. The file is only re-read when its
+    mtime/size changes, and only recompiled when the content hash changes.
+    With ``graph_path`` set, the binary graph is used instead, provided it was
+    compiled from the current wbs.json: if the stat matches the one recorded
+    at compile time the recorded hash is trusted, otherwise wbs.json is read
+    and hashed (but still not parsed if the hash matches).
+    """
+
+    def __init__(self, path: Path = WBS_JSON_PATH, graph_path: Optional[Path] = None):
+        self.path = path
+        self.graph_path = graph_path
+        self._lock = threading.Lock()
+        self._stat_key: Optional[Tuple[int, int]] = None
+        self._compiled: Optional[CompiledWBS] = None
+
+    def get(self) -> CompiledWBS:
+        """
+        Return the compiled WBS, reloading it if wbs.json has changed.
+
+        Raises:
+            FileNotFoundError: If wbs.json does not exist
+        """
+        stat = self.path.stat()
+        stat_key = (stat.st_mtime_ns, stat.st_size)
+        compiled = self._compiled
+        if compiled is not None and self._stat_key == stat_key:
+            return compiled
+
+        with self._lock:
+            if self._compiled is not None and self._stat_key == stat_key:
+                return self._compiled
+
+            raw = None
+            graph = self._mapped_graph()
+            if graph is not None and graph.source_stat == stat_key:
+                content_hash = graph.source_hash
+            else:
+                raw = self.path.read_bytes()
+                content_hash = hashlib.sha256(raw).hexdigest()
+                if graph is not None and graph.source_hash != content_hash:
+                    print(f"Warning: {self.graph_path} was compiled from a different wbs.json; "
+                          f"parsing wbs.json instead (recompile it)")
+                    graph = None
+
+            if self._compiled is None or self._compiled.version != content_hash:
+                if graph is not None:
+                    self._compiled = CompiledWBS(None, content_hash, graph)
+                else:
+                    self._compiled = CompiledWBS(json.loads(raw.decode("utf-8")), content_hash)
+            self._stat_key = stat_key
+            return self._compiled
+
+    def _mapped_graph(self) -> Optional[BinaryWBSGraph]:
+        """The configured binary graph, or None (not configured or unreadable)."""
+        if self.graph_path is None:
+            return None
+        try:
+            return BinaryWBSGraph(self.graph_path)
+        except (OSError, ValueError) as e:
+            print(f"Warning: Not using binary WBS graph, parsing wbs.json instead: {e}")
+            return None
+
+    def clear(self):
+        """Drop the cached WBS so the next lookup reloads it."""
+        with self._lock:
+            self._stat_key = None
+            self._compiled = None
+
+
+# Global cache instance
+_wbs_cache: Optional[WBSCache] = None
+
+
+def get_wbs_cache() -> WBSCache:
+    """
+    Get or create the global WBS cache instance.
+
+    Returns:
+        WBSCache instance
+    """
+    global _wbs_cache
+    if _wbs_cache is None:
+        _wbs_cache = WBSCache()
+    return _wbs_cache
+
+
+def get_compiled_wbs() -> CompiledWBS:
+    """
+    Get the current compiled WBS from the global cache.
+
+    Returns:
+        CompiledWBS for the current contents of wbs.json
+    """
+    return get_wbs_cache().get()
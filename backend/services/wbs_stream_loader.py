@@ -0,0 +1,140 @@
+"""
+Streaming loader for large WBS exports.
+
+Parses ``wbs_elements`` item by item with ijson (the same streaming parser
+the .logging tools use) and keeps only what scheduling needs — ids,
+duration fields and dependency links — in compact columnar arrays. Peak
+memory is proportional to the graph, not to the JSON text, and CPM runs
+directly on the columns.
+"""
+
+from array import array
+from collections.abc import Mapping
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Union
+
+import ijson
+
+from services.critical_path_service import LINK_TYPES, CriticalPathCalculator, WBSGraph, parse_dependency
+
+if TYPE_CHECKING:
+    from services.calendar_service import WorkingCalendar
+
+
+class ColumnarWBS:
+    """
+    Scheduling columns of a WBS, indexed by node ordinal.
+
+    - ``ids``: WBS ids
+    - ``negotiable``: 1 if the item is negotiable
+    - ``baseline_duration`` / ``locked_duration``: durations in days
+    - ``link_node`` / ``link_dep`` / ``link_type`` / ``link_lag``: one entry per
+      dependency (successor ordinal, predecessor id, index into LINK_TYPES, lag)
+    """
+
+    def __init__(self):
+        self.ids: List[str] = []
+        self.negotiable = bytearray()
+        self.baseline_duration = array('l')
+        self.locked_duration = array('l')
+        self.link_node = array('l')
+        self.link_dep: List[str] = []
+        self.link_type = bytearray()
+        self.link_lag = array('l')
+        self._graph: Optional[WBSGraph] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def append(self, item: Dict):
+        """Add one parsed WBS item (only its scheduling fields are kept)."""
+        node = len(self.ids)
+        self.ids.append(item['id'])
+        self.negotiable.append(1 if item.get('is_negotiable') else 0)
+        self.baseline_duration.append(int(item.get('baseline_duration') or 0))
+        self.locked_duration.append(int(item.get('locked_duration') or 0))
+        for dep in item.get('dependencies') or []:
+            dep_id, kind, lag = parse_dependency(dep)
+            self.link_node.append(node)
+            self.link_dep.append(dep_id)
+            self.link_type.append(LINK_TYPES.index(kind))
+            self.link_lag.append(lag)
+
+    @property
+    def graph(self) -> WBSGraph:
+        """Dependency graph built from the link columns (once)."""
+        if self._graph is None:
+            links = zip(self.link_node, self.link_dep, (LINK_TYPES[t] for t in self.link_type), self.link_lag)
+            self._graph = WBSGraph.from_links(self.ids, links)
+        return self._graph
+
+    def items(self) -> "ColumnarItems":
+        """Read-only wbs_id -> item mapping for CriticalPathCalculator."""
+        return ColumnarItems(self)
+
+
+class ColumnarItems(Mapping):
+    """
+    Mapping view over ColumnarWBS that builds small item dicts on access.
+
+    Exposes the fields CriticalPathCalculator.get_duration() reads, so the
+    calculator can run without the full item dicts.
+    """
+
+    def __init__(self, columns: ColumnarWBS):
+        self.columns = columns
+
+    def __getitem__(self, wbs_id: str) -> Dict:
+        columns = self.columns
+        node = columns.graph.index[wbs_id]
+        return {
+            "id": wbs_id,
+            "is_negotiable": bool(columns.negotiable[node]),
+            "baseline_duration": columns.baseline_duration[node],
+            "locked_duration": columns.locked_duration[node],
+        }
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.columns.ids)
+
+    def __len__(self) -> int:
+        return len(self.columns)
+
+
+def load_wbs_columns(path: Union[str, Path]) -> ColumnarWBS:
+    """
+    Stream ``wbs_elements`` of a WBS document into columns.
+
+    Args:
+        path: Path to a wbs.json-shaped document
+
+    Returns:
+        ColumnarWBS with one entry per WBS element
+    """
+    columns = ColumnarWBS()
+    with open(path, "rb") as f:
+        for item in ijson.items(f, "wbs_elements.item"):
+            columns.append(item)
+    return columns
+
+
+def calculate_critical_path_streaming(path: Union[str, Path], commitments: List[Dict],
+                                      start_date: str = "2025-01-15",
+                                      deadline: str = "2026-05-15",
+                                      calendar: Optional["WorkingCalendar"] = None) -> Dict:
+    """
+    calculate_critical_path() for a WBS file too large to load as a document.
+
+    Args:
+        path: Path to a wbs.json-shaped document
+        commitments: List of commitment records (wbs_item_id, duration)
+        start_date: Project start date
+        deadline: Project deadline
+        calendar: Working-day calendar (durations then count working days)
+
+    Returns:
+        Dict with timeline data, critical path, and validation results
+    """
+    columns = load_wbs_columns(path)
+    calculator = CriticalPathCalculator(columns.items(), start_date, columns.graph, calendar)
+    return calculator.calculate({c['wbs_item_id']: c for c in commitments}, deadline)
@@ -0,0 +1,68 @@
+"""
+Binary WBS Graph Test - Mapped graph in worker processes
+Compiles data/wbs.json to a temporary graph file, checks the mapped items
+against wbs.json and runs the risk simulation on the mapped graph with more
+than one worker
+"""
+
+import pickle
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from services.risk_simulation_service import _duration_bounds, _simulate_chunk, simulate_schedule_risk
+from services.critical_path_service import CriticalPathCalculator
+from services.wbs_binary_graph import BinaryWBSGraph, compile_wbs_graph
+from services.wbs_service import WBSCache, WBS_JSON_PATH
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Testing Binary WBS Graph in Worker Processes")
+    print("=" * 60)
+    print()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        graph_path = Path(tmp) / "wbs.graph.bin"
+        compile_wbs_graph(WBS_JSON_PATH, graph_path)
+        wbs = WBSCache(WBS_JSON_PATH, graph_path).get()
+        assert isinstance(wbs.graph, BinaryWBSGraph) and wbs.data is None
+        print(f"[OK] Mapped {graph_path.name} ({len(wbs.graph)} items) without parsing wbs.json")
+
+        # Items and CPM results match the parsed wbs.json
+        parsed = WBSCache(WBS_JSON_PATH).get()
+        for item in parsed.elements:
+            mapped = wbs.items_by_id[item["id"]]
+            assert mapped["name"] == item.get("name") and mapped["dependencies"] == item.get("dependencies")
+            assert mapped["is_negotiable"] == bool(item.get("is_negotiable"))
+            assert mapped["baseline_duration"] == (item.get("baseline_duration") or 0)
+        assert wbs.baseline == parsed.baseline
+        print("[OK] Items and baseline timeline match wbs.json")
+
+        # The graph is sent to workers by path and reopened there
+        copy = pickle.loads(pickle.dumps(wbs.graph))
+        assert list(copy.ids) == list(wbs.graph.ids) and copy.source_hash == wbs.graph.source_hash
+        print("[OK] Pickled graph reopens the file")
+
+        # What the process pool does with each chunk, independent of the CPU count
+        calculator = CriticalPathCalculator(wbs.elements, "2025-01-15", wbs.graph)
+        calculator.load_durations({})
+        low, mode, high = _duration_bounds(calculator)
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            seeds = np.random.SeedSequence(7).spawn(2)
+            chunks = [pool.submit(_simulate_chunk, wbs.graph, low, mode, high, 200, "pert", seed) for seed in seeds]
+            completions = [future.result()[0] for future in chunks]
+        assert all(len(c) == 200 for c in completions)
+        print("[OK] Chunks simulated in worker processes")
+
+        result = simulate_schedule_risk(
+            wbs.elements, [], iterations=2000, time_budget_s=None, workers=2, seed=7, graph=wbs.graph
+        )
+        assert result["iterations_run"] == 2000
+        print(f"[OK] simulate_schedule_risk(workers=2): P80 {result['p80_completion_date']}")
+
+    print()
+    print("=" * 60)
+    print("All binary graph checks passed")
+    print("=" * 60)
@@ -0,0 +1,122 @@
+"""
+Prompt Cache Test - Context caching refresh logic
+Runs PromptCacheManager against a local in-memory fake provider (no API calls)
+"""
+
+import asyncio
+import time
+from typing import Any, Callable, Dict, Tuple
+
+from services.prompt_cache import PromptCacheManager
+
+
+class FakeCacheProvider:
+    """
+    In-memory provider for exercising PromptCacheManager without the API.
+
+    Handles expire according to ``clock``; refreshing an expired or deleted
+    handle raises KeyError like the real API raises NotFound. Set
+    ``fail_create`` to simulate the provider refusing to cache.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self.clock = clock
+        self.handles: Dict[str, Tuple[str, float]] = {}
+        self.created = 0
+        self.refreshed = 0
+        self.deleted = 0
+        self.fail_create = False
+
+    def create(self, model_name: str, system_instruction: str, ttl_seconds: int) -> Tuple[str, float]:
+        if self.fail_create:
+            raise RuntimeError("Cached content is too small")
+        self.created += 1
+        name = f"cachedContents/fake-{self.created}"
+        self.handles[name] = (system_instruction, self.clock() + ttl_seconds)
+        return name, self.handles[name][1]
+
+    def refresh(self, name: str, ttl_seconds: int) -> float:
+        instruction, expire_at = self.handles[name]
+        if expire_at <= self.clock():
+            del self.handles[name]
+            raise KeyError(name)
+        self.refreshed += 1
+        self.handles[name] = (instruction, self.clock() + ttl_seconds)
+        return self.handles[name][1]
+
+    def model(self, name: str) -> Any:
+        return name
+
+    def delete(self, name: str):
+        self.deleted += 1
+        self.handles.pop(name, None)
+
+
+print("=" * 60)
+print("Testing Prompt Cache Refresh Logic")
+print("=" * 60)
+print()
+
+now = [1_000_000.0]
+provider = FakeCacheProvider(clock=lambda: now[0])
+manager = PromptCacheManager(
+    provider,
+    model_name="models/gemini-2.5-flash",
+    ttl_seconds=3600,
+    refresh_margin_seconds=300,
+    retry_seconds=600,
+    clock=lambda: now[0],
+)
+instruction = "Du er Anne-Lise Berg ..."
+
+
+async def main():
+    # First turn creates the handle
+    first = await manager.get_model("anne-lise-berg", instruction)
+    assert provider.created == 1 and first is not None
+    print(f"[OK] Created {first}")
+
+    # Turns well within the TTL reuse it without provider calls
+    now[0] += 1800
+    assert await manager.get_model("anne-lise-berg", instruction) == first
+    assert (provider.created, provider.refreshed) == (1, 0)
+    print("[OK] Reused while fresh")
+
+    # Inside the refresh margin the TTL is extended, same handle
+    now[0] += 1700
+    assert await manager.get_model("anne-lise-berg", instruction) == first
+    assert (provider.created, provider.refreshed) == (1, 1)
+    print("[OK] Refreshed before expiry")
+
+    # After the handle expired it is recreated
+    now[0] += 3700
+    second = await manager.get_model("anne-lise-berg", instruction)
+    assert second != first and provider.created == 2
+    print(f"[OK] Recreated after expiry: {second}")
+
+    # A changed instruction (prompt file or WBS updated) replaces the handle
+    third = await manager.get_model("anne-lise-berg", instruction + " (oppdatert)")
+    assert third != second and provider.created == 3 and provider.deleted == 1
+    print(f"[OK] Replaced on changed instruction: {third}")
+
+    # Concurrent turns for one agent create a single handle
+    models = await asyncio.gather(*(manager.get_model("per-johansen", instruction) for _ in range(10)))
+    assert len(set(models)) == 1 and provider.created == 4
+    print("[OK] One handle for concurrent turns")
+
+    # Provider refusing to cache: prompt goes inline, no retry until back-off ends
+    provider.fail_create = True
+    assert await manager.get_model("kari-andersen", instruction) is None
+    provider.fail_create = False
+    assert await manager.get_model("kari-andersen", instruction) is None
+    now[0] += 601
+    assert await manager.get_model("kari-andersen", instruction) is not None
+    print("[OK] Inline fallback with back-off")
+
+
+asyncio.run(main())
+
+print()
+print("=" * 60)
+print("All prompt cache checks passed")
+print("=" * 60)
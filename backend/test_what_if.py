@@ -0,0 +1,48 @@
+"""
+What-If Test - Batch scenarios against single CPM runs
+Every scenario evaluated by evaluate_what_if must give the same result as
+calculate_critical_path with the overrides applied as commitments
+"""
+
+from services.critical_path_service import calculate_critical_path
+from services.scenario_service import evaluate_what_if
+from services.wbs_service import get_compiled_wbs
+
+print("=" * 60)
+print("Testing Batch What-If Against calculate_critical_path")
+print("=" * 60)
+print()
+
+wbs = get_compiled_wbs()
+commitments = [
+    {"wbs_item_id": "1.3.1", "duration": 40},
+    {"wbs_item_id": "1.3.2", "duration": 120},
+]
+scenarios = [
+    {},
+    {"1.3.2": 0},                  # 0 = baseline duration, not zero days
+    {"1.3.1": 0, "1.4.1": 0},
+    {"1.4.1": 60},
+    {"1.3.2": 10, "1.4.1": 300},
+]
+
+results = evaluate_what_if(wbs.elements, commitments, scenarios, graph=wbs.graph)
+
+for overrides, result in zip(scenarios, results):
+    merged = {c["wbs_item_id"]: c["duration"] for c in commitments}
+    merged.update(overrides)
+    expected = calculate_critical_path(
+        wbs.elements,
+        [{"wbs_item_id": wbs_id, "duration": duration} for wbs_id, duration in merged.items()],
+        graph=wbs.graph,
+    )
+    assert result["projected_completion_date"] == expected["projected_completion_date"], (overrides, result, expected)
+    assert result["slack"] == expected["slack"], overrides
+    assert result["critical_path"] == expected["critical_path"], overrides
+    assert result["meets_deadline"] == expected["meets_deadline"], overrides
+    print(f"[OK] {overrides or 'no overrides'}: {result['projected_completion_date']}")
+
+print()
+print("=" * 60)
+print("All what-if checks passed")
+print("=" * 60)
@@ -0,0 +1,97 @@
+-- =====================================================
+-- MIGRATION 006: Timeline Diff on Snapshots
+-- Created: 2026-10-18
+-- Purpose: Store a compact CPM diff against the previous timeline with each
+--          contract snapshot, so the history view can fetch kilobytes per
+--          version instead of full gantt_state timelines
+-- =====================================================
+
+-- NULL for baseline snapshots and snapshots created before this migration
+ALTER TABLE public.session_snapshots
+    ADD COLUMN IF NOT EXISTS timeline_diff JSONB;
+
+COMMENT ON COLUMN public.session_snapshots.timeline_diff IS
+'Structural CPM diff against the timeline before this snapshot: changed ES/EF per WBS item, slack deltas, items entering/leaving the critical path and the completion date shift.';
+
+-- =====================================================
+-- Recreate create_contract_snapshot with p_timeline_diff
+-- =====================================================
+
+DROP FUNCTION IF EXISTS public.create_contract_snapshot(UUID, VARCHAR, BIGINT, INTEGER, VARCHAR, BIGINT, BIGINT, DATE, INTEGER, JSONB, JSONB);
+
+CREATE OR REPLACE FUNCTION public.create_contract_snapshot(
+    p_session_id UUID,
+    p_wbs_id VARCHAR(50),
+    p_cost BIGINT,
+    p_duration INTEGER,
+    p_supplier VARCHAR(255),
+    p_budget_committed BIGINT,
+    p_budget_available BIGINT,
+    p_project_end_date DATE,
+    p_days_before_deadline INTEGER,
+    p_gantt_state JSONB DEFAULT '{}'::jsonb,
+    p_precedence_state JSONB DEFAULT '{}'::jsonb,
+    p_timeline_diff JSONB DEFAULT NULL
+)
+RETURNS UUID
+LANGUAGE plpgsql
+SECURITY DEFINER  -- Run as function owner, bypass RLS (see migration 005)
+AS $$
+DECLARE
+    v_snapshot_id UUID;
+    v_label VARCHAR(255);
+BEGIN
+    -- Generate label from WBS data
+    v_label := 'WBS ' || p_wbs_id || ' - Akseptert';
+
+    INSERT INTO public.session_snapshots (
+        session_id,
+        label,
+        snapshot_type,
+        budget_committed,
+        budget_available,
+        budget_total,
+        contract_wbs_id,
+        contract_cost,
+        contract_duration,
+        contract_supplier,
+        project_end_date,
+        days_before_deadline,
+        gantt_state,
+        precedence_state,
+        timeline_diff
+    )
+    VALUES (
+        p_session_id,
+        v_label,
+        'contract_acceptance',
+        p_budget_committed,
+        p_budget_available,
+        70000000000,  -- Always 700 MNOK (70 billion øre)
+        p_wbs_id,
+        p_cost,
+        p_duration,
+        p_supplier,
+        p_project_end_date,
+        p_days_before_deadline,
+        p_gantt_state,
+        p_precedence_state,
+        p_timeline_diff
+    )
+    RETURNING id INTO v_snapshot_id;
+
+    RAISE NOTICE 'Contract snapshot created with ID: %', v_snapshot_id;
+
+    RETURN v_snapshot_id;
+END;
+$$;
+
+COMMENT ON FUNCTION public.create_contract_snapshot IS
+'Creates a snapshot when a vendor contract is accepted. Stores complete timeline state (Gantt, Precedence) and the timeline diff against the previous state. Runs with SECURITY DEFINER to bypass RLS. Returns snapshot ID.';
+
+-- =====================================================
+-- ROLLBACK (if needed)
+-- =====================================================
+
+-- Re-run the create_contract_snapshot section of migration 005, then:
+-- ALTER TABLE public.session_snapshots DROP COLUMN IF EXISTS timeline_diff;
@@ -5,7 +5,7 @@ import type { AgentPrompt } from "./page";
 import { ChatInterface } from "@/components/chat-interface";
 import { sendChatMessage, getNegotiationHistory } from "@/lib/api/chat";
 import { createSession, getUserSessions } from "@/lib/api/sessions";
-import type { ChatMessage, GameContext } from "@/types";
+import type { GameContext } from "@/types";
 
 interface ChatPageClientProps {
   prompts: AgentPrompt[];
@@ -78,14 +78,6 @@ export function ChatPageClient({ prompts }: ChatPageClientProps) {
     setError(null);
 
     try {
-      // Convert messages to API format
-      const conversationHistory: ChatMessage[] = messages.map((msg) => ({
-        id: msg.id,
-        role: msg.sender,
-        content: msg.text,
-        timestamp: new Date().toISOString(),
-      }));
-
       // Build game context (basic for now)
       const gameContext: GameContext = {
         total_budget: 700_000_000,
@@ -101,7 +93,6 @@ export function ChatPageClient({ prompts }: ChatPageClientProps) {
         sessionId,
         agentId,
         messageText,
-        conversationHistory,
         gameContext
       );
 
@@ -186,20 +186,11 @@ export function ChatInterface({
     setError(null);
 
     try {
-      // Build conversation history
-      const conversationHistory = messages.map((msg) => ({
-        role: msg.role,
-        content: msg.content,
-        timestamp: msg.timestamp,
-        is_disagreement: msg.is_disagreement,
-      }));
-
       // Send to backend
       const response = await sendChatMessage(
         sessionId,
         agentId,
         inputMessage,
-        conversationHistory,
         gameContext
       );
 
@@ -33,6 +33,7 @@ interface Snapshot {
   days_before_deadline: number;
   gantt_state: any;
   precedence_state: any;
+  timeline_diff?: any | null;
   timestamp: string;
   created_at: string;
 }
@@ -21,7 +21,6 @@ export async function sendChatMessage(
   sessionId: string,
   agentId: string,
   message: string,
-  conversationHistory: ChatMessage[], // Changed to ChatMessage[]
   gameContext?: GameContext
 ): Promise<ChatResponse> {
   const supabase = createClient();
@@ -39,13 +38,7 @@ export async function sendChatMessage(
   const request: ChatRequest = {
     session_id: sessionId,
     agent_id: agentId,
-    message,
-    conversation_history: conversationHistory.map(msg => ({ // Map ChatMessage to ConversationMessage for backend
-      role: msg.role === 'user' ? 'user' : 'agent', // Explicitly set role as 'user' or 'agent'
-      content: msg.content,
-      // The backend ConversationMessage expects only role and content, not id, timestamp, etc.
-      // So we only send what's expected.
-    })),
+    message, // The backend loads the conversation history itself
     game_context: gameContext,
   };
 
@@ -82,6 +75,92 @@ export async function sendChatMessage(
   return data;
 }
 
+/**
+ * Send a chat message and receive the agent response as it is generated.
+ * Calls onToken with each text chunk and resolves with the saved response
+ * once the backend has stored it in the negotiation history.
+ */
+export async function streamChatMessage(
+  sessionId: string,
+  agentId: string,
+  message: string,
+  onToken: (text: string) => void,
+  gameContext?: GameContext
+): Promise<ChatResponse> {
+  const supabase = createClient();
+
+  // Get JWT token from Supabase session
+  const {
+    data: { session },
+    error: authError,
+  } = await supabase.auth.getSession();
+
+  if (authError || !session) {
+    throw new Error('Ikke autentisert. Vennligst logg inn igjen.');
+  }
+
+  const request: ChatRequest = {
+    session_id: sessionId,
+    agent_id: agentId,
+    message,
+    game_context: gameContext,
+  };
+
+  const response = await fetch(`${API_URL}/api/chat/stream`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      Accept: 'text/event-stream',
+      Authorization: `Bearer ${session.access_token}`,
+    },
+    body: JSON.stringify(request),
+  });
+
+  if (!response.ok || !response.body) {
+    const errorData = await response.json().catch(() => ({}));
+    throw new Error(
+      errorData.detail || errorData.message || 'Kunne ikke sende melding til agenten.'
+    );
+  }
+
+  // Server-sent events: "event: <name>\ndata: <json>\n\n"
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary = buffer.indexOf('\n\n');
+    while (boundary !== -1) {
+      const rawEvent = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      boundary = buffer.indexOf('\n\n');
+
+      let event = 'message';
+      let data = '';
+      for (const line of rawEvent.split('\n')) {
+        if (line.startsWith('event: ')) event = line.slice(7);
+        else if (line.startsWith('data: ')) data += line.slice(6);
+      }
+      if (!data) continue;
+
+      const payload = JSON.parse(data);
+      if (event === 'token') {
+        onToken(payload.text);
+      } else if (event === 'done') {
+        return payload as ChatResponse;
+      } else if (event === 'error') {
+        throw new Error(payload.detail || 'Kunne ikke sende melding til agenten.');
+      }
+    }
+  }
+
+  throw new Error('Forbindelsen ble brutt før agenten svarte ferdig.');
+}
+
 /**
  * Get negotiation history for a session and agent
  */
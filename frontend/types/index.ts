@@ -143,7 +143,6 @@ export interface ChatRequest {
   session_id: string;
   agent_id: string;
   message: string;
-  conversation_history: ConversationMessage[];
   game_context?: GameContext;
 }
 